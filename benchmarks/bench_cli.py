@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Throughput and latency of the real CLI paths against a local media server.
+
+Serves synthetic progressive MP4s, HLS playlists and DASH-style fragment
+sets from 127.0.0.1, registers a stand-in yt-dlp extractor for them
+(benchmarks/plugins) and runs ``vdl`` in subprocesses for a single URL,
+a ``-b`` batch, a ``--playlist`` and ``-a``. Prints a JSON report with
+URLs/min, MB/s, time to first byte and peak RSS per scenario; pass an
+earlier report to --compare to see what changed. No network access is
+needed.
+
+    python benchmarks/bench_cli.py --urls 20 --jobs 4 -o before.json
+    python benchmarks/bench_cli.py --urls 20 --jobs 4 --compare before.json
+"""
+import argparse
+import http.server
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PLUGINS = os.path.join(ROOT, 'benchmarks', 'plugins')
+
+sys.path.insert(0, ROOT)
+
+from video_downloader.profiles import parse_size  # noqa: E402
+
+SCENARIOS = ('single', 'batch', 'playlist', 'audio')
+
+# Media kinds the batch and playlist scenarios cycle through
+VIDEO_KINDS = ('prog', 'hls', 'dash')
+
+BLOCK_SIZE = 1024 * 1024
+SEGMENT_SECONDS = 4
+
+
+class MediaServer:
+    """Local server for the vdlbench extractor.
+
+    /vdl-bench/api/{watch,playlist}/<id> return info dicts; video IDs look
+    like prog-3, hls-3, dash-3 or audio-3 and playlist IDs like mixed-20.
+    Media is generated on the fly from one random block. Served media
+    bytes and the first byte's time are counted for the report.
+    """
+
+    def __init__(self, size, segments, latency, audio=None):
+        self.size = size
+        self.segments = max(1, segments)
+        self.latency = latency
+        self.audio = audio
+        self.block = os.urandom(BLOCK_SIZE)
+        self._lock = threading.Lock()
+        self.reset()
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), BenchHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.bench = self
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def reset(self):
+        with self._lock:
+            self.bytes_sent = 0
+            self.first_byte = None
+            self.requests = 0
+
+    def counted(self, nbytes):
+        with self._lock:
+            if self.first_byte is None:
+                self.first_byte = time.monotonic()
+            self.bytes_sent += nbytes
+
+    def watch_url(self, video_id):
+        return f'{self.base_url}/vdl-bench/watch/{video_id}'
+
+    def playlist_url(self, count):
+        return f'{self.base_url}/vdl-bench/playlist/mixed-{count}'
+
+    def video_info(self, video_id):
+        kind = video_id.partition('-')[0]
+        media = f'{self.base_url}/vdl-bench/media/{kind}/{video_id}'
+        video = {'vcodec': 'avc1.64001f', 'acodec': 'mp4a.40.2', 'width': 1280, 'height': 720}
+        if kind == 'prog':
+            formats = [{'format_id': 'prog', 'url': f'{media}.mp4', 'ext': 'mp4',
+                        'filesize': self.size, **video}]
+        elif kind == 'hls':
+            # .ts keeps yt-dlp's MPEG-TS fixup from running ffmpeg on random bytes
+            formats = [{'format_id': 'hls', 'url': f'{media}/index.m3u8', 'ext': 'ts',
+                        'protocol': 'm3u8_native', **video}]
+        elif kind == 'dash':
+            formats = [{'format_id': 'dash', 'url': f'{media}/', 'ext': 'mp4',
+                        'protocol': 'http_dash_segments', 'fragment_base_url': f'{media}/',
+                        'fragments': [{'path': f'seg{i}.m4s', 'duration': SEGMENT_SECONDS}
+                                      for i in range(self.segments)],
+                        **video}]
+        elif kind == 'audio' and self.audio:
+            formats = [{'format_id': 'audio', 'url': f'{media}.m4a', 'ext': 'm4a',
+                        'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128,
+                        'filesize': len(self.audio)}]
+        else:
+            return None
+        return {
+            'id': video_id,
+            'title': f'Bench {video_id}',
+            'uploader': 'vdl-bench',
+            'duration': self.segments * SEGMENT_SECONDS,
+            'webpage_url': self.watch_url(video_id),
+            'formats': formats,
+        }
+
+    def playlist_info(self, playlist_id):
+        count = int(playlist_id.partition('-')[2] or 0)
+        entries = []
+        for i in range(count):
+            video_id = f'{VIDEO_KINDS[i % len(VIDEO_KINDS)]}-p{i}'
+            entries.append({'_type': 'url', 'ie_key': 'VdlBench', 'id': video_id,
+                            'title': f'Bench {video_id}', 'url': self.watch_url(video_id)})
+        return {'_type': 'playlist', 'id': playlist_id, 'title': f'Bench {playlist_id}',
+                'uploader': 'vdl-bench', 'entries': entries}
+
+    def hls_playlist(self):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}',
+                 '#EXT-X-MEDIA-SEQUENCE:0']
+        for i in range(self.segments):
+            lines += [f'#EXTINF:{SEGMENT_SECONDS}.0,', f'seg{i}.ts']
+        lines.append('#EXT-X-ENDLIST')
+        return ('\n'.join(lines) + '\n').encode()
+
+
+class BenchHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        bench = self.server.bench
+        with bench._lock:
+            bench.requests += 1
+        if bench.latency:
+            time.sleep(bench.latency)
+
+        path = self.path.split('?')[0]
+        match = re.fullmatch(r'/vdl-bench/api/(watch|playlist)/([\w-]+)', path)
+        if match:
+            kind, item_id = match.groups()
+            info = bench.video_info(item_id) if kind == 'watch' else bench.playlist_info(item_id)
+            if info is None:
+                return self.send_error(404)
+            return self._send_bytes(json.dumps(info).encode(), 'application/json')
+
+        match = re.fullmatch(r'/vdl-bench/media/(\w+)/[\w-]+(?:\.(\w+)|/(\w+)(?:\.(\w+))?)', path)
+        if not match:
+            return self.send_error(404)
+        kind, ext, name, _ = match.groups()
+        segment_size = max(1, bench.size // bench.segments)
+        if kind == 'prog' and ext == 'mp4':
+            self._send_media(bench.size, 'video/mp4')
+        elif kind == 'audio' and ext == 'm4a' and bench.audio:
+            self._send_bytes(bench.audio, 'audio/mp4', count=True)
+        elif kind == 'hls' and name == 'index':
+            self._send_bytes(bench.hls_playlist(), 'application/vnd.apple.mpegurl')
+        elif kind in ('hls', 'dash') and name and name.startswith('seg'):
+            self._send_media(segment_size, 'video/mp2t' if kind == 'hls' else 'video/iso.segment')
+        else:
+            self.send_error(404)
+
+    def _send_bytes(self, data, content_type, count=False):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        if count:
+            self.server.bench.counted(len(data))
+
+    def _send_media(self, size, content_type):
+        """Send size synthetic bytes, honouring a single Range header."""
+        start, end = 0, size - 1
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+        if match and match.group(1):
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(end, int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+
+        bench = self.server.bench
+        block = memoryview(bench.block)
+        position = start
+        try:
+            while position <= end:
+                offset = position % BLOCK_SIZE
+                chunk = block[offset:offset + min(BLOCK_SIZE - offset, end - position + 1, 256 * 1024)]
+                self.wfile.write(chunk)
+                bench.counted(len(chunk))
+                position += len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def make_audio(tmp):
+    """A real 30 s AAC file, so -a has something ffmpeg can convert."""
+    if not shutil.which('ffmpeg'):
+        return None
+    path = os.path.join(tmp, 'tone.m4a')
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440:duration=30',
+         '-c:a', 'aac', '-b:a', '128k', path, '-y'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if result.returncode:
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def run_vdl(server, args, workdir):
+    """Run the CLI once; return wall time, exit code, TTFB and peak RSS."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (ROOT, PLUGINS, env.get('PYTHONPATH')) if p)
+    # Fresh caches for every run: the numbers are for a cold start
+    env['XDG_CACHE_HOME'] = os.path.join(workdir, 'cache')
+    env['XDG_CONFIG_HOME'] = os.path.join(workdir, 'config')
+    env.pop('YTDLP_NO_PLUGINS', None)
+
+    server.reset()
+    start = time.monotonic()
+    proc = subprocess.Popen([sys.executable, '-m', 'video_downloader.cli', *args], cwd=workdir,
+                            env=env, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # Drain stderr on a thread so a chatty child never blocks on the pipe
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True)
+    reader.start()
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.monotonic() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    reader.join()
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss_bytes = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return {
+        'seconds': elapsed,
+        'exit_code': proc.returncode,
+        'bytes': server.bytes_sent,
+        'ttfb_ms': (server.first_byte - start) * 1000 if server.first_byte else None,
+        'peak_rss_mb': rss_bytes / 2 ** 20,
+        'stderr': (stderr[0] if stderr else b'').decode('utf-8', 'replace')[-2000:],
+    }
+
+
+def scenario_args(name, server, workdir, urls, jobs):
+    """CLI arguments for a scenario and the number of URLs it downloads."""
+    out = ['-p', 'youtube', '-o', os.path.join(workdir, 'out')]
+    if name == 'single':
+        return [*out, server.watch_url('prog-1')], 1
+    if name == 'audio':
+        return [*out, '-a', server.watch_url('audio-1')], 1
+    if name == 'batch':
+        path = os.path.join(workdir, 'urls.txt')
+        with open(path, 'w') as f:
+            for i in range(urls):
+                f.write(server.watch_url(f'{VIDEO_KINDS[i % len(VIDEO_KINDS)]}-{i}') + '\n')
+        return [*out, '-b', path, '-j', str(jobs)], urls
+    if name == 'playlist':
+        return [*out, '--playlist', server.playlist_url(urls), '-j', str(jobs)], urls
+    raise ValueError(name)
+
+
+def run_scenario(name, server, urls, jobs, repeat):
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix='vdl-bench-') as workdir:
+            args, count = scenario_args(name, server, workdir, urls, jobs)
+            run = run_vdl(server, args, workdir)
+            run['urls'] = count
+            runs.append(run)
+
+    failed = [r for r in runs if r['exit_code'] != 0]
+    seconds = statistics.median(r['seconds'] for r in runs)
+    ttfbs = [r['ttfb_ms'] for r in runs if r['ttfb_ms'] is not None]
+    result = {
+        'runs': len(runs),
+        'failed_runs': len(failed),
+        'urls': runs[0]['urls'],
+        'seconds': round(seconds, 3),
+        'urls_per_min': round(runs[0]['urls'] / seconds * 60, 1),
+        'mb_per_s': round(statistics.median(r['bytes'] for r in runs) / 2 ** 20 / seconds, 2),
+        'ttfb_ms': round(statistics.median(ttfbs), 1) if ttfbs else None,
+        'peak_rss_mb': round(max(r['peak_rss_mb'] for r in runs), 1),
+    }
+    if failed:
+        result['last_error'] = failed[-1]['stderr'].strip().splitlines()[-1:] or ''
+    return result
+
+
+# Metrics where a larger value is better; the others are better smaller
+HIGHER_IS_BETTER = ('urls_per_min', 'mb_per_s')
+COMPARED = ('urls_per_min', 'mb_per_s', 'ttfb_ms', 'peak_rss_mb')
+
+
+def compare(report, baseline):
+    """Print per-scenario changes against an earlier report on stderr."""
+    for name, result in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before or 'skipped' in result or 'skipped' in before:
+            continue
+        parts = []
+        for metric in COMPARED:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if metric in HIGHER_IS_BETTER else change < 0
+            marker = '+' if better else '-' if abs(change) >= 5 else ' '
+            parts.append(f"{metric}={new} ({change:+.1f}%){marker}")
+        print(f"{name:<9} " + '  '.join(parts), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'Comma-separated subset of {",".join(SCENARIOS)}')
+    parser.add_argument('--urls', type=int, default=12,
+                        help='URLs in the batch and playlist scenarios (default: 12)')
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                        help='--jobs passed to batch and playlist runs (default: 4)')
+    parser.add_argument('--size', default='8M', help='Bytes per video (default: 8M)')
+    parser.add_argument('--segments', type=int, default=8,
+                        help='Fragments per HLS/DASH video (default: 8)')
+    parser.add_argument('--latency-ms', type=float, default=20,
+                        help='Delay before every server response (default: 20)')
+    parser.add_argument('-n', '--repeat', type=int, default=3,
+                        help='Runs per scenario; medians are reported (default: 3)')
+    parser.add_argument('-o', '--output', metavar='FILE', help='Also write the report to FILE')
+    parser.add_argument('--compare', metavar='FILE', help='Earlier report to compare against')
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(',') if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix='vdl-bench-media-') as tmp:
+        audio = make_audio(tmp) if 'audio' in names else None
+        server = MediaServer(parse_size(args.size), args.segments, args.latency_ms / 1000, audio)
+
+        report = {
+            'config': {'urls': args.urls, 'jobs': args.jobs, 'size': parse_size(args.size),
+                       'segments': args.segments, 'latency_ms': args.latency_ms,
+                       'repeat': args.repeat},
+            'environment': {'python': platform.python_version(), 'platform': sys.platform,
+                            'cpus': os.cpu_count()},
+            'scenarios': {},
+        }
+        for name in names:
+            if name == 'audio' and not audio:
+                report['scenarios'][name] = {'skipped': 'ffmpeg not found'}
+                continue
+            print(f"running {name}...", file=sys.stderr)
+            report['scenarios'][name] = run_scenario(name, server, args.urls, args.jobs,
+                                                     args.repeat)
+        server.httpd.shutdown()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 1 if any(r.get('failed_runs') for r in report['scenarios'].values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
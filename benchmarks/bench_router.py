@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Per-URL cost of routing a batch corpus, before any network access.
+
+Builds a synthetic corpus of N URLs (default: one million) the way batch
+files look in practice: the same videos over and over with tracking
+parameters, mobile hosts, short forms and a share of unrelated sites.
+Times router.route() and, for reference, the substring checks
+detect_platform used before, then reports how many distinct videos the
+router's keys collapse the corpus to. With --ytdlp-sample it also times
+yt-dlp's extractor matching (the old video_id_from_url) on a sample.
+
+    python benchmarks/bench_router.py -n 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from video_downloader.router import route  # noqa: E402
+
+TRACKING = ('', '&utm_source=share', '&si=AbCdEf123', '&feature=youtu.be', '&t=42s',
+            '&igsh=MXZ4', '&is_from_webapp=1&sender_device=pc')
+ALPHABET = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_'
+
+
+def legacy_detect_platform(url):
+    """detect_platform as it was: substring checks on the lowercased URL."""
+    url_lower = url.lower()
+    if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
+        return 'youtube'
+    elif 'tiktok.com' in url_lower:
+        return 'tiktok'
+    elif 'instagram.com' in url_lower:
+        return 'instagram'
+    elif 'facebook.com' in url_lower or 'fb.watch' in url_lower:
+        return 'facebook'
+    elif 'twitter.com' in url_lower or 'x.com' in url_lower:
+        return 'twitter'
+    return None
+
+
+def make_corpus(count, videos, seed=1):
+    rng = random.Random(seed)
+    youtube = [''.join(rng.choices(ALPHABET, k=11)) for _ in range(videos)]
+    numeric = [str(rng.randrange(10 ** 18, 10 ** 19)) for _ in range(videos)]
+    shortcodes = [''.join(rng.choices(ALPHABET, k=11)) for _ in range(videos)]
+    forms = (
+        lambda: f'https://www.youtube.com/watch?v={rng.choice(youtube)}{rng.choice(TRACKING)}',
+        lambda: f'https://m.youtube.com/watch?feature=share&v={rng.choice(youtube)}',
+        lambda: f'https://youtu.be/{rng.choice(youtube)}?si=AbCdEf123',
+        lambda: f'https://www.youtube.com/shorts/{rng.choice(youtube)}',
+        lambda: f'https://www.tiktok.com/@user/video/{rng.choice(numeric)}?{rng.choice(TRACKING)[1:]}',
+        lambda: f'https://www.instagram.com/reel/{rng.choice(shortcodes)}/?igsh=MXZ4',
+        lambda: f'https://x.com/user/status/{rng.choice(numeric)}?s=20',
+        lambda: f'https://mobile.twitter.com/user/status/{rng.choice(numeric)}',
+        lambda: f'https://www.facebook.com/watch/?v={rng.choice(numeric)}',
+        lambda: f'https://vm.tiktok.com/{rng.choice(shortcodes)[:9]}/',
+        # Hosts the substring checks misroute
+        lambda: f'https://www.max.com/movies/{rng.choice(shortcodes)}',
+        lambda: f'https://example.com/page?list={rng.choice(numeric)}',
+    )
+    weights = (30, 6, 8, 6, 15, 10, 6, 2, 4, 5, 4, 4)
+    return [form() for form in rng.choices(forms, weights, k=count)]
+
+
+def timed(func, urls):
+    start = time.perf_counter()
+    results = [func(url) for url in urls]
+    return time.perf_counter() - start, results
+
+
+def report(name, seconds, count):
+    print(f"{name:<28} {seconds:7.2f} s  {seconds / count * 1e9:8.0f} ns/URL  "
+          f"{count / seconds:12,.0f} URLs/s")
+
+
+def ytdlp_video_id(url, extractors):
+    for ie in extractors:
+        if ie.suitable(url):
+            video_id = ie.get_temp_id(url)
+            return (ie.ie_key().lower(), video_id) if video_id else None
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=1_000_000, help='URLs in the corpus')
+    parser.add_argument('--videos', type=int, default=50_000,
+                        help='Distinct video IDs per platform (default: 50000)')
+    parser.add_argument('--ytdlp-sample', type=int, default=0, metavar='N',
+                        help="Also time yt-dlp's extractor matching on N URLs")
+    args = parser.parse_args()
+
+    urls = make_corpus(args.n, args.videos)
+    print(f"{len(urls):,} URLs")
+
+    seconds, legacy = timed(legacy_detect_platform, urls)
+    report('substring detect_platform', seconds, len(urls))
+    seconds, routes = timed(route, urls)
+    report('router.route', seconds, len(urls))
+
+    misrouted = sum(1 for old, new in zip(legacy, routes)
+                    if old != (new.platform if new else None))
+    keys = {r.key for r in routes if r and r.key}
+    routed = sum(1 for r in routes if r and r.key)
+    print(f"platform differs from the substring checks: {misrouted:,} URLs")
+    print(f"video URLs: {routed:,}, distinct videos: {len(keys):,} "
+          f"({routed - len(keys):,} duplicates skipped before any request)")
+
+    if args.ytdlp_sample:
+        from yt_dlp.extractor import gen_extractor_classes
+
+        extractors = [ie for ie in gen_extractor_classes() if ie.ie_key() != 'Generic']
+        sample = urls[:args.ytdlp_sample]
+        seconds, _ = timed(lambda url: ytdlp_video_id(url, extractors), sample)
+        report('yt-dlp extractor matching', seconds, len(sample))
+
+
+if __name__ == '__main__':
+    main()
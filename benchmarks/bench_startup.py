@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""CLI startup time for the paths scripts hit most often.
+
+Times ``vdl --help``, a bad-URL error and platform detection in fresh
+interpreters, next to a bare ``python -c pass`` for reference. Exits
+non-zero when a median exceeds the budget.
+
+    python benchmarks/bench_startup.py -n 20 --budget-ms 100
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CASES = {
+    'python -c pass': ['-c', 'pass'],
+    'vdl --help': ['-m', 'video_downloader.cli', '--help'],
+    'vdl <bad url>': ['-m', 'video_downloader.cli', 'https://example.com/not-a-video'],
+    'detect_platform': ['-c', 'from video_downloader.utils import detect_platform; '
+                              'detect_platform("https://www.tiktok.com/@u/video/1")'],
+}
+
+# Modules that must not be imported on these paths
+HEAVY = ('yt_dlp', 'rich', 'questionary', 'requests')
+
+
+def time_case(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def heavy_imports(args):
+    code = ('import runpy, sys\n'
+            f'sys.argv = {["vdl", *args[2:]]!r}\n'
+            'try:\n'
+            f'    runpy.run_module({args[1]!r}, run_name="__main__")\n'
+            'except SystemExit:\n'
+            '    pass\n'
+            f'print("HEAVY:" + ",".join(m for m in {HEAVY!r} if m in sys.modules))')
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    for line in out.stdout.splitlines():
+        if line.startswith('HEAVY:'):
+            return line[len('HEAVY:'):]
+    return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=10, help='Runs per case (default: 10)')
+    parser.add_argument('--budget-ms', type=float, default=100,
+                        help='Fail if a vdl case median exceeds this (default: 100)')
+    args = parser.parse_args()
+
+    over_budget = False
+    for name, case in CASES.items():
+        timings = time_case(case, args.n)
+        median = statistics.median(timings)
+        line = f"{name:<16} median={median:7.1f} ms  min={min(timings):7.1f} ms"
+        if case[0] == '-m':
+            loaded = heavy_imports(case)
+            line += f"  heavy imports: {loaded or 'none'}"
+            over_budget |= bool(loaded)
+        if name != 'python -c pass' and median > args.budget_ms:
+            line += '  OVER BUDGET'
+            over_budget = True
+        print(line)
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Per-URL overhead of fresh YoutubeDL handles vs. the shared handle pool.
+
+Serves a small file from a local HTTP server and extracts it N times,
+once creating a new YoutubeDL per URL (the old behaviour) and once
+through ``ydl_pool``. No network access is needed.
+
+    python benchmarks/bench_ydl_pool.py -n 200
+"""
+import argparse
+import functools
+import http.server
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import yt_dlp  # noqa: E402
+
+from video_downloader.downloaders.sessions import YoutubeDLPool  # noqa: E402
+
+OPTS = {'quiet': True, 'no_warnings': True}
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_fresh(urls):
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        with yt_dlp.YoutubeDL(dict(OPTS)) as ydl:
+            ydl.extract_info(url, download=False)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_pooled(urls):
+    pool = YoutubeDLPool()
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        with pool.session('bench', OPTS) as ydl:
+            ydl.extract_info(url, download=False)
+        timings.append(time.perf_counter() - start)
+    pool.close()
+    return timings
+
+
+def report(name, timings):
+    ms = [t * 1000 for t in timings]
+    print(f"{name:<8} n={len(ms):<5} mean={statistics.mean(ms):7.2f} ms  "
+          f"median={statistics.median(ms):7.2f} ms  total={sum(ms) / 1000:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=100, help='URLs per run (default: 100)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.n):
+            with open(os.path.join(tmp, f'clip{i}.mp4'), 'wb') as f:
+                f.write(os.urandom(4096))
+        server = serve(tmp)
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        urls = [f'{base}/clip{i}.mp4' for i in range(args.n)]
+
+        # Warm imports and the extractor registry before timing either side
+        run_fresh(urls[:1])
+        fresh = run_fresh(urls)
+        pooled = run_pooled(urls)
+        server.shutdown()
+
+    report('fresh', fresh)
+    report('pooled', pooled)
+    saved = statistics.mean(fresh) - statistics.mean(pooled)
+    print(f"saved per URL: {saved * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+"""Stand-in extractor for the local server started by bench_cli.py.
+
+yt-dlp loads it as a plugin when benchmarks/plugins is on PYTHONPATH.
+The server describes every video and playlist as a ready-made info dict,
+so extraction costs exactly one local request.
+"""
+from yt_dlp.extractor.common import InfoExtractor
+
+
+class VdlBenchIE(InfoExtractor):
+    IE_NAME = 'vdlbench'
+    _VALID_URL = (r'(?P<base>https?://(?:127\.0\.0\.1|localhost):\d+)'
+                  r'/vdl-bench/(?P<kind>watch|playlist)/(?P<id>[\w-]+)')
+
+    def _real_extract(self, url):
+        base, kind, item_id = self._match_valid_url(url).group('base', 'kind', 'id')
+        return self._download_json(f'{base}/vdl-bench/api/{kind}/{item_id}', item_id)
@@ -20,7 +20,7 @@ setup(
             'vdl=video_downloader.cli:main',  # Short alias
         ],
     },
-    python_requires=">=3.6",
+    python_requires=">=3.9",
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+
+import pytest
+
+from video_downloader import bandwidth
+from video_downloader.bandwidth import MIN_RATE, BandwidthGovernor, parse_weights
+
+MB = 1024 * 1024
+
+
+class FakeYDL:
+    def __init__(self, ratelimit=None):
+        self.params = {'ratelimit': ratelimit} if ratelimit else {}
+        self._progress_hooks = []
+
+    def add_progress_hook(self, hook):
+        self._progress_hooks.append(hook)
+
+
+@pytest.fixture
+def governor(tmp_path):
+    return BandwidthGovernor(8 * MB, state_path=tmp_path / 'bandwidth.json')
+
+
+def test_parse_weights():
+    assert parse_weights('youtube=2, tiktok=0.5,') == {'youtube': 2.0, 'tiktok': 0.5}
+    assert parse_weights(None) == {}
+    for text in ('vimeo=1', 'youtube=fast', 'youtube=0'):
+        with pytest.raises(ValueError):
+            parse_weights(text)
+
+
+def test_rate_is_split_between_platforms_then_jobs(governor):
+    first, second, third = FakeYDL(), FakeYDL(), FakeYDL()
+    with governor.job('youtube', first), governor.job('youtube', second):
+        assert first.params['ratelimit'] == 4 * MB
+        with governor.job('tiktok', third):
+            assert governor.shares() == {'youtube': 2 * MB, 'tiktok': 4 * MB}
+            assert first.params['ratelimit'] == second.params['ratelimit'] == 2 * MB
+        assert first.params['ratelimit'] == 4 * MB
+    assert first.params['ratelimit'] is None
+
+
+def test_weights_and_own_limits(governor):
+    governor.configure(8 * MB, {'youtube': 3})
+    capped, other = FakeYDL(ratelimit=1 * MB), FakeYDL()
+    with governor.job('youtube', capped), governor.job('tiktok', other):
+        assert governor.shares() == {'youtube': 6 * MB, 'tiktok': 2 * MB}
+        # A lower limit of the job's own stays in force
+        assert capped.params['ratelimit'] == 1 * MB
+    assert capped.params['ratelimit'] == 1 * MB
+
+
+def test_share_has_a_floor(governor):
+    governor.configure(100 * 1024)
+    ydls = [FakeYDL() for _ in range(10)]
+    jobs = [governor.job('youtube', ydl) for ydl in ydls]
+    for job in jobs:
+        job.__enter__()
+    assert ydls[0].params['ratelimit'] == MIN_RATE
+    for job in jobs:
+        job.__exit__(None, None, None)
+
+
+@pytest.mark.skipif(bandwidth.fcntl is None, reason='needs fcntl')
+def test_other_processes_share_the_budget(governor):
+    with open(governor.state_path, 'w') as f:
+        json.dump({'999999': {'seen': time.time(), 'jobs': {'youtube': 3}},
+                   '999998': {'seen': 0, 'jobs': {'tiktok': 5}}}, f)
+    ydl = FakeYDL()
+    with governor.job('youtube', ydl):
+        assert ydl.params['ratelimit'] == 2 * MB
+        with open(governor.state_path) as f:
+            state = json.load(f)
+        # Stale entries are dropped; this process publishes its own
+        assert set(state) == {'999999', str(os.getpid())}
+
+
+def test_disabled_governor_leaves_params_alone():
+    ydl = FakeYDL()
+    with BandwidthGovernor().job('youtube', ydl):
+        assert ydl.params == {}
+        assert ydl._progress_hooks == []
@@ -0,0 +1,110 @@
+import io
+import sys
+
+from video_downloader.batch import (
+    BatchCheckpoint, BatchLine, BatchStats, RecentKeys, iter_batch_lines,
+    iter_chunks
+)
+
+URLS = b'https://a.example/1\n\nhttps://a.example/2\r\nhttps://a.example/3'
+
+
+def write_batch(tmp_path, data=URLS):
+    path = tmp_path / 'urls.txt'
+    path.write_bytes(data)
+    return path
+
+
+def test_lines_carry_offsets_and_numbers(tmp_path):
+    lines = list(iter_batch_lines(str(write_batch(tmp_path))))
+    assert [(line.lineno, line.url) for line in lines] == [
+        (1, 'https://a.example/1'), (2, ''), (3, 'https://a.example/2'),
+        (4, 'https://a.example/3')]
+    assert [line.offset for line in lines] == [0, 20, 21, 42]
+    assert lines[-1].end == len(URLS)
+
+
+def test_reading_resumes_at_an_offset(tmp_path):
+    lines = list(iter_batch_lines(str(write_batch(tmp_path)), 21, 3))
+    assert [(line.lineno, line.url) for line in lines] == [
+        (3, 'https://a.example/2'), (4, 'https://a.example/3')]
+
+
+def test_stdin_skips_to_the_offset(monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(URLS)))
+    lines = list(iter_batch_lines('-', 21, 3))
+    assert [line.offset for line in lines] == [21, 42]
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_chunks([], 2)) == []
+
+
+def test_watermark_advances_over_contiguous_lines(tmp_path):
+    path = write_batch(tmp_path)
+    checkpoint = BatchCheckpoint(tmp_path / 'cp', str(path), save_interval=3600)
+    first, blank, second, third = iter_batch_lines(str(path))
+    for line in (first, blank, second, third):
+        checkpoint.started(line)
+
+    # Out of order: nothing before the first line is done yet
+    checkpoint.completed(second)
+    assert checkpoint.watermark == 0
+    assert checkpoint.is_done(second) and not checkpoint.is_done(first)
+
+    checkpoint.completed(first)
+    checkpoint.completed(blank)
+    assert (checkpoint.watermark, checkpoint.watermark_lineno) == (second.end, 4)
+    assert checkpoint.done == set()
+
+    checkpoint.completed(third)
+    assert (checkpoint.watermark, checkpoint.watermark_lineno) == (len(URLS), 5)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = write_batch(tmp_path)
+    checkpoint = BatchCheckpoint(tmp_path / 'cp', str(path))
+    first, blank, second, third = iter_batch_lines(str(path))
+    for line in (first, blank, second, third):
+        checkpoint.started(line)
+    checkpoint.completed(first)
+    checkpoint.completed(third)
+    checkpoint.save()
+
+    restored = BatchCheckpoint(tmp_path / 'cp', str(path))
+    assert restored.load()
+    assert restored.watermark == blank.offset and restored.watermark_lineno == 2
+    assert [line.lineno for line in iter_batch_lines(str(path), restored.watermark,
+                                                     restored.watermark_lineno)
+            if not restored.is_done(line)] == [2, 3]
+
+
+def test_checkpoint_of_another_file_is_ignored(tmp_path):
+    path = write_batch(tmp_path)
+    checkpoint = BatchCheckpoint(tmp_path / 'cp', str(path))
+    checkpoint.save()
+    assert not BatchCheckpoint(tmp_path / 'cp', str(tmp_path / 'other.txt')).load()
+    assert not BatchCheckpoint(tmp_path / 'missing', str(path)).load()
+
+
+def test_stats_keep_a_bounded_failure_list():
+    stats = BatchStats(max_failures=2)
+    stats.success()
+    stats.duplicate()
+    for lineno in range(5):
+        stats.failure(BatchLine(None, None, lineno, 'https://a.example/'), 'boom')
+    assert (stats.total, stats.successful, stats.failed, stats.duplicates) == (6, 1, 5, 1)
+    assert [failure[0] for failure in stats.failures] == [0, 1]
+
+
+def test_recent_keys_stay_bounded():
+    recent = RecentKeys(2)
+    assert [recent.seen(key) for key in 'aab'] == [False, True, False]
+    # A repeat counts as recent use, so b is the one that ages out
+    assert recent.seen('a') and not recent.seen('c')
+    assert len(recent) == 2
+    assert not recent.seen('b')
+    for key in range(1000):
+        recent.seen(key)
+    assert len(recent) == 2
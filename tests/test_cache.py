@@ -0,0 +1,60 @@
+import os
+import time
+
+from video_downloader.cache import MetadataCache
+
+INFO = {'extractor_key': 'Youtube', 'id': 'dQw4w9WgXcQ', 'title': 'A video'}
+
+
+def test_put_and_get(tmp_path):
+    cache = MetadataCache(tmp_path)
+    url = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+    assert cache.put(url, INFO) == 'youtube_dQw4w9WgXcQ'
+    assert cache.get(url) == INFO
+    assert cache.get('https://example.com/other') is None
+
+
+def test_url_variants_share_the_entry(tmp_path):
+    cache = MetadataCache(tmp_path)
+    cache.put('https://www.youtube.com/watch?v=dQw4w9WgXcQ', INFO)
+    # Never seen, but the router reads the same video ID from it
+    assert cache.get('https://youtu.be/dQw4w9WgXcQ?si=abc') == INFO
+
+
+def test_stale_entries_are_ignored(tmp_path):
+    cache = MetadataCache(tmp_path, ttl=60)
+    url = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+    cache.put(url, INFO)
+    entry = tmp_path / 'entries' / 'youtube_dQw4w9WgXcQ.json'
+    old = time.time() - 120
+    os.utime(entry, (old, old))
+    assert cache.get(url) is None
+
+
+def test_info_without_id_is_not_cached(tmp_path):
+    cache = MetadataCache(tmp_path)
+    assert cache.put('https://example.com/x', {'title': 'no id'}) is None
+    assert not (tmp_path / 'entries').exists()
+
+
+def test_oldest_entries_are_evicted(tmp_path):
+    cache = MetadataCache(tmp_path, max_entries=2)
+    for n in range(3):
+        url = f'https://example.com/{n}'
+        cache.put(url, {'extractor_key': 'Generic', 'id': str(n)})
+        entry = tmp_path / 'entries' / f'generic_{n}.json'
+        os.utime(entry, (1000 + n, 1000 + n))
+    cache.put('https://example.com/3', {'extractor_key': 'Generic', 'id': '3'})
+
+    assert sorted(p.stem for p in (tmp_path / 'entries').iterdir()) == ['generic_2', 'generic_3']
+    # Aliases of evicted entries go too
+    assert len(list((tmp_path / 'urls').iterdir())) == 2
+
+
+def test_size_bound(tmp_path):
+    cache = MetadataCache(tmp_path, max_bytes=150)
+    for n in range(3):
+        cache.put(f'https://example.com/{n}', {'extractor_key': 'Generic', 'id': str(n),
+                                               'description': 'x' * 60})
+    total = sum(p.stat().st_size for p in (tmp_path / 'entries').iterdir())
+    assert total <= 150
@@ -0,0 +1,45 @@
+import pytest
+
+from video_downloader.cli import main
+
+
+@pytest.mark.parametrize('argv, message', [
+    (['--sync', '-b', 'urls.txt'], '--sync cannot be combined with --batch'),
+    (['--sync', '-l', 'https://www.youtube.com/@someone'],
+     '--sync cannot be combined with --list-formats'),
+    (['--sync'], '--sync needs a playlist or channel URL'),
+    (['--sync', 'https://www.tiktok.com/@someone'],
+     '--sync only works with YouTube playlists and channels'),
+    (['--sync', '-p', 'instagram', 'https://www.youtube.com/@someone'],
+     '--sync only works with YouTube playlists and channels'),
+])
+def test_sync_is_rejected_where_it_does_nothing(argv, message, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_dump_metadata_skips_only_recent_repeats(monkeypatch, tmp_path):
+    from video_downloader import cli
+    from video_downloader.export import error_record
+
+    monkeypatch.setattr(cli, 'EXPORT_RECENT_KEYS', 2)
+    monkeypatch.setattr(cli.VideoDownloaderCLI, 'get_downloader', lambda self, platform: None)
+    monkeypatch.setattr(cli.VideoDownloaderCLI, '_extract_record', staticmethod(
+        lambda downloader, index, url: error_record(index, url, 'youtube', 'offline')))
+    batch = tmp_path / 'urls.txt'
+    # The second aaaaaaaaaaa is a repeat; the third comes after two others
+    batch.write_text('\n'.join(f'https://youtu.be/{video}' for video in (
+        'aaaaaaaaaaa', 'aaaaaaaaaaa', 'bbbbbbbbbbb', 'ccccccccccc', 'aaaaaaaaaaa')))
+    stats = cli.VideoDownloaderCLI(use_cache=False).dump_metadata(
+        str(tmp_path / 'out.jsonl'), batch=str(batch), jobs=1)
+    assert stats['total'] == 4
+
+
+@pytest.mark.parametrize('flag', ['--max-height', '--max-size', '--max-bitrate'])
+def test_zero_budget_is_rejected(flag, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([flag, '0', 'https://youtu.be/aaaaaaaaaaa'])
+    assert exit_info.value.code == 2
+    assert f'{flag} must be positive' in capsys.readouterr().err
@@ -0,0 +1,46 @@
+import hashlib
+
+from video_downloader.contentstore import StreamHasher
+
+
+def _download(hasher, path, info, chunks):
+    written = 0
+    with open(path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+            f.flush()
+            written += len(chunk)
+            hasher({'status': 'downloading', 'filename': str(path), 'tmpfilename': str(path),
+                    'downloaded_bytes': written, 'info_dict': info})
+    hasher({'status': 'finished', 'filename': str(path), 'info_dict': info})
+
+
+def test_single_stream_is_hashed_while_it_downloads(tmp_path):
+    hasher = StreamHasher()
+    info = {'id': 'a', 'requested_formats': None}
+    hasher.run(info)
+    path = tmp_path / 'a.mp4'
+    _download(hasher, path, info, [b'x' * 1000, b'y' * 500])
+
+    assert hasher.digest(path) == hashlib.sha256(b'x' * 1000 + b'y' * 500).hexdigest()
+
+
+def test_merged_parts_are_not_hashed(tmp_path):
+    hasher = StreamHasher()
+    hasher.run({'id': 'b', 'requested_formats': [{'format_id': '137'}, {'format_id': '140'}]})
+    path = tmp_path / 'b.f137.mp4'
+    _download(hasher, path, {'id': 'b', 'format_id': '137'}, [b'video'])
+
+    assert hasher.digest(path) is None
+    assert not hasher._tails
+
+
+def test_rewritten_file_has_no_digest(tmp_path):
+    hasher = StreamHasher()
+    info = {'id': 'c'}
+    hasher.run(info)
+    path = tmp_path / 'c.mp4'
+    _download(hasher, path, info, [b'before'])
+    path.write_bytes(b'after a fixup')
+
+    assert hasher.digest(path) is None
@@ -0,0 +1,107 @@
+import http.client
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from video_downloader.daemon import DaemonClient, DaemonError, DownloadService, make_server
+
+
+class FakeService:
+    def __init__(self):
+        self.requests = []
+
+    def list(self):
+        return []
+
+    def submit(self, request):
+        self.requests.append(request)
+        raise ValueError('not queued in tests')
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    service = FakeService()
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def raw_request(server, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        conn.request(method, path, body, headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'{}')
+    finally:
+        conn.close()
+
+
+def test_token_file_is_private(server):
+    assert server.token_path.stat().st_mode & 0o777 == 0o600
+    assert server.token_path.read_text() == server.token
+
+
+def test_requests_need_the_token(server):
+    assert raw_request(server, 'GET', '/jobs')[0] == 401
+    status, _ = raw_request(server, 'GET', '/jobs', headers={'Authorization': 'Bearer wrong'})
+    assert status == 401
+    client = DaemonClient(port=server.server_address[1])
+    assert client.status() == []
+
+
+def test_browser_requests_are_refused(server):
+    headers = {'Authorization': f'Bearer {server.token}', 'Content-Type': 'application/json',
+               'Origin': 'http://example.com'}
+    assert raw_request(server, 'POST', '/jobs', '{"url": "x"}', headers)[0] == 403
+    assert server.service.requests == []
+
+
+def test_post_must_be_json(server):
+    headers = {'Authorization': f'Bearer {server.token}',
+               'Content-Type': 'application/x-www-form-urlencoded'}
+    assert raw_request(server, 'POST', '/jobs', '{"url": "x"}', headers)[0] == 415
+    headers['Content-Type'] = 'application/json; charset=utf-8'
+    assert raw_request(server, 'POST', '/jobs', '{"url": "x"}', headers)[0] == 400
+    assert server.service.requests == [{'url': 'x'}]
+
+
+def test_client_without_daemon_reports_missing_token(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    with pytest.raises(DaemonError, match='token'):
+        DaemonClient(port=1).status()
+
+
+def test_output_dir_must_stay_inside_the_root(tmp_path):
+    service = DownloadService.__new__(DownloadService)
+    service.output_dir = str(tmp_path)
+    assert service._output_dir(None) == str(tmp_path)
+    assert service._output_dir(str(tmp_path / 'music')) == str(tmp_path / 'music')
+    assert service._output_dir('music') == str(tmp_path / 'music')
+    for outside in ('/etc', str(tmp_path / '..' / 'elsewhere'), '../elsewhere'):
+        with pytest.raises(ValueError):
+            service._output_dir(outside)
+
+
+def test_unknown_audio_format_is_a_bad_request(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    service = DownloadService.__new__(DownloadService)
+    service.cli = SimpleNamespace(audio_format='mp3')
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        headers = {'Authorization': f'Bearer {server.token}',
+                   'Content-Type': 'application/json'}
+        body = json.dumps({'url': 'https://youtu.be/aaaaaaaaaaa', 'audio_format': 'wav'})
+        status, reply = raw_request(server, 'POST', '/jobs', body, headers)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert status == 400
+    assert 'audio_format must be one of' in reply['error']
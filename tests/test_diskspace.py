@@ -0,0 +1,139 @@
+import errno
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from video_downloader import diskspace
+from video_downloader.diskspace import (
+    MERGE_FACTOR, DiskBudget, DiskPreflight, InsufficientSpace, preallocate
+)
+from video_downloader.retry import PERMANENT, Cancelled, classify_error
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr(diskspace, 'POLL_INTERVAL', 0.05)
+
+
+def budget_with_room(path, room):
+    """A DiskBudget whose min_free leaves room bytes on path's filesystem."""
+    return DiskBudget(min_free=shutil.disk_usage(path).free - room)
+
+
+def test_reserve_within_the_room(tmp_path):
+    budget = budget_with_room(tmp_path, 100 * MB)
+    first = budget.reserve(tmp_path, 40 * MB)
+    second = budget.reserve(tmp_path / 'not' / 'created' / 'yet', 40 * MB)
+    assert first.device == second.device == os.stat(tmp_path).st_dev
+
+
+def test_reserve_refuses_what_never_fits(tmp_path):
+    budget = budget_with_room(tmp_path, 10 * MB)
+    with pytest.raises(InsufficientSpace) as info:
+        budget.reserve(tmp_path, 50 * MB)
+    assert info.value.errno == errno.ENOSPC
+    assert classify_error(info.value) == PERMANENT
+
+
+def test_unknown_size_only_needs_min_free(tmp_path):
+    assert DiskBudget(min_free=0).reserve(tmp_path, None).size == 0
+    with pytest.raises(InsufficientSpace, match='--min-free'):
+        DiskBudget(min_free=shutil.disk_usage(tmp_path).free + 100 * MB).reserve(tmp_path, None)
+
+
+def test_reserve_waits_for_running_downloads(tmp_path):
+    budget = budget_with_room(tmp_path, 100 * MB)
+    held = budget.reserve(tmp_path, 80 * MB)
+    threading.Timer(0.2, budget.release, (held,)).start()
+    messages = []
+    start = time.monotonic()
+    budget.reserve(tmp_path, 50 * MB, messages.append)
+    assert time.monotonic() - start >= 0.15
+    assert len(messages) == 1
+
+
+def test_written_bytes_no_longer_count_as_held(tmp_path):
+    budget = budget_with_room(tmp_path, 100 * MB)
+    held = budget.reserve(tmp_path, 80 * MB)
+    budget.update(held, 'a.part', 60 * MB)
+    assert held.remaining == 20 * MB
+    # The 60 MB are not really on disk here, so the room is still 100 MB
+    budget.reserve(tmp_path, 50 * MB)
+
+
+def test_interrupt_cancels_waiting_downloads(tmp_path):
+    budget = budget_with_room(tmp_path, 100 * MB)
+    budget.reserve(tmp_path, 80 * MB)
+    threading.Timer(0.1, budget.interrupt).start()
+    with pytest.raises(Cancelled):
+        budget.reserve(tmp_path, 50 * MB)
+
+
+def test_wait_is_bounded(tmp_path):
+    budget = budget_with_room(tmp_path, 100 * MB)
+    budget.timeout = 0.1
+    budget.reserve(tmp_path, 80 * MB)
+    with pytest.raises(InsufficientSpace):
+        budget.reserve(tmp_path, 50 * MB)
+
+
+def test_estimate_doubles_merges():
+    video = {'filesize': 100, 'vcodec': 'avc1', 'acodec': 'none'}
+    audio = {'filesize': 10, 'vcodec': 'none', 'acodec': 'mp4a'}
+    assert DiskPreflight.estimate({'requested_formats': [video, audio]}) == 110 * MERGE_FACTOR
+    assert DiskPreflight.estimate({'filesize_approx': 50}) == 50
+    assert DiskPreflight.estimate({'tbr': 800, 'duration': 10}) == 1_000_000
+    assert DiskPreflight.estimate({}) is None
+
+
+def allocated_bytes(path):
+    return os.stat(path).st_blocks * 512
+
+
+def progress(status, path, downloaded, total, video_id='abc'):
+    return {'status': status, 'filename': str(path), 'tmpfilename': f'{path}.part',
+            'downloaded_bytes': downloaded, 'total_bytes': total,
+            'info_dict': {'id': video_id}}
+
+
+@pytest.fixture
+def part_file(tmp_path):
+    path = tmp_path / 'video.mp4'
+    with open(f'{path}.part', 'wb') as f:
+        f.write(b'x' * 4096)
+    if not preallocate(f'{path}.part', 4096):
+        pytest.skip('fallocate is not supported here')
+    return path
+
+
+@pytest.mark.parametrize('status', ['finished', 'error', None])
+def test_preallocated_blocks_are_freed(tmp_path, part_file, status):
+    preflight = DiskPreflight(DiskBudget(min_free=0))
+    preflight.run({'id': 'abc', '_filename': str(part_file), 'filesize': 8 * MB})
+    preflight.hook(progress('downloading', part_file, 4096, 8 * MB))
+    part = f'{part_file}.part'
+    assert os.path.getsize(part) == 4096
+    assert allocated_bytes(part) >= 8 * MB
+
+    if status == 'finished':
+        os.rename(part, part_file)
+        # yt-dlp sets the mtime from Last-Modified before its last hook
+        os.utime(part_file, (1_000_000_000, 1_000_000_000))
+        preflight.hook(progress('finished', part_file, 4096, 4096))
+        assert os.stat(part_file).st_mtime == 1_000_000_000
+        path = part_file
+    elif status == 'error':
+        preflight.hook(progress('error', part_file, 4096, 8 * MB))
+        path = part
+    else:
+        # Cancelled or interrupted: no last hook, only release()
+        preflight.release('abc')
+        path = part
+    assert os.path.getsize(path) == 4096
+    assert allocated_bytes(path) < MB
+    assert preflight._allocated == {}
@@ -0,0 +1,97 @@
+import pytest
+
+from video_downloader.formats import (
+    Candidate, FormatBudget, FormatError, candidates, estimate_bytes, format_bytes, parse_bitrate,
+    parse_codecs
+)
+
+VIDEO_1080 = {'format_id': '137', 'ext': 'mp4', 'height': 1080, 'vcodec': 'avc1.640028',
+              'acodec': 'none', 'tbr': 4000, 'filesize': 400_000_000}
+VIDEO_720 = {'format_id': '136', 'ext': 'mp4', 'height': 720, 'vcodec': 'avc1.4d401f',
+             'acodec': 'none', 'tbr': 2000, 'filesize': 200_000_000}
+VIDEO_720_AV1 = {'format_id': '398', 'ext': 'mp4', 'height': 720, 'vcodec': 'av01.0.05M.08',
+                 'acodec': 'none', 'tbr': 2200, 'filesize': 220_000_000}
+AUDIO = {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2',
+         'tbr': 128, 'filesize': 12_000_000}
+AUDIO_SMALL = {'format_id': '139', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.5',
+               'tbr': 48, 'filesize': 4_000_000}
+FORMATS = [VIDEO_1080, VIDEO_720, VIDEO_720_AV1, AUDIO, AUDIO_SMALL]
+
+
+@pytest.mark.parametrize('value, kbits', [
+    ('2500000', 2500),
+    (2500000, 2500),
+    ('2500k', 2500),
+    ('2500K', 2500),
+    ('2.5M', 2500),
+    ('2.5Mbps', 2500),
+    ('1G', 1_000_000),
+])
+def test_parse_bitrate_reads_bits_per_second(value, kbits):
+    assert parse_bitrate(value) == pytest.approx(kbits)
+
+
+@pytest.mark.parametrize('value', ['', 'fast', '2.5X', '-1M'])
+def test_parse_bitrate_rejects_garbage(value):
+    with pytest.raises(FormatError):
+        parse_bitrate(value)
+
+
+def test_parse_codecs():
+    assert parse_codecs(' AV1, vp9 ') == ('av1', 'vp9')
+    with pytest.raises(FormatError):
+        parse_codecs('av1,mpeg2')
+
+
+def test_estimate_bytes_falls_back_to_bitrate_and_duration():
+    assert estimate_bytes({'filesize_approx': 1000}) == 1000
+    assert estimate_bytes({'tbr': 800}, duration=10) == 1_000_000
+    assert estimate_bytes({'tbr': 800}) is None
+
+
+def test_candidate_pairs_video_with_audio():
+    candidate = Candidate((VIDEO_720, AUDIO))
+    assert candidate.format_id == '136+140'
+    assert candidate.height == 720
+    assert candidate.bytes == 212_000_000
+    assert candidate.tbr == 2128
+    assert [c.format_id for c in candidates(FORMATS)] == ['137+140', '136+140', '398+140']
+
+
+def test_budget_max_height_picks_smallest_of_the_tallest():
+    choice = FormatBudget(max_height=720).choose(FORMATS)
+    assert choice.format_id == '136+140'
+
+
+def test_budget_prefers_codec_at_equal_height():
+    choice = FormatBudget(max_height=720, codecs=('av1',)).choose(FORMATS)
+    assert choice.format_id == '398+140'
+
+
+def test_budget_max_bitrate_is_bits_per_second():
+    choice = FormatBudget(max_bitrate=parse_bitrate('2500000')).choose(FORMATS)
+    assert choice.height == 720
+    assert FormatBudget(max_bitrate=parse_bitrate('1M')).choose(FORMATS) is None
+
+
+def test_budget_max_size_falls_back_to_smaller_audio():
+    # 1080p only fits with the smallest audio stream
+    choice = FormatBudget(max_size=405_000_000).choose(FORMATS)
+    assert choice.format_id == '137+139'
+
+
+def test_empty_budget_is_false():
+    assert not FormatBudget()
+    assert FormatBudget(max_height=480)
+
+
+@pytest.mark.parametrize('size, text', [
+    (None, 'unknown'),
+    (0, '0 B'),
+    (1023, '1023 B'),
+    (1536, '1.5 KB'),
+    (30_000_000, '28.6 MB'),
+    (5 * 1024 ** 4, '5120.0 GB'),
+])
+def test_format_bytes(size, text):
+    assert format_bytes(size) == text
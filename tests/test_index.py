@@ -0,0 +1,75 @@
+import sqlite3
+
+from video_downloader.formats import FormatBudget
+from video_downloader.index import (
+    DEFAULT_VARIANT, INDEX_FILENAME, DownloadIndex, download_variant
+)
+
+
+def test_download_variant():
+    assert download_variant() == DEFAULT_VARIANT
+    assert download_variant(audio_only=True) == 'audio:mp3'
+    assert download_variant(audio_only=True, audio_format='opus') == 'audio:opus'
+    assert download_variant('worst') == 'video:worst'
+    budget = FormatBudget(max_height=720)
+    assert download_variant(budget=budget) == f'video:{budget!r}'
+    # -q wins over a budget, like in the downloader
+    assert download_variant('worst', budget=budget) == 'video:worst'
+
+
+def test_lookup_matches_only_the_recorded_variant(tmp_path):
+    index = DownloadIndex(tmp_path)
+    video = tmp_path / 'clip [abc].mp4'
+    video.write_bytes(b'video')
+    index.record('Youtube', 'abc', video)
+
+    assert index.lookup('youtube', 'abc')['path'] == str(video)
+    assert index.lookup('youtube', 'abc', 'audio:mp3') is None
+    assert index.lookup('youtube', 'abc', 'video:worst') is None
+
+    audio = tmp_path / 'clip [abc].mp3'
+    audio.write_bytes(b'audio')
+    index.record('Youtube', 'abc', audio, 'audio:mp3')
+    assert index.lookup('youtube', 'abc', 'audio:mp3')['path'] == str(audio)
+    assert index.lookup('youtube', 'abc')['path'] == str(video)
+
+
+def test_lookup_forgets_deleted_files(tmp_path):
+    index = DownloadIndex(tmp_path)
+    video = tmp_path / 'clip.mp4'
+    video.write_bytes(b'video')
+    index.record('Youtube', 'abc', video)
+    video.unlink()
+    assert index.lookup('youtube', 'abc') is None
+
+
+def test_forget_one_or_every_variant(tmp_path):
+    index = DownloadIndex(tmp_path)
+    for name, variant in (('a.mp4', DEFAULT_VARIANT), ('a.mp3', 'audio:mp3'),
+                          ('a.opus', 'audio:opus')):
+        (tmp_path / name).write_bytes(b'x')
+        index.record('Youtube', 'abc', tmp_path / name, variant)
+    index.forget('Youtube', 'abc', 'audio:mp3')
+    assert index.lookup('youtube', 'abc', 'audio:mp3') is None
+    assert index.lookup('youtube', 'abc', 'audio:opus') is not None
+    index.forget('Youtube', 'abc')
+    assert index.lookup('youtube', 'abc') is None
+    assert index.lookup('youtube', 'abc', 'audio:opus') is None
+
+
+def test_index_without_variants_is_migrated(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / INDEX_FILENAME))
+    conn.execute('CREATE TABLE downloads (extractor TEXT NOT NULL, video_id TEXT NOT NULL, '
+                 'path TEXT NOT NULL, size INTEGER, completed_at REAL NOT NULL, '
+                 'PRIMARY KEY (extractor, video_id))')
+    for video_id, name in (('v1', 'one.mp4'), ('v2', 'two.mp3')):
+        (tmp_path / name).write_bytes(b'x')
+        conn.execute('INSERT INTO downloads VALUES (?, ?, ?, 1, 0)',
+                     ('youtube', video_id, str(tmp_path / name)))
+    conn.commit()
+    conn.close()
+
+    index = DownloadIndex(tmp_path)
+    assert index.lookup('youtube', 'v1')['path'] == str(tmp_path / 'one.mp4')
+    assert index.lookup('youtube', 'v2') is None
+    assert index.lookup('youtube', 'v2', 'audio:mp3')['path'] == str(tmp_path / 'two.mp3')
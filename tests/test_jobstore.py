@@ -0,0 +1,121 @@
+from video_downloader.jobstore import JobStore
+
+
+def test_known_keys(tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite3')
+    store.enqueue_many('batch:a', [{'url': 'u1', 'key': 'youtube:a'},
+                                   {'url': 'u2', 'key': 'youtube:b'},
+                                   {'url': 'u3'}])
+    store.enqueue('batch:b', 'u4', key='youtube:c')
+
+    assert store.known_keys('batch:a', ['youtube:a', 'youtube:c', 'youtube:d']) == {'youtube:a'}
+    assert store.known_keys('batch:a', []) == set()
+
+    job = store.claim('batch:a')
+    store.finish(job['id'], {'success': True, 'filename': 'a.mp4'})
+    assert store.known_keys('batch:a', ['youtube:a', 'youtube:b']) == {'youtube:a', 'youtube:b'}
+
+
+def test_old_store_gains_the_key_column(tmp_path):
+    import sqlite3
+
+    path = tmp_path / 'jobs.sqlite3'
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, queue TEXT NOT NULL,'
+                 ' url TEXT NOT NULL, platform TEXT, options TEXT NOT NULL DEFAULT \'{}\','
+                 ' ref INTEGER, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,'
+                 ' worker TEXT, error TEXT, error_kind TEXT, output_path TEXT,'
+                 ' created REAL NOT NULL, updated REAL NOT NULL)')
+    conn.execute("INSERT INTO jobs (queue, url, state, created, updated)"
+                 " VALUES ('q', 'old', 'queued', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    assert store.claim('q')['key'] is None
+    store.enqueue('q', 'new', key='youtube:x')
+    assert store.known_keys('q', ['youtube:x']) == {'youtube:x'}
+
+
+def test_claim_hands_out_each_job_once(tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite3')
+    first, second = store.enqueue_many('q', [{'url': 'a'}, {'url': 'b'}])
+    other = JobStore(tmp_path / 'jobs.sqlite3')
+    other.worker_id = 'elsewhere:1'
+
+    assert store.claim('q')['id'] == first
+    job = other.claim('q')
+    assert job['id'] == second and job['state'] == 'running' and job['attempts'] == 1
+    assert store.claim('q') is None
+    assert store.claim('q', job_id=first) is None
+
+
+def test_finish_and_release(tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite3')
+    done, failed, released = store.enqueue_many('q', [{'url': u} for u in 'abc'])
+    for _ in range(3):
+        store.claim('q')
+    store.finish(done, {'success': True, 'filename': 'a.mp4'})
+    store.finish(failed, {'success': False, 'error': 'HTTP 404', 'error_kind': 'permanent'})
+
+    assert store.release() == 1
+    assert store.get(done)['output_path'] == 'a.mp4'
+    assert store.get(failed)['error_kind'] == 'permanent'
+    assert store.get(released)['state'] == 'queued'
+    assert store.counts('q') == {'done': 1, 'failed': 1, 'queued': 1}
+
+
+def test_recover_requeues_only_stopped_workers(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    crashed = JobStore(path)
+    crashed.worker_id = f'{crashed.host}:999999999'
+    live = JobStore(path, heartbeat_interval=3600)
+    live.worker_id = f'{live.host}:1'
+    crashed.enqueue_many('q', [{'url': 'a'}, {'url': 'b'}])
+    dead_job = crashed.claim('q')
+    live.claim('q')
+
+    store = JobStore(path)
+    assert store.live_workers('q') == [live.worker_id]
+    assert store.recover('q') == 1
+    assert store.get(dead_job['id'])['state'] == 'queued'
+    assert store.counts('q') == {'queued': 1, 'running': 1}
+
+
+def test_stale_heartbeat_counts_as_stopped(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    old = JobStore(path)
+    old.enqueue('q', 'a')
+    old.claim('q')
+    old.worker_id = 'otherhost:1'
+    old._write("UPDATE jobs SET worker = 'otherhost:1'")
+    old._write("INSERT INTO workers VALUES ('otherhost:1', 0)")
+
+    store = JobStore(path, stale_after=60)
+    assert store.live_workers('q') == []
+    assert store.recover('q') == 1
+
+
+def test_cancel_only_queued(tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite3')
+    running, queued = store.enqueue_many('q', [{'url': 'a'}, {'url': 'b'}])
+    store.claim('q')
+    assert not store.cancel(running)
+    assert store.cancel(queued)
+    assert store.get(queued)['state'] == 'cancelled'
+
+
+def test_job_store_lives_in_the_state_dir(tmp_path, monkeypatch):
+    from video_downloader import jobstore
+
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setenv('XDG_STATE_HOME', str(tmp_path / 'state'))
+    monkeypatch.setattr(jobstore, '_store', None)
+    old = JobStore(tmp_path / 'cache' / 'video-downloader' / 'jobs.sqlite3')
+    old.enqueue('batch:x', 'https://example.com/a')
+    old._conn.close()
+
+    store = jobstore.open_job_store()
+    assert store.path == tmp_path / 'state' / 'video-downloader' / 'jobs.sqlite3'
+    assert not (tmp_path / 'cache' / 'video-downloader' / 'jobs.sqlite3').exists()
+    assert [job['url'] for job in store.jobs('batch:x')] == ['https://example.com/a']
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from video_downloader import metrics as metrics_module
+from video_downloader.metrics import JobMetrics, MetricsRecorder
+
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    recorder = MetricsRecorder()
+    recorder.configure(jsonl_path=tmp_path / 'metrics.jsonl',
+                       textfile_path=tmp_path / 'vdl.prom')
+    yield recorder
+    recorder.close()
+
+
+def read_records(recorder):
+    recorder.close()
+    with open(recorder.jsonl_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_job_record_has_phases_and_throughput(recorder):
+    with recorder.job('youtube', 'https://example.com/v') as job:
+        # First seen two seconds into the transfer
+        job.progress_hook({'status': 'downloading', 'filename': 'v.mp4', 'elapsed': 2.0})
+        job.progress_hook({'status': 'finished', 'filename': 'v.mp4', 'total_bytes': 4000})
+        recorder.add_phase('retry_wait', 1.5)
+        with recorder.phase('extract'):
+            pass
+        recorder.set_result({'success': True, 'attempts': 2})
+
+    [record] = read_records(recorder)
+    assert record['outcome'] == 'success'
+    assert (record['attempts'], record['retries']) == (2, 1)
+    assert record['bytes'] == 4000
+    assert record['phases']['transfer']['seconds'] == pytest.approx(2.0, abs=0.1)
+    assert record['throughput'] == pytest.approx(2000, rel=0.05)
+    assert set(record['phases']) == {'transfer', 'retry_wait', 'extract'}
+    assert record['phases']['retry_wait'] == {'seconds': 1.5, 'count': 1}
+
+
+def test_nested_jobs_join_the_outer_one(recorder):
+    with recorder.job('youtube', 'outer') as outer:
+        with recorder.job('youtube', 'inner') as inner:
+            assert inner is outer
+    assert [r['url'] for r in read_records(recorder)] == ['outer']
+
+
+def test_phase_outside_a_job_is_a_record_of_its_own(recorder):
+    with recorder.phase('resolve', 'tiktok'):
+        pass
+    [record] = read_records(recorder)
+    assert (record['type'], record['platform'], record['phase']) == ('phase', 'tiktok',
+                                                                     'resolve')
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = MetricsRecorder()
+    with recorder.job('youtube', 'https://example.com/v') as job:
+        assert job is None
+        assert recorder.current() is None
+
+
+def test_skipped_and_failed_outcomes():
+    job = JobMetrics('youtube', 'u')
+    job.set_result({'success': True, 'skipped': True})
+    assert job.to_record()['outcome'] == 'skipped'
+    job.set_result({'success': False, 'error_kind': 'auth'})
+    assert (job.to_record()['outcome'], job.to_record()['error_kind']) == ('failed', 'auth')
+
+
+def test_textfile_accumulates_across_runs(recorder):
+    for outcome in (True, False):
+        with recorder.job('youtube', 'u'):
+            recorder.set_result({'success': outcome})
+    recorder.flush()
+
+    second = MetricsRecorder()
+    second.configure(textfile_path=recorder.textfile_path)
+    with second.job('youtube', 'u'):
+        second.set_result({'success': True})
+    second.flush()
+
+    text = recorder.textfile_path.read_text()
+    assert '# TYPE vdl_jobs_total counter' in text
+    assert 'vdl_jobs_total{outcome="success",platform="youtube"} 2' in text
+    assert 'vdl_jobs_total{outcome="failed",platform="youtube"} 1' in text
+    assert 'vdl_job_duration_seconds_count{outcome="success",platform="youtube"} 2' in text
+
+
+def test_render_textfile_buckets_are_cumulative():
+    state = {}
+    pending = {'vdl_job_duration_seconds': {}}
+    hist = metrics_module._new_histogram(metrics_module.DURATION_BUCKETS)
+    for value in (0.01, 0.3, 700):
+        metrics_module._observe_histogram(hist, metrics_module.DURATION_BUCKETS, value)
+    pending['vdl_job_duration_seconds'][metrics_module._label_key({'platform': 'x'})] = hist
+    metrics_module._merge(state, pending)
+
+    text = metrics_module.render_textfile(state)
+    assert 'vdl_job_duration_seconds_bucket{platform="x",le="0.05"} 1' in text
+    assert 'vdl_job_duration_seconds_bucket{platform="x",le="0.5"} 2' in text
+    assert 'vdl_job_duration_seconds_bucket{platform="x",le="+Inf"} 3' in text
+    assert 'vdl_job_duration_seconds_count{platform="x"} 3' in text
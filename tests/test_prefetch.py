@@ -0,0 +1,93 @@
+from concurrent.futures import Future
+
+from video_downloader.prefetch import BackgroundJob
+
+
+class FakeProgress:
+    label = 'clip'
+
+    def __init__(self):
+        self.board = self
+
+    def hook(self, d):
+        pass
+
+    def finish(self, success):
+        pass
+
+    def remove(self, job):
+        pass
+
+
+class FakeIndex:
+    def __init__(self):
+        self.forgotten = []
+
+    def forget(self, *key):
+        self.forgotten.append(key)
+
+
+class FakeDownloader:
+    """Replays progress events, then returns a successful result."""
+
+    def __init__(self, events, filename):
+        self.events = events
+        self.filename = filename
+        self.index = FakeIndex()
+        self._info_by_url = {'url': {'extractor_key': 'Youtube', 'id': 'abc'}}
+
+    def download(self, url, quality, audio_only, hook):
+        for event in self.events:
+            hook(event)
+        return {'success': True, 'filename': str(self.filename)}
+
+    def download_index(self):
+        return self.index
+
+    def download_variant(self, quality, audio_only):
+        return 'video:best'
+
+
+def run_speculation(downloader):
+    job = BackgroundJob(downloader, 'url', 'best', False, FakeProgress(), speculative=True)
+    future = Future()
+    future.set_result(job.run())
+    job.future = future
+    job.discard()
+    return job
+
+
+def test_discard_keeps_a_file_that_was_already_there(tmp_path):
+    existing = tmp_path / 'clip [abc].mp4'
+    existing.write_bytes(b'the user made this')
+    # yt-dlp's "has already been downloaded": one 'finished' event, no download
+    downloader = FakeDownloader([{'status': 'finished', 'filename': str(existing)}], existing)
+    run_speculation(downloader)
+    assert existing.read_bytes() == b'the user made this'
+    assert downloader.index.forgotten == []
+
+
+def test_discard_removes_what_the_speculation_downloaded(tmp_path):
+    final = tmp_path / 'clip [abc].mp4'
+    part = tmp_path / 'clip [abc].mp4.part'
+    fragment = tmp_path / 'clip [abc].mp4.part-Frag3'
+
+    def write_files(d):
+        if d['status'] == 'downloading':
+            part.write_bytes(b'partial')
+            fragment.write_bytes(b'fragment')
+        else:
+            part.rename(final)
+
+    events = [{'status': 'downloading', 'filename': str(final), 'tmpfilename': str(part)},
+              {'status': 'finished', 'filename': str(final)}]
+    downloader = FakeDownloader(events, final)
+    original = downloader.download
+
+    def download(url, quality, audio_only, hook):
+        return original(url, quality, audio_only, lambda d: (write_files(d), hook(d)))
+    downloader.download = download
+
+    run_speculation(downloader)
+    assert not final.exists() and not part.exists() and not fragment.exists()
+    assert downloader.index.forgotten == [('Youtube', 'abc', 'video:best')]
@@ -0,0 +1,67 @@
+import pytest
+
+from video_downloader import profiles
+from video_downloader.profiles import ProfileError, parse_size, profile_options
+
+
+@pytest.fixture
+def user_profiles(tmp_path, monkeypatch):
+    """Point the profile file at tmp_path; returns a writer for it."""
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(tmp_path))
+    monkeypatch.setattr(profiles, '_user_profiles', None)
+
+    def write(text):
+        path = tmp_path / 'video-downloader' / 'profiles.toml'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        monkeypatch.setattr(profiles, '_user_profiles', None)
+
+    return write
+
+
+@pytest.mark.parametrize('value, size', [
+    (1048576, 1048576), ('1048576', 1048576), ('512K', 512 * 1024), ('1.5MiB', 1572864),
+    ('2 GB', 2 * 1024 ** 3),
+])
+def test_parse_size(value, size):
+    assert parse_size(value) == size
+
+
+def test_parse_size_rejects_garbage():
+    with pytest.raises(ProfileError):
+        parse_size('fast')
+
+
+def test_presets_refine_per_platform(user_profiles):
+    assert profile_options('youtube', 'fast')['concurrent_fragment_downloads'] == 8
+    assert profile_options('tiktok', 'fast')['concurrent_fragment_downloads'] == 4
+    assert profile_options('youtube') == {}
+
+
+def test_user_tables_layer_over_presets(user_profiles):
+    user_profiles('''
+[default]
+socket_timeout = 15
+http_chunk_size = "4M"
+
+[fast]
+retries = 3
+
+[fast.youtube]
+concurrent_fragment_downloads = 16
+
+[mine]
+ratelimit = "1M"
+''')
+    options = profile_options('youtube', 'fast')
+    assert options['socket_timeout'] == 20  # the preset wins over [default]
+    assert options['retries'] == 3
+    assert options['concurrent_fragment_downloads'] == 16
+    assert options['http_chunk_size'] == 10 * 1024 * 1024
+    assert profile_options('tiktok')['http_chunk_size'] == 4 * 1024 * 1024
+    assert profile_options('tiktok', 'mine')['ratelimit'] == 1024 * 1024
+
+
+def test_unknown_profile(user_profiles):
+    with pytest.raises(ProfileError, match='available: fast, lowmem, polite'):
+        profile_options('youtube', 'turbo')
@@ -0,0 +1,101 @@
+import errno
+import io
+import sys
+
+import pytest
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError, TransportError
+from yt_dlp.utils import DownloadError, ExtractorError
+
+from video_downloader.diskspace import InsufficientSpace
+from video_downloader.retry import (
+    AUTH, PERMANENT, RATE_LIMITED, TRANSIENT, Cancelled, RetryFailed, RetryPolicy,
+    classify_error, refreshes_media_url, retry_after
+)
+
+
+def http_error(status, headers=None):
+    response = Response(io.BytesIO(b''), 'https://example.com/v', headers or {}, status=status)
+    return HTTPError(response)
+
+
+def wrapped(error):
+    """The error as yt-dlp reports it: a DownloadError around an ExtractorError."""
+    try:
+        raise ExtractorError('extraction failed', cause=error)
+    except ExtractorError as e:
+        return DownloadError(f'ERROR: {e}', sys.exc_info())
+
+
+@pytest.mark.parametrize('error, kind', [
+    (http_error(429), RATE_LIMITED),
+    (http_error(401), AUTH),
+    (http_error(404), PERMANENT),
+    (http_error(403), TRANSIENT),
+    (http_error(503), TRANSIENT),
+    (wrapped(http_error(429)), RATE_LIMITED),
+    (wrapped(TransportError('connection reset')), TRANSIENT),
+    (DownloadError('ERROR: Sign in to confirm your age'), AUTH),
+    (DownloadError('ERROR: Video unavailable. This video is private'), PERMANENT),
+    (DownloadError('ERROR: HTTP Error 429: Too Many Requests'), RATE_LIMITED),
+    (Cancelled('stopped'), PERMANENT),
+    (InsufficientSpace('/tmp', 10, 5), PERMANENT),
+    (OSError(errno.ENOSPC, 'No space left on device'), PERMANENT),
+    (DownloadError('ERROR: something new broke'), TRANSIENT),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_retry_after_and_media_url_refresh():
+    assert retry_after(wrapped(http_error(429, {'Retry-After': '12'}))) == 12.0
+    assert retry_after(http_error(429)) is None
+    assert refreshes_media_url(wrapped(http_error(403)))
+    assert not refreshes_media_url(http_error(404))
+
+
+def failing(*errors, result='ok'):
+    errors = list(errors)
+
+    def attempt(number):
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return attempt
+
+
+def test_transient_errors_are_retried_with_backoff():
+    sleeps = []
+    retries = []
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, sleep=sleeps.append)
+    result = policy.run(failing(http_error(503), http_error(503)),
+                        on_retry=lambda *args: retries.append(args[:2]))
+
+    assert result == ('ok', 3)
+    assert retries == [(1, TRANSIENT), (2, TRANSIENT)]
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+
+
+def test_attempts_are_capped():
+    policy = RetryPolicy(max_attempts=2, sleep=lambda s: None)
+    with pytest.raises(RetryFailed) as failed:
+        policy.run(failing(http_error(503), http_error(503), http_error(503)))
+    assert (failed.value.kind, failed.value.attempts) == (TRANSIENT, 2)
+
+
+def test_permanent_errors_fail_at_once():
+    sleeps = []
+    policy = RetryPolicy(max_attempts=5, sleep=sleeps.append)
+    with pytest.raises(RetryFailed) as failed:
+        policy.run(failing(http_error(404)))
+    assert (failed.value.kind, failed.value.attempts) == (PERMANENT, 1)
+    assert sleeps == []
+
+
+def test_rate_limits_wait_for_retry_after():
+    policy = RetryPolicy(max_delay=1.0, rate_limit_delay=30.0, max_retry_after=300.0)
+    assert policy.delay(1, RATE_LIMITED, http_error(429, {'Retry-After': '120'})) == 120.0
+    assert policy.delay(1, RATE_LIMITED, http_error(429)) == 30.0
+    # Asking for longer than max_retry_after gives up
+    assert policy.delay(1, RATE_LIMITED, http_error(429, {'Retry-After': '3600'})) is None
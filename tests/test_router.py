@@ -0,0 +1,61 @@
+import pytest
+
+from video_downloader.router import CHANNEL, PLAYLIST, SHORT_LINK, VIDEO, route
+
+
+@pytest.mark.parametrize('url, platform, kind, video_id', [
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'youtube', VIDEO, 'dQw4w9WgXcQ'),
+    ('https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ', 'youtube', VIDEO,
+     'dQw4w9WgXcQ'),
+    ('youtu.be/dQw4w9WgXcQ?t=10', 'youtube', VIDEO, 'dQw4w9WgXcQ'),
+    ('https://youtube.com/shorts/dQw4w9WgXcQ', 'youtube', VIDEO, 'dQw4w9WgXcQ'),
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123', 'youtube', PLAYLIST,
+     'dQw4w9WgXcQ'),
+    ('https://www.youtube.com/playlist?list=PL123', 'youtube', PLAYLIST, None),
+    ('https://www.youtube.com/@someone', 'youtube', CHANNEL, None),
+    ('https://vm.tiktok.com/ZMabc123/', 'tiktok', SHORT_LINK, None),
+    ('https://www.tiktok.com/@user/video/7234567890123456789', 'tiktok', VIDEO,
+     '7234567890123456789'),
+    ('https://www.instagram.com/reel/Cabc_12-x/', 'instagram', VIDEO, 'Cabc_12-x'),
+    ('https://fb.watch/abcDEF/', 'facebook', SHORT_LINK, None),
+    ('https://www.facebook.com/watch/?v=1234567890', 'facebook', VIDEO, '1234567890'),
+    ('https://mobile.x.com/user/status/1234567890', 'twitter', VIDEO, '1234567890'),
+    ('https://twitter.com/i/web/status/1234567890', 'twitter', VIDEO, '1234567890'),
+])
+def test_route(url, platform, kind, video_id):
+    found = route(url)
+    assert (found.platform, found.kind, found.video_id) == (platform, kind, video_id)
+
+
+@pytest.mark.parametrize('url', [
+    'https://max.com/watch?v=dQw4w9WgXcQ',
+    'https://notyoutube.com/watch?v=dQw4w9WgXcQ',
+    'https://example.com/?next=https://youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://youtube.com.evil.example/watch?v=dQw4w9WgXcQ',
+    'not a url',
+])
+def test_route_only_matches_the_host(url):
+    assert route(url) is None
+
+
+def test_route_key_is_shared_by_url_variants():
+    keys = {route(url).key for url in (
+        'https://www.youtube.com/watch?v=dQw4w9WgXcQ&utm_source=x',
+        'https://youtu.be/dQw4w9WgXcQ',
+        'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+    )}
+    assert keys == {('youtube', 'dQw4w9WgXcQ')}
+
+
+def test_route_key_is_none_without_a_video():
+    assert route('https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123').key is None
+    assert route('https://vm.tiktok.com/ZMabc123/').key is None
+    assert route('https://www.youtube.com/').key is None
+
+
+def test_pattern_has_no_possessive_quantifiers():
+    from video_downloader.router import _compile
+
+    # Possessive quantifiers only compile on Python 3.11+
+    pattern = _compile()[0].pattern
+    assert '*+' not in pattern and '++' not in pattern and '?+' not in pattern
@@ -0,0 +1,65 @@
+import pytest
+
+from video_downloader.sync import PlaylistSnapshot, archive_key, is_newest_first
+
+CHANNEL = 'https://www.youtube.com/@someone/videos'
+
+
+def entries(*ids):
+    return [{'id': video_id, 'ie_key': 'Youtube'} for video_id in ids]
+
+
+@pytest.mark.parametrize('url, newest_first', [
+    (CHANNEL, True),
+    ('https://www.youtube.com/channel/UC123', True),
+    ('https://www.youtube.com/playlist?list=UU123', True),
+    ('https://www.youtube.com/playlist?list=PL123', False),
+    ('https://www.youtube.com/@someone/playlists', False),
+])
+def test_is_newest_first(url, newest_first):
+    assert is_newest_first(url) == newest_first
+
+
+def test_archive_key():
+    assert archive_key({'id': 'abc', 'ie_key': 'Youtube'}) == 'youtube abc'
+    assert archive_key({'id': 'abc'}) == 'youtube abc'
+
+
+def test_update_reports_new_ids_and_round_trips(tmp_path):
+    snapshot = PlaylistSnapshot(CHANNEL, tmp_path / 'snap.json')
+    assert not snapshot.load()
+    assert snapshot.update({'entries': entries('c', 'b', 'a'), 'complete': True}, tmp_path) == [
+        'c', 'b', 'a']
+
+    again = PlaylistSnapshot(CHANNEL, tmp_path / 'snap.json')
+    assert again.load()
+    assert again.update({'entries': entries('d', 'c', 'b', 'a'), 'complete': True},
+                        tmp_path) == ['d']
+    assert not PlaylistSnapshot('https://other', tmp_path / 'snap.json').load()
+
+
+def test_early_stop_keeps_the_ids_it_did_not_reach(tmp_path):
+    snapshot = PlaylistSnapshot(CHANNEL, tmp_path / 'snap.json')
+    snapshot.update({'entries': entries('c', 'b', 'a'), 'complete': True}, tmp_path)
+    snapshot.update({'entries': entries('d', 'c'), 'complete': False}, tmp_path)
+    assert snapshot.ids == ['d', 'c', 'b', 'a']
+
+
+def test_stop_condition_waits_for_missing_entries(tmp_path):
+    snapshot = PlaylistSnapshot(CHANNEL, tmp_path / 'snap.json')
+    ids = [f'v{n}' for n in range(6)]
+    snapshot.update({'entries': entries(*ids), 'complete': True}, tmp_path)
+    # v2 is known but was never downloaded
+    (tmp_path / '.download_archive').write_text(
+        ''.join(f'youtube {video_id}\n' for video_id in ids if video_id != 'v2'))
+
+    stop = snapshot.stop_condition(stop_after=2)
+    results = [stop({'id': video_id}) for video_id in ['new', *ids]]
+    # v0 and v1 make two in a row, but v2 has not been listed again yet
+    assert results == [False, False, False, False, False, True, True]
+
+
+def test_no_stop_for_unordered_playlists(tmp_path):
+    snapshot = PlaylistSnapshot('https://www.youtube.com/playlist?list=PL1', tmp_path / 's')
+    snapshot.update({'entries': entries('a'), 'complete': True}, tmp_path)
+    assert snapshot.stop_condition() is None
@@ -0,0 +1,84 @@
+import json
+import time
+
+import pytest
+
+from video_downloader import transcode
+from video_downloader.metrics import MetricsRecorder
+
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    recorder = MetricsRecorder()
+    recorder.configure(jsonl_path=tmp_path / 'metrics.jsonl')
+    monkeypatch.setattr(transcode, 'metrics', recorder)
+    yield recorder
+    recorder.close()
+
+
+def records(recorder):
+    recorder.close()
+    if not recorder.jsonl_path.exists():
+        return []
+    with open(recorder.jsonl_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def slow_convert(path, ext, codec, quality, filetime):
+    time.sleep(0.2)
+    return path + '.mp3'
+
+
+def test_conversion_time_joins_the_download_record(recorder, monkeypatch):
+    monkeypatch.setattr(transcode, 'convert_audio', slow_convert)
+    pool = transcode.TranscodePool(workers=1)
+    with recorder.job('youtube', 'https://example.com/v'):
+        future = pool.submit('a.webm', 'webm', job=recorder.defer())
+    # The record waits for the conversion
+    assert records(recorder) == []
+
+    pool.drain()
+    assert future.result() == 'a.webm.mp3'
+    [record] = records(recorder)
+    assert record['type'] == 'job'
+    assert record['postprocess_seconds'] >= 0.2
+    assert record['phases']['postprocess']['count'] == 1
+    assert record['duration'] < 0.2
+
+
+def test_cancelled_conversion_releases_the_record(recorder, monkeypatch):
+    monkeypatch.setattr(transcode, 'convert_audio', slow_convert)
+    pool = transcode.TranscodePool(workers=1)
+    with recorder.job('youtube', 'https://example.com/1'):
+        pool.submit('1.webm', 'webm', job=recorder.defer())
+    with recorder.job('youtube', 'https://example.com/2'):
+        second = pool.submit('2.webm', 'webm', job=recorder.defer())
+    pool.drain(cancel_pending=True)
+
+    assert second.cancelled()
+    urls = {record['url']: record for record in records(recorder)}
+    assert set(urls) == {'https://example.com/1', 'https://example.com/2'}
+    assert urls['https://example.com/2']['postprocess_seconds'] == 0.0
+
+
+def test_failed_conversion_fails_the_job(recorder, monkeypatch):
+    def broken(*args):
+        raise OSError('ffmpeg not found')
+
+    monkeypatch.setattr(transcode, 'convert_audio', broken)
+    pool = transcode.TranscodePool(workers=1)
+    with recorder.job('youtube', 'https://example.com/v') as job:
+        job.set_result({'success': True})
+        future = pool.submit('a.webm', 'webm', job=recorder.defer())
+    pool.drain()
+
+    assert isinstance(future.exception(), OSError)
+    [record] = records(recorder)
+    assert record['outcome'] == 'failed'
+
+
+def test_download_without_conversion_is_written_at_once(recorder):
+    with recorder.job('tiktok', 'https://example.com/t'):
+        pass
+    [record] = records(recorder)
+    assert record['postprocess_seconds'] == 0.0
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from video_downloader.workers import WorkerPool
+
+
+def tracker():
+    """A job that records how many jobs of its platform run at once."""
+    lock = threading.Lock()
+    running = {}
+    peaks = {}
+
+    def job(platform, seconds=0.05):
+        with lock:
+            running[platform] = running.get(platform, 0) + 1
+            peaks[platform] = max(peaks.get(platform, 0), running[platform])
+        time.sleep(seconds)
+        with lock:
+            running[platform] -= 1
+        return platform
+
+    return job, peaks
+
+
+def test_platform_caps_and_worker_count():
+    job, peaks = tracker()
+    with WorkerPool(4, limits={'tiktok': 1, 'youtube': 3}) as pool:
+        futures = [pool.submit(p, job, p) for p in ['tiktok'] * 4 + ['youtube'] * 6]
+    assert [f.result() for f in futures] == ['tiktok'] * 4 + ['youtube'] * 6
+    assert peaks == {'tiktok': 1, 'youtube': 3}
+
+
+def test_limits_never_exceed_jobs():
+    pool = WorkerPool(2, limits={'youtube': 8})
+    assert pool.limits == {'youtube': 2}
+    pool.shutdown()
+
+
+def test_backlog_on_one_platform_does_not_block_others():
+    job, _ = tracker()
+    with WorkerPool(2, limits={'tiktok': 1}) as pool:
+        slow = [pool.submit('tiktok', job, 'tiktok', 0.2) for _ in range(3)]
+        started = time.monotonic()
+        fast = pool.submit('youtube', job, 'youtube', 0)
+        fast.result()
+        assert time.monotonic() - started < 0.15
+    assert all(f.done() for f in slow)
+
+
+def test_max_pending_blocks_submit():
+    release = threading.Event()
+    pool = WorkerPool(1, max_pending=2)
+    pool.submit('youtube', release.wait)
+    pool.submit('youtube', release.wait)
+    submitted = threading.Event()
+    thread = threading.Thread(target=lambda: (pool.submit('youtube', lambda: None),
+                                              submitted.set()))
+    thread.start()
+    assert not submitted.wait(0.1)
+    release.set()
+    assert submitted.wait(1)
+    thread.join()
+    pool.shutdown()
+
+
+def test_exceptions_go_to_the_future():
+    with WorkerPool(1) as pool:
+        future = pool.submit('youtube', lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result()
+
+
+def test_shutdown_cancels_pending_jobs():
+    release = threading.Event()
+    pool = WorkerPool(1, max_pending=3)
+    running = pool.submit('youtube', release.wait)
+    queued = [pool.submit('youtube', lambda: None) for _ in range(2)]
+    threading.Timer(0.05, release.set).start()
+    pool.shutdown(wait=True, cancel_pending=True)
+    assert running.result() is True
+    assert all(f.cancelled() for f in queued)
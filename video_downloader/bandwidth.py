@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from .downloaders import PLATFORMS
+from .utils import atomic_write_text, user_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows: shares are only coordinated within one process
+    fcntl = None
+
+# Floor for a single job's share so a crowded link never starves a
+# download into a socket timeout
+MIN_RATE = 32 * 1024
+
+# Processes that have not refreshed their entry for this long are ignored
+STALE_AFTER = 15.0
+
+
+def parse_weights(text):
+    """Parse "youtube=2,tiktok=1" into {'youtube': 2.0, 'tiktok': 1.0}."""
+    weights = {}
+    for item in (text or '').split(','):
+        if not item.strip():
+            continue
+        platform, _, value = item.partition('=')
+        platform = platform.strip().lower()
+        if platform not in PLATFORMS:
+            raise ValueError(f"Unknown platform in bandwidth weights: {platform!r}")
+        try:
+            weight = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid bandwidth weight: {item.strip()!r}") from None
+        if weight <= 0:
+            raise ValueError(f"Bandwidth weight must be positive: {item.strip()!r}")
+        weights[platform] = weight
+    return weights
+
+
+class BandwidthGovernor:
+    """Splits one total download rate between all active downloads.
+
+    Every platform with a running download gets a share of total_rate in
+    proportion to its weight (1 unless configured), split evenly between
+    that platform's jobs. The split is recomputed when a job starts or
+    finishes and, from progress hooks, every refresh_interval seconds.
+
+    Running processes publish their active jobs in a shared state file, so
+    several vdl invocations with the same --max-bandwidth stay under it
+    together. yt-dlp reads 'ratelimit' from the handle's params on every
+    chunk, so a new share takes effect mid-download.
+    """
+
+    def __init__(self, total_rate=None, weights=None, state_path=None, refresh_interval=1.0):
+        self.total_rate = total_rate
+        self.weights = dict(weights or {})
+        self.state_path = state_path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # token -> (platform, params, rate limit the job had of its own)
+        self._jobs = {}
+        # platform -> jobs running in other processes
+        self._others = Counter()
+        self._last_sync = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.total_rate)
+
+    def configure(self, total_rate=None, weights=None):
+        self.total_rate = total_rate
+        self.weights = dict(weights or {})
+
+    @contextmanager
+    def job(self, platform, ydl):
+        """Govern the rate of the downloads ydl runs inside the block."""
+        if not self.enabled:
+            yield
+            return
+
+        token = object()
+        with self._lock:
+            self._jobs[token] = (platform, ydl.params, ydl.params.get('ratelimit'))
+        self._sync(force=True)
+        ydl.add_progress_hook(self._on_progress)
+        try:
+            yield
+        finally:
+            try:
+                ydl._progress_hooks.remove(self._on_progress)
+            except ValueError:
+                pass
+            with self._lock:
+                platform, params, own_limit = self._jobs.pop(token)
+                params['ratelimit'] = own_limit
+            self._sync(force=True)
+
+    def shares(self):
+        """Current rate per platform for one of its jobs, in bytes/s."""
+        with self._lock:
+            counts = self._counts()
+            return {platform: self._share(platform, counts) for platform in counts}
+
+    def _on_progress(self, d):
+        if d.get('status') == 'downloading':
+            self._sync()
+
+    def _sync(self, force=False):
+        if not self._sync_lock.acquire(blocking=force):
+            # Another thread is already refreshing
+            return
+        try:
+            now = time.monotonic()
+            if not force and now - self._last_sync < self.refresh_interval:
+                return
+            self._last_sync = now
+            with self._lock:
+                mine = Counter(platform for platform, _, _ in self._jobs.values())
+            others = self._exchange(mine)
+            with self._lock:
+                self._others = others
+                self._rebalance()
+        finally:
+            self._sync_lock.release()
+
+    def _counts(self):
+        # Caller must hold self._lock
+        counts = Counter(self._others)
+        counts.update(platform for platform, _, _ in self._jobs.values())
+        return counts
+
+    def _share(self, platform, counts):
+        # Caller must hold self._lock
+        total_weight = sum(self.weights.get(p, 1.0) for p in counts)
+        share = self.total_rate * self.weights.get(platform, 1.0) / total_weight / counts[platform]
+        return max(min(MIN_RATE, self.total_rate), int(share))
+
+    def _rebalance(self):
+        # Caller must hold self._lock
+        counts = self._counts()
+        for platform, params, own_limit in self._jobs.values():
+            rate = self._share(platform, counts)
+            params['ratelimit'] = min(rate, own_limit) if own_limit else rate
+
+    def _state_file(self):
+        return Path(self.state_path) if self.state_path else user_cache_dir() / 'bandwidth.json'
+
+    def _exchange(self, mine):
+        """Publish this process's jobs; return other processes' jobs by platform.
+
+        Best effort: without fcntl or a writable cache dir, only the jobs
+        of this process are balanced.
+        """
+        others = Counter()
+        if fcntl is None:
+            return others
+        path = self._state_file()
+        own = str(os.getpid())
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(f'{path}.lock', 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {}
+
+                now = time.time()
+                live = {}
+                for pid, entry in (state if isinstance(state, dict) else {}).items():
+                    if (pid != own and isinstance(entry, dict)
+                            and now - entry.get('seen', 0) < STALE_AFTER):
+                        live[pid] = entry
+                        others.update({p: n for p, n in entry.get('jobs', {}).items()
+                                       if isinstance(n, int) and n > 0})
+                if mine:
+                    live[own] = {'seen': now, 'jobs': dict(mine)}
+                atomic_write_text(path, json.dumps(live))
+        except OSError:
+            return Counter()
+        return others
+
+
+bandwidth_governor = BandwidthGovernor()
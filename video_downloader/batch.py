@@ -0,0 +1,212 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from pathlib import Path
+
+from .utils import atomic_write_text, user_cache_dir
+
+STDIN = '-'
+
+
+class BatchLine:
+    """One URL line of a batch file: its byte range and 1-based line number."""
+
+    __slots__ = ('offset', 'end', 'lineno', 'url')
+
+    def __init__(self, offset, end, lineno, url):
+        self.offset = offset
+        self.end = end
+        self.lineno = lineno
+        self.url = url
+
+
+def iter_batch_lines(source, start=0, start_lineno=1):
+    """Lazily yield BatchLine for every line of a file or stdin ('-').
+
+    Reading starts at byte offset start: files seek there directly, stdin
+    is read and discarded up to it. Blank lines are yielded with an empty
+    url so that they can be checkpointed like any other line.
+    """
+    if source == STDIN:
+        stream, close = sys.stdin.buffer, False
+    else:
+        stream, close = open(source, 'rb'), True
+
+    try:
+        offset = 0
+        if start:
+            if stream.seekable():
+                stream.seek(start)
+                offset = start
+            else:
+                while offset < start:
+                    chunk = stream.read(min(start - offset, 1 << 16))
+                    if not chunk:
+                        return
+                    offset += len(chunk)
+
+        lineno = start_lineno
+        for raw in stream:
+            end = offset + len(raw)
+            yield BatchLine(offset, end, lineno, raw.decode('utf-8', 'replace').strip())
+            offset = end
+            lineno += 1
+    finally:
+        if close:
+            stream.close()
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size items without materialising the input."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def source_id(source):
+    """Stable name of a batch source: '-' or the file's absolute path."""
+    return source if source == STDIN else os.path.abspath(source)
+
+
+def default_checkpoint_path(source):
+    if source == STDIN:
+        return user_cache_dir() / 'stdin.vdl-checkpoint'
+    return Path(f'{source}.vdl-checkpoint')
+
+
+class BatchCheckpoint:
+    """Tracks which lines of a batch have been processed.
+
+    Everything before ``watermark`` is done; ``done`` holds offsets past it
+    that finished out of order. Only lines still in flight are kept in
+    memory, so the size does not grow with the input.
+    """
+
+    def __init__(self, path, source, save_interval=2.0):
+        self.path = Path(path)
+        self.source = source
+        self.save_interval = save_interval
+        self.watermark = 0
+        self.watermark_lineno = 1
+        self.done = set()
+        self._inflight = deque()
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    def load(self):
+        """Restore state from disk; returns False if there is nothing to resume."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('source') != self._source_id():
+            return False
+        self.watermark = state.get('watermark', 0)
+        self.watermark_lineno = state.get('watermark_lineno', 1)
+        self.done = set(state.get('done', []))
+        return True
+
+    def is_done(self, line):
+        return line.offset < self.watermark or line.offset in self.done
+
+    def started(self, line):
+        """Register a line as dispatched, in input order."""
+        with self._lock:
+            self._inflight.append(line)
+
+    def completed(self, line):
+        """Mark a line processed and advance the watermark when possible."""
+        with self._lock:
+            self.done.add(line.offset)
+            while self._inflight and self._inflight[0].offset in self.done:
+                head = self._inflight.popleft()
+                self.done.discard(head.offset)
+                self.watermark = head.end
+                self.watermark_lineno = head.lineno + 1
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            self.done = {offset for offset in self.done if offset >= self.watermark}
+            state = {
+                'source': self._source_id(),
+                'watermark': self.watermark,
+                'watermark_lineno': self.watermark_lineno,
+                'done': sorted(self.done),
+            }
+            self._last_save = time.monotonic()
+        try:
+            atomic_write_text(self.path, json.dumps(state))
+        except OSError:
+            pass
+
+    def _source_id(self):
+        return source_id(self.source)
+
+
+class BatchStats:
+    """Thread-safe running totals for a batch.
+
+    Only the first max_failures failures are kept for the summary table.
+    Duplicate lines are counted apart and not in total.
+    """
+
+    def __init__(self, max_failures=100):
+        self.max_failures = max_failures
+        self.total = 0
+        self.successful = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.failures = []
+        self._lock = threading.Lock()
+
+    def success(self):
+        with self._lock:
+            self.total += 1
+            self.successful += 1
+
+    def duplicate(self):
+        with self._lock:
+            self.duplicates += 1
+
+    def failure(self, line, error):
+        with self._lock:
+            self.total += 1
+            self.failed += 1
+            if len(self.failures) < self.max_failures:
+                self.failures.append((line.lineno, line.url, error))
+
+
+class RecentKeys:
+    """The last maxsize distinct keys of a stream, for skipping repeats.
+
+    A key that returns after maxsize others is taken as new; that is
+    what keeps memory bounded however long the stream is.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def seen(self, key):
+        """True if key is among the recent keys; either way it becomes the newest."""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        self._keys[key] = None
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+        return False
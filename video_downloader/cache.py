@@ -0,0 +1,116 @@
+import hashlib
+import json
+import re
+import time
+
+from .router import route
+from .utils import atomic_write_text, user_cache_dir
+
+# Stream URLs inside an info dict expire (YouTube after ~6h), so cached
+# metadata is only trusted for a short while.
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+class MetadataCache:
+    """On-disk cache of sanitized yt-dlp info dicts.
+
+    Entries are stored once per canonical video ID (``<extractor>_<id>``);
+    each URL that resolved to a video gets a small alias file pointing at
+    that entry, so URL variants of the same video share one record.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or (user_cache_dir() / 'metadata')
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key_for(info):
+        """Canonical cache key for an info dict, or None if it has no ID."""
+        extractor = info.get('extractor_key') or info.get('extractor') or ''
+        video_id = info.get('id')
+        if not video_id:
+            return None
+        return re.sub(r'[^\w.-]', '_', f"{extractor.lower()}_{video_id}")
+
+    def _entry_path(self, key):
+        return self.path / 'entries' / f'{key}.json'
+
+    def _alias_path(self, url):
+        return self.path / 'urls' / hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def get(self, url):
+        """Return the cached info dict for url, or None if missing or stale.
+
+        A URL seen for the first time still finds its video's entry when
+        the router can read the video ID from it.
+        """
+        try:
+            key = self._alias_path(url).read_text(encoding='utf-8').strip()
+        except OSError:
+            found = route(url)
+            if not found or not found.key:
+                return None
+            key = self.key_for({'extractor_key': found.key[0], 'id': found.key[1]})
+        return self.get_by_key(key)
+
+    def get_by_key(self, key):
+        entry = self._entry_path(key)
+        try:
+            if time.time() - entry.stat().st_mtime > self.ttl:
+                return None
+            with open(entry, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, info):
+        """Store an already sanitized info dict and alias url to it."""
+        key = self.key_for(info)
+        if not key:
+            return None
+        try:
+            atomic_write_text(self._entry_path(key), json.dumps(info))
+            atomic_write_text(self._alias_path(url), key)
+            self._evict()
+        except OSError:
+            # Caching is best effort; never fail a download because of it
+            return None
+        return key
+
+    def _evict(self):
+        """Drop the oldest entries until both size bounds hold."""
+        entries = []
+        for entry in (self.path / 'entries').glob('*.json'):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        if len(entries) <= self.max_entries and total <= self.max_bytes:
+            return
+
+        entries.sort()
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, entry = entries.pop(0)
+            total -= size
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
+        # Aliases of evicted entries are dead weight
+        live = {entry.stem for _, _, entry in entries}
+        for alias in (self.path / 'urls').iterdir():
+            try:
+                if alias.read_text(encoding='utf-8').strip() not in live:
+                    alias.unlink()
+            except OSError:
+                pass
+
@@ -1,66 +1,215 @@
 #!/usr/bin/env python3
 import argparse
+import os
 import sys
-from pathlib import Path
-import questionary
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich import print as rprint
 
-from .downloaders import get_downloader
-from .utils import detect_platform, create_progress_bar, is_youtube_playlist
+from .downloaders import PLATFORMS, get_downloader
+from .profiles import ProfileError, parse_size, validate_profile
+from .utils import (
+    LazyConsole, detect_platform, escape, is_youtube_playlist, rprint
+)
 
-console = Console()
+# questionary and rich are imported where they are used, so that --help,
+# argument errors and bad URLs never pay for them
+console = LazyConsole()
+
+# Batch lines read ahead at a time (bounds memory, batches short-link lookups)
+BATCH_CHUNK_SIZE = 256
+
+# Concurrent extractions of --dump-metadata unless -j says otherwise
+EXPORT_JOBS = 8
+# Distinct videos --dump-metadata remembers to skip repeats of
+EXPORT_RECENT_KEYS = 100_000
+
+# Process exit codes
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1   # error, or nothing succeeded
+EXIT_PARTIAL = 3   # batch finished with some failures
+
+# First arguments handled by daemon.py instead of the download parser
+DAEMON_COMMANDS = ('serve', 'submit', 'status', 'cancel')
+
+
+def batch_exit_code(summary):
+    """Map a batch summary to a deterministic exit code."""
+    if not summary or (summary['successful'] == 0 and summary['total'] > 0):
+        return EXIT_FAILURE
+    if summary['failed']:
+        return EXIT_PARTIAL
+    return EXIT_SUCCESS
+
+
+def describe_attempts(result):
+    """' after N attempts' for results that needed retries, else ''."""
+    attempts = result.get('attempts') or 1
+    return f" after {attempts} attempts" if attempts > 1 else ''
+
+
+def print_error(message):
+    """Report a fatal usage error on stderr without importing rich."""
+    if sys.stderr.isatty():
+        message = f"\033[31m{message}\033[0m"
+    print(message, file=sys.stderr)
 
 
 class VideoDownloaderCLI:
-    def __init__(self):
-        self.downloaders = ['youtube', 'tiktok', 'instagram', 'facebook', 'twitter']
+    def __init__(self, use_cache=True, force=False, profile=None, retries=None,
+                 progress='auto', audio_format='mp3', format_budget=None, content_store=None):
+        self.downloaders = list(PLATFORMS)
+        self.use_cache = use_cache
+        self.force = force
+        self.profile = profile
+        self.retries = retries
+        # Progress display mode, see progress.MODES
+        self.progress = progress
+        # Target of audio-only downloads, see transcode.AUDIO_FORMATS
+        self.audio_format = audio_format
+        # formats.FormatBudget from --max-height and friends, or None
+        self.format_budget = format_budget
+        # 'link' or 'reflink' to dedup downloads in the content store, or None
+        self.content_store = content_store
+
+    def get_downloader(self, platform, output_dir=None):
+        """Create a downloader configured with this session's options."""
+        downloader = get_downloader(platform, output_dir)
+        if not self.use_cache:
+            downloader.metadata_cache = None
+        downloader.force = self.force
+        downloader.profile = self.profile
+        if self.retries is not None:
+            downloader.retry_policy.max_attempts = self.retries + 1
+        downloader.audio_format = self.audio_format
+        downloader.format_budget = self.format_budget
+        downloader.content_store = self.content_store
+        return downloader
+
+    def show_effective_options(self, platforms):
+        """Print the merged yt-dlp options each platform would run with."""
+        import json
+
+        effective = {
+            platform: self.get_downloader(platform).get_platform_specific_options()
+            for platform in platforms
+        }
+        print(json.dumps(effective, indent=2, sort_keys=True, default=str))
+
+    def prune_content_store(self, output_dir=None):
+        """Delete content store objects that no download links to any more."""
+        from .contentstore import STORE_DIRNAME, open_content_store
+        from .formats import format_bytes
+
+        root = self.get_downloader(PLATFORMS[0], output_dir).download_path.parent
+        if not (root / STORE_DIRNAME).is_dir():
+            rprint(f"[yellow]No content store in {escape(str(root))}[/yellow]")
+            return
+        removed, freed = open_content_store(root, self.content_store or 'link').prune()
+        rprint(f"[green]Pruned {removed} objects, {format_bytes(freed)} freed[/green]")
 
     def list_formats(self, url, platform):
-        """List available formats for a video"""
-        downloader = get_downloader(platform)
-        formats = downloader.get_available_formats(url)
+        """List available formats for a video, best first.
+
+        With a format budget, formats that fit it are marked and the
+        download it would choose is shown with the bytes it saves.
+        """
+        from .formats import best_candidate, format_bytes, rank_formats
 
+        downloader = self.get_downloader(platform)
+        try:
+            info = downloader.extract_info(url)
+        except Exception as e:
+            rprint(f"[red]Error getting formats: {escape(str(e))}[/red]")
+            return
+        formats = info.get('formats') or []
         if not formats:
             rprint("[red]No formats available or could not fetch video info[/red]")
             return
 
+        from rich.table import Table
+
+        budget = self.format_budget
         table = Table(title=f"Available formats for {platform}")
         table.add_column("ID", style="cyan")
         table.add_column("Quality", style="green")
         table.add_column("Format", style="yellow")
-        table.add_column("Size", style="magenta")
+        table.add_column("Size", style="magenta", justify="right")
+        table.add_column("Bitrate", justify="right")
         table.add_column("Codec", style="blue")
-
-        for i, fmt in enumerate(formats[:15]):  # Show first 15 formats
-            format_note = fmt.get('format_note', 'unknown')
-            ext = fmt.get('ext', 'unknown')
-            filesize = fmt.get('filesize', fmt.get('filesize_approx', 0))
-            size_str = f"{filesize / (1024*1024):.1f}MB" if filesize else "unknown"
-            codec = fmt.get('vcodec', 'none') or fmt.get('acodec', 'none')
-
-            table.add_row(
+        if budget:
+            table.add_column("Fits")
+
+        duration = info.get('duration')
+        for fmt, size, fits in rank_formats(formats, duration, budget):
+            vcodec, acodec = fmt.get('vcodec') or '?', fmt.get('acodec') or '?'
+            codec = acodec if vcodec == 'none' else vcodec if acodec == 'none' else \
+                f"{vcodec}+{acodec}"
+            tbr = fmt.get('tbr')
+            row = [
                 str(fmt.get('format_id', '')),
-                format_note,
-                ext,
-                size_str,
-                codec
-            )
+                fmt.get('format_note') or fmt.get('resolution') or 'unknown',
+                fmt.get('ext', 'unknown'),
+                format_bytes(size),
+                f"{tbr:.0f}k" if tbr else "",
+                codec,
+            ]
+            if budget:
+                row.append("✓" if fits else "")
+            table.add_row(*row)
 
         console.print(table)
+        if budget:
+            choice = budget.choose(formats, duration)
+            best = best_candidate(formats, duration)
+            if choice is None:
+                rprint(f"[red]No format fits {budget.describe()}[/red]")
+                return
+            line = (f"[bold]{budget.describe()}:[/bold] {choice.format_id} "
+                    f"({choice.height or '?'}p, ~{format_bytes(choice.bytes)})")
+            if best and best.bytes is not None and choice.bytes is not None \
+                    and best.bytes > choice.bytes:
+                line += f", ~{format_bytes(best.bytes - choice.bytes)} less than best"
+            rprint(line)
 
     def download_with_progress(self, url, platform, quality, audio_only, output_dir=None):
-        """Download a single video with progress bar"""
-        downloader = get_downloader(platform)
+        """Download a single video with progress bar; returns True on success."""
+        from .transcode import finish
+
+        result = self._start_download(url, platform, quality, audio_only, output_dir)
+        if result.get('transcode'):
+            with console.status("[bold green]Converting audio...[/bold green]"):
+                result = finish(result)
+        return self._report_result(result)
+
+    def _start_download(self, url, platform, quality, audio_only, output_dir=None, board=None):
+        """Show the video's info and download it, returning the result dict.
+
+        Batches pass their shared ProgressBoard; otherwise one is created
+        for this download. An audio conversion may still be running when
+        this returns (see transcode.finish).
+        """
+        from .metrics import metrics
+
+        downloader = self.get_downloader(platform, output_dir)
+
+        # Skip known downloads before touching the network
+        existing = downloader.find_downloaded(url, quality=quality, audio_only=audio_only)
+        if existing:
+            return downloader._skipped_result(existing)
+
+        # One metrics job covers the info lookup and the download
+        with metrics.job(platform, url):
+            return self._download_with_progress(downloader, url, platform, quality, audio_only,
+                                                board)
 
-        if output_dir:
-            downloader.download_path = Path(output_dir) / platform
-            downloader.download_path.mkdir(parents=True, exist_ok=True)
+    def _download_with_progress(self, downloader, url, platform, quality, audio_only, board):
+        from contextlib import nullcontext
 
-        # Show video info
-        with console.status("[bold green]Fetching video information...[/bold green]"):
+        from .progress import ProgressBoard
+
+        # Show video info; the extraction is reused by the download below.
+        # A running board already owns the terminal, so no spinner then.
+        status = (console.status("[bold green]Fetching video information...[/bold green]")
+                  if board is None else nullcontext())
+        with status:
             info = downloader.get_video_info(url)
 
         if info:
@@ -70,82 +219,313 @@ class VideoDownloaderCLI:
                 f"[bold cyan]Duration:[/bold cyan] {info['duration']} seconds")
             rprint(f"[bold cyan]Views:[/bold cyan] {info['view_count']}")
 
-        # Progress hook for yt-dlp
-        def progress_hook(d):
-            if d['status'] == 'downloading':
-                if 'total_bytes' in d:
-                    progress.update(
-                        task, total=d['total_bytes'], completed=d['downloaded_bytes'])
-                elif 'total_bytes_estimate' in d:
-                    progress.update(
-                        task, total=d['total_bytes_estimate'], completed=d['downloaded_bytes'])
-                progress.update(
-                    task, description=f"Downloading {platform} video")
-            elif d['status'] == 'finished':
-                progress.update(
-                    task, description="[green]Download completed![/green]")
-
-        # Download with progress
-        progress = create_progress_bar()
-        task = progress.add_task("Starting download...", total=100)
-
-        with progress:
-            result = downloader.download(
-                url, quality, audio_only, progress_hook)
-
-        if result['success']:
+        own_board = board is None
+        if own_board:
+            board = ProgressBoard(self.progress, keep_finished=True, show_total=False).start()
+        job = board.add_job(f"{platform}: {info['title'] if info else url}", platform)
+        result = {'success': False, 'error': 'Download interrupted'}
+        try:
+            result = downloader.download(url, quality, audio_only, job.hook)
+        finally:
+            job.finish(result.get('success'))
+            if own_board:
+                board.close()
+        return result
+
+    def _report_result(self, result):
+        """Print the outcome of a single download; returns True on success."""
+        if result.get('skipped'):
+            rprint(f"\n[yellow]⏭  Already downloaded: {escape(result['filename'])}[/yellow]")
+            rprint("[dim]Use --force to download again[/dim]")
+            return True
+        elif result['success']:
             rprint(f"\n[green]✅ Download completed![/green]")
-            rprint(f"[blue]📁 Saved to: {result['filename']}[/blue]")
+            rprint(f"[blue]📁 Saved to: {escape(result['filename'])}[/blue]")
+            if result.get('format'):
+                rprint(f"[dim]{describe_format_choice(result['format'])}[/dim]")
+            if result.get('duplicate_of'):
+                rprint(f"[dim]Same content as {escape(result['duplicate_of'])}; "
+                       f"linked instead of stored twice[/dim]")
             return True
         else:
-            rprint(f"\n[red]❌ Download failed: {result['error']}[/red]")
+            rprint(f"\n[red]❌ Download failed{describe_attempts(result)}: "
+                   f"{escape(str(result['error']))}[/red]")
             return False
 
-    def batch_download(self, file_path, platform, quality, audio_only, output_dir=None):
-        """Download multiple videos from a file"""
-        try:
-            with open(file_path, 'r') as f:
-                urls = [line.strip() for line in f if line.strip()]
-        except FileNotFoundError:
-            rprint(f"[red]Error: File '{file_path}' not found[/red]")
-            return
+    def batch_download(self, source, platform, quality, audio_only, output_dir=None, jobs=1,
+                       resume=False):
+        """Download multiple videos from a file, or from stdin when source is '-'.
+
+        Lines are streamed rather than read up front, a chunk at a time,
+        into the durable job store (jobstore.py); the checkpoint file
+        records how far the source has been read. Workers claim the queued
+        jobs, so resume=True carries on after an interruption or a crash,
+        re-queueing downloads that were cut off. With jobs > 1 the URLs run
+        on a bounded worker pool. Audio conversions run on the transcode
+        pool while later URLs download; a job is done once its file is
+        converted. URLs of a video that an earlier line already named,
+        also before a --resume, are skipped before any request
+        (router.Route.key, kept with the queued jobs). Returns a summary
+        dict with 'total', 'successful' and 'failed' counts.
+        """
+        from .batch import (
+            STDIN, BatchCheckpoint, BatchStats, default_checkpoint_path, iter_batch_lines,
+            iter_chunks, source_id
+        )
+        from .jobstore import open_job_store
+        from .router import SHORT_LINK, route
+        from .transcode import transcode_pool
+
+        if source != STDIN and not os.path.isfile(source):
+            rprint(f"[red]Error: File '{source}' not found[/red]")
+            return None
+
+        store = open_job_store()
+        queue = f"batch:{source_id(source)}"
+        busy = store.live_workers(queue)
+        if busy:
+            # Clearing or resuming its queue would pull jobs from under it
+            rprint(f"[red]Error: '{escape(source)}' is already being downloaded by "
+                   f"{escape(busy[0])} (host:pid); wait for it to finish[/red]")
+            return None
+        checkpoint = BatchCheckpoint(default_checkpoint_path(source), source)
+        if resume:
+            if checkpoint.load():
+                rprint(f"[yellow]Resuming from line {checkpoint.watermark_lineno}[/yellow]")
+            else:
+                rprint("[yellow]No checkpoint found, starting from the beginning[/yellow]")
+            recovered = store.recover(queue)
+            if recovered:
+                rprint(f"[yellow]Re-queued {recovered} interrupted downloads[/yellow]")
+        else:
+            store.clear(queue)
 
-        rprint(f"[yellow]Found {len(urls)} URLs to process[/yellow]")
+        lines = iter_batch_lines(source, checkpoint.watermark, checkpoint.watermark_lineno)
+        stats = BatchStats()
+        pool = None
+        if jobs and jobs > 1:
+            from .workers import WorkerPool
 
-        successful = 0
-        for i, url in enumerate(urls, 1):
-            rprint(f"\n[bold][{i}/{len(urls)}] Processing: {url}[/bold]")
+            rprint(f"[yellow]Running with {jobs} parallel jobs[/yellow]")
+            pool = WorkerPool(jobs, max_pending=jobs * 2)
 
-            detected_platform = detect_platform(url)
-            if not detected_platform:
-                if not platform:
-                    rprint(
-                        f"[red]❌ Could not detect platform for URL: {url}[/red]")
-                    continue
-                detected_platform = platform
+        from .progress import ProgressBoard
 
-            if self.download_with_progress(url, detected_platform, quality, audio_only, output_dir):
-                successful += 1
+        # One display for the whole batch instead of a progress bar per URL
+        board = ProgressBoard(self.progress).start()
+        options = {'quality': quality, 'audio_only': audio_only, 'output_dir': output_dir}
 
+        try:
+            # Jobs left queued by an interrupted run go first
+            self._run_batch_queue(store, queue, pool, board, stats)
+
+            # Chunks keep memory flat while still letting short links in
+            # each chunk be resolved concurrently before their downloads
+            for chunk in iter_chunks(lines, BATCH_CHUNK_SIZE):
+                chunk = [line for line in chunk if line.url and not checkpoint.is_done(line)]
+                resolved = self._resolve_short_links([line.url for line in chunk])
+
+                routes = []
+                for line in chunk:
+                    found = route(line.url)
+                    if found and found.kind == SHORT_LINK and line.url in resolved:
+                        found = route(resolved[line.url]) or found
+                    routes.append(found)
+                # Videos named by earlier chunks, or before a restart, are
+                # looked up in the job store so memory stays flat
+                keys = [':'.join(found.key) for found in routes if found and found.key]
+                seen = store.known_keys(queue, keys)
+
+                items = []
+                for line, found in zip(chunk, routes):
+                    checkpoint.started(line)
+                    detected_platform = found.platform if found else platform
+                    if not detected_platform:
+                        rprint(f"[red]❌ Could not detect platform for URL: {line.url}[/red]")
+                        stats.failure(line, 'Could not detect platform')
+                        continue
+                    key = ':'.join(found.key) if found and found.key else None
+                    if key:
+                        if key in seen:
+                            stats.duplicate()
+                            continue
+                        seen.add(key)
+                    items.append({'url': line.url, 'platform': detected_platform,
+                                  'ref': line.lineno, 'options': options, 'key': key})
+                store.enqueue_many(queue, items)
+                # Everything in the chunk is now either queued or reported;
+                # saving right away keeps a crash from queueing it twice
+                for line in chunk:
+                    checkpoint.completed(line)
+                checkpoint.save()
+
+                self._run_batch_queue(store, queue, pool, board, stats)
+        except BaseException:
+            # Interrupted: drop queued work; it stays in the job store for --resume
+            from .diskspace import disk_budget
+
+            disk_budget.interrupt()
+            if pool:
+                pool.shutdown(wait=True, cancel_pending=True)
+                pool = None
+            store.release()
+            transcode_pool.drain(cancel_pending=True)
+            raise
+        finally:
+            if pool:
+                pool.shutdown(wait=True)
+            if transcode_pool.pending:
+                rprint(f"[dim]Waiting for {transcode_pool.pending} audio conversions...[/dim]")
+            transcode_pool.drain()
+            board.close()
+            checkpoint.save()
+
+        return self._batch_summary(stats)
+
+    def _run_batch_queue(self, store, queue, pool, board, stats):
+        """Claim and run queued batch jobs until none are left to claim.
+
+        With a pool the last jobs may still be running on return; the pool
+        blocks submit() while it is full, so claims never run far ahead.
+        """
+        from .batch import BatchLine
+        from .transcode import when_finished
+
+        while True:
+            job = store.claim(queue)
+            if job is None:
+                return
+            line = BatchLine(None, None, job['ref'], job['url'])
+            options = job['options']
+            args = (job['url'], job['platform'], options.get('quality', 'best'),
+                    options.get('audio_only', False), options.get('output_dir'))
+
+            if pool:
+                future = pool.submit(job['platform'], self._download_job, *args, board)
+                future.add_done_callback(lambda f, line=line, job_id=job['id']: (
+                    self._batch_job_done(line, f, stats, store, job_id)))
+                continue
+
+            rprint(f"\n[bold]Line {line.lineno} - Processing: {line.url}[/bold]")
+            result = self._start_download(*args, board)
+            when_finished(result, lambda result, line=line, job_id=job['id']: (
+                self._batch_line_done(line, result, stats, store, job_id)))
+
+    def _resolve_short_links(self, urls):
+        """Resolve every TikTok short link in urls up front, concurrently.
+
+        Later fix_tiktok_url calls then hit the resolver cache instead of
+        making one blocking request per URL mid-batch. Returns a dict
+        mapping each short link to its target.
+        """
+        from .resolver import is_short_link, short_link_resolver
+
+        count = sum(1 for url in urls if is_short_link(url))
+        if not count:
+            return {}
+        with console.status(f"[bold green]Resolving {count} short links...[/bold green]"):
+            return short_link_resolver.resolve_many(urls)
+
+    def _batch_line_done(self, line, result, stats, store, job_id):
+        """Record one finished sequential batch job."""
+        if self._report_result(result):
+            stats.success()
+        else:
+            stats.failure(line, 'Download failed')
+        store.finish(job_id, result)
+
+    def _batch_job_done(self, line, future, stats, store, job_id):
+        """Record one finished concurrent batch job (runs on the worker thread)."""
+        from .transcode import when_finished
+
+        if future.cancelled():
+            store.release(job_id)
+            return
+        when_finished(future.result(), lambda result: self._batch_result_done(
+            line, result, stats, store, job_id))
+
+    def _batch_result_done(self, line, result, stats, store, job_id):
+        if result.get('success'):
+            stats.success()
+            status = "⏭  already downloaded" if result.get('skipped') else "✅"
+            rprint(f"[green]{status} line {line.lineno}: {escape(str(result.get('filename')))}[/green]")
+        else:
+            error = f"{result.get('error', 'Download failed')}{describe_attempts(result)}"
+            stats.failure(line, error)
+            rprint(f"[red]❌ line {line.lineno}: {line.url}: {escape(error)}[/red]")
+        store.finish(job_id, result)
+
+    def _download_job(self, url, platform, quality, audio_only, output_dir=None, board=None):
+        """Worker body for concurrent batches; never raises."""
+        job = board.add_job(url, platform) if board else None
+        result = {'success': False, 'error': 'Download interrupted'}
+        try:
+            downloader = self.get_downloader(platform, output_dir)
+            result = downloader.download(url, quality, audio_only, job.hook if job else None)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        finally:
+            if job:
+                job.finish(result.get('success'))
+        return result
+
+    def _batch_summary(self, stats):
+        """Print the combined batch result and return it as a dict."""
         rprint(
-            f"\n[green]🎉 Batch download completed! Successful: {successful}/{len(urls)}[/green]")
+            f"\n[green]🎉 Batch download completed! Successful: {stats.successful}/{stats.total}[/green]")
+        if stats.duplicates:
+            rprint(f"[dim]Skipped {stats.duplicates} duplicate URLs of videos named on an "
+                   f"earlier line[/dim]")
+        if stats.failed:
+            from rich.table import Table
+
+            title = f"Failed downloads ({stats.failed})"
+            if stats.failed > len(stats.failures):
+                title += f", first {len(stats.failures)} shown"
+            table = Table(title=title)
+            table.add_column("Line", style="cyan")
+            table.add_column("URL", style="yellow")
+            table.add_column("Error", style="red")
+            for lineno, url, error in sorted(stats.failures):
+                table.add_row(str(lineno), url, str(error))
+            console.print(table)
+        return {'total': stats.total, 'successful': stats.successful, 'failed': stats.failed}
+
+    def download_playlist(self, url, quality, audio_only, output_dir=None, playlist_items=None, playlist_start=None, playlist_end=None, jobs=1, sync=False):
+        """Download a YouTube playlist.
+
+        The listing is fetched once and handed to the downloader. With
+        sync, the entry IDs are compared with a snapshot of the last sync
+        (sync.PlaylistSnapshot), and newest-first feeds such as channels
+        are only listed down to the videos that are already downloaded.
+        """
+        downloader = self.get_downloader('youtube', output_dir)
 
-    def download_playlist(self, url, quality, audio_only, output_dir=None, playlist_items=None, playlist_start=None, playlist_end=None):
-        """Download a YouTube playlist."""
-        downloader = get_downloader('youtube')
-        if output_dir:
-            downloader.download_path = Path(output_dir) / 'youtube'
-            downloader.download_path.mkdir(parents=True, exist_ok=True)
+        snapshot = stop = None
+        partial = bool(playlist_items or playlist_start or playlist_end)
+        if sync:
+            from .sync import PlaylistSnapshot
+
+            snapshot = PlaylistSnapshot(url)
+            if snapshot.load() and not partial:
+                stop = snapshot.stop_condition()
 
         with console.status("[bold green]Fetching playlist information...[/bold green]"):
-            info = downloader.get_playlist_info(url, playlist_items, playlist_start, playlist_end)
+            info = downloader.get_playlist_info(url, playlist_items, playlist_start, playlist_end,
+                                                stop)
 
         if not info:
             rprint("[red]❌ Could not fetch playlist info[/red]")
             return False
 
         rprint(f"\n[bold green]Playlist:[/bold green] {info['title']}")
-        rprint(f"Videos: {info['count']}  |  Uploader: {info['uploader']}")
+        if snapshot is None:
+            rprint(f"Videos: {info['count']}  |  Uploader: {info['uploader']}")
+        else:
+            new = snapshot.update(info, downloader.playlist_dir(info, output_dir), partial)
+            listed = info['count'] if info['complete'] else f"{info['count']} newest"
+            rprint(f"Videos listed: {listed}  |  New since last sync: {len(new)}  |  "
+                   f"Uploader: {info['uploader']}")
         if info.get('description'):
             rprint(f"[dim]{info['description'][:200]}[/dim]")
 
@@ -156,7 +536,9 @@ class VideoDownloaderCLI:
             output_dir,
             playlist_items,
             playlist_start,
-            playlist_end
+            playlist_end,
+            jobs,
+            info
         )
 
         if result.get('success'):
@@ -167,32 +549,177 @@ class VideoDownloaderCLI:
             rprint(f"\n[red]❌ Playlist download failed: {result.get('error')}[/red]")
             return False
 
-    def interactive_mode(self):
-        """Start interactive mode"""
+    def dump_metadata(self, path, parquet_path=None, batch=None, url=None, platform=None,
+                      jobs=EXPORT_JOBS, playlist=False, playlist_items=None,
+                      playlist_start=None, playlist_end=None):
+        """Extract metadata of a batch file, one URL or, with playlist=True, the
+        entries of a YouTube playlist, without downloading.
+
+        Extractions run concurrently on a WorkerPool under its per-platform
+        caps, with the platform's usual yt-dlp options and retries. Compact
+        records (export.FIELDS) stream to JSON Lines at path and, with
+        parquet_path, to a Parquet file. The batch is read a line at a
+        time and submit() blocks while jobs * 2 URLs are in flight, so
+        memory stays flat however long the input is. For the same reason
+        a URL is skipped as a duplicate only if its video is among the
+        last EXPORT_RECENT_KEYS distinct ones. Returns a summary dict
+        like batch_download.
+        """
+        from .batch import STDIN, RecentKeys, iter_batch_lines
+        from .export import ExportError, MetadataExport, error_record
+        from .router import route
+        from .workers import WorkerPool
+
+        if batch is not None:
+            if batch != STDIN and not os.path.isfile(batch):
+                rprint(f"[red]Error: File '{batch}' not found[/red]")
+                return None
+            items = ((line.lineno, line.url) for line in iter_batch_lines(batch) if line.url)
+        elif playlist:
+            items = self._playlist_metadata_items(url, playlist_items, playlist_start,
+                                                  playlist_end)
+            if items is None:
+                return None
+        else:
+            items = [(1, url)]
+
+        try:
+            export = MetadataExport(path, parquet_path)
+        except ExportError as e:
+            rprint(f"[red]Error: {escape(str(e))}[/red]")
+            return None
+
+        stats = {'submitted': 0, 'duplicates': 0}
+        # One downloader per platform: its retry policy and options serve every URL
+        downloaders = {}
+        # Route.key of the videos submitted last
+        recent = RecentKeys(EXPORT_RECENT_KEYS)
+        with export, console.status("[bold green]Extracting metadata...[/bold green]") as status:
+            def done(future):
+                if not future.cancelled():
+                    export.write(future.result())
+                    status.update(f"[bold green]Extracting metadata: {export.written}/"
+                                  f"{stats['submitted']} done, {export.failed} failed"
+                                  f"[/bold green]")
+
+            with WorkerPool(jobs, max_pending=jobs * 2) as pool:
+                for index, item_url in items:
+                    found = route(item_url)
+                    item_platform = found.platform if found else platform
+                    if not item_platform:
+                        export.write(error_record(index, item_url, None,
+                                                  'Could not detect platform'))
+                        continue
+                    if found and found.key and recent.seen(found.key):
+                        stats['duplicates'] += 1
+                        continue
+                    downloader = downloaders.get(item_platform)
+                    if downloader is None:
+                        downloader = downloaders[item_platform] = self.get_downloader(item_platform)
+                    stats['submitted'] += 1
+                    pool.submit(item_platform, self._extract_record, downloader, index,
+                                item_url).add_done_callback(done)
+
+        failed = export.failed
+        rprint(f"\n[green]Exported metadata of {export.written - failed} URLs to "
+               f"{escape(str(path))}[/green]")
+        if parquet_path:
+            rprint(f"[green]Parquet copy: {escape(str(parquet_path))}[/green]")
+        if stats['duplicates']:
+            rprint(f"[dim]Skipped {stats['duplicates']} duplicate URLs of videos named "
+                   f"earlier[/dim]")
+        if failed:
+            rprint(f"[red]{failed} URLs failed; their records carry the error[/red]")
+        return {'total': export.written, 'successful': export.written - failed,
+                'failed': failed}
+
+    def _playlist_metadata_items(self, url, playlist_items, playlist_start, playlist_end):
+        """(playlist index, URL) of each entry of a YouTube playlist, or None."""
+        downloader = self.get_downloader('youtube')
+        with console.status("[bold green]Fetching playlist information...[/bold green]"):
+            info = downloader.get_playlist_info(url, playlist_items, playlist_start,
+                                                playlist_end)
+        if not info:
+            rprint("[red]❌ Could not fetch playlist info[/red]")
+            return None
+        rprint(f"[bold green]Playlist:[/bold green] {escape(info['title'])} "
+               f"({info['count']} videos)")
+        return [(entry.get('playlist_index'), downloader._entry_url(entry))
+                for entry in info['entries']]
+
+    @staticmethod
+    def _extract_record(downloader, index, url):
+        """Worker body for dump_metadata: one export record; never raises."""
+        from .export import error_record, metadata_record
+        from .retry import RetryFailed
+
+        platform = downloader.platform_name
+        try:
+            info, _ = downloader.retry_policy.run(
+                lambda attempt: downloader.extract_info(url, refresh=attempt > 1))
+        except RetryFailed as e:
+            return error_record(index, url, platform, e.error, e.kind)
+        except Exception as e:
+            return error_record(index, url, platform, e)
+        finally:
+            # Only the record is kept
+            downloader.forget_info(url)
+        return metadata_record(index, url, platform, info)
+
+    def interactive_mode(self, jobs=1, speculative=False):
+        """Start interactive mode.
+
+        Extraction starts as soon as a URL is entered, and confirmed
+        downloads run on a background queue of jobs workers while the next
+        URL is asked for (prefetch.py). With speculative, the default
+        choice (video, best quality) starts downloading during the prompts
+        and is discarded if the user picks something else.
+        """
+        import questionary
+        from rich.panel import Panel
+
+        from .prefetch import BackgroundQueue
+
         console.print(Panel.fit(
             "[bold cyan]🎬 Interactive Video Downloader[/bold cyan]\n"
             "Download videos from YouTube, TikTok, Instagram, Facebook, and Twitter/X",
             subtitle="Press Ctrl+C to exit"
         ))
 
+        queue = BackgroundQueue(jobs, self.progress)
+        try:
+            if not self._interactive_loop(questionary, queue, speculative):
+                queue.close(cancel=True)
+                return
+            self._report_background(queue)
+            if queue.pending:
+                rprint(f"[yellow]Waiting for {queue.pending} background downloads...[/yellow]")
+                queue.wait()
+                self._report_background(queue)
+        except BaseException:
+            queue.close(cancel=True)
+            raise
+        queue.close()
+        rprint("[green]👋 Goodbye![/green]")
+
+    def _interactive_loop(self, questionary, queue, speculative):
+        """Prompt for URLs until the user is done; returns False on Ctrl+C."""
         while True:
+            self._report_background(queue)
+            prefetch = None
             try:
                 url = questionary.text("Enter video URL:").ask()
                 if not url:
-                    break
+                    return True
 
                 platform = detect_platform(url)
                 if not platform:
-                    # Detect playlist URLs even if platform not detected
-                    if is_youtube_playlist(url):
-                        platform = 'youtube'
-                    else:
-                        rprint("[red]❌ Could not detect platform from URL[/red]")
-                        continue
+                    rprint("[red]❌ Could not detect platform from URL[/red]")
+                    continue
 
                 # Playlist handling
                 if platform == 'youtube' and is_youtube_playlist(url):
-                    downloader = get_downloader('youtube')
+                    downloader = self.get_downloader('youtube')
                     with console.status("[bold green]Fetching playlist information...[/bold green]"):
                         playlist_info = downloader.get_playlist_info(url)
 
@@ -223,7 +750,7 @@ class VideoDownloaderCLI:
                         "Download type:",
                         choices=[
                             {"name": "Video", "value": "video"},
-                            {"name": "Audio only (MP3)", "value": "audio"},
+                            {"name": f"Audio only ({self.audio_format})", "value": "audio"},
                         ]
                     ).ask()
 
@@ -253,10 +780,11 @@ class VideoDownloaderCLI:
                         )
                     continue
 
-                # Get video info
+                # Extracted once, on the prefetch pool; the download below
+                # reuses it from the same downloader instead of asking again
+                prefetch = queue.prefetch(self.get_downloader(platform), url)
                 with console.status("[bold green]Fetching video information...[/bold green]"):
-                    downloader = get_downloader(platform)
-                    info = downloader.get_video_info(url)
+                    info = prefetch.video_info()
 
                 if info:
                     rprint(f"\n[bold green]Video Found:[/bold green]")
@@ -264,13 +792,16 @@ class VideoDownloaderCLI:
                     rprint(f"Platform: {platform}")
                     rprint(f"Duration: {info['duration']}s")
                     rprint(f"Uploader: {info['uploader']}")
+                    if speculative:
+                        # The first choice of each prompt below
+                        prefetch.speculate('best', False, f"{platform}: {info['title']}")
 
                 # Ask for download options
                 download_type = questionary.select(
                     "Download type:",
                     choices=[
                         {"name": "Video", "value": "video"},
-                        {"name": "Audio only (MP3)", "value": "audio"},
+                        {"name": f"Audio only ({self.audio_format})", "value": "audio"},
                     ]
                 ).ask()
 
@@ -290,26 +821,161 @@ class VideoDownloaderCLI:
 
                 # Confirm download
                 if questionary.confirm("Start download?").ask():
-                    self.download_with_progress(
-                        url,
-                        platform,
-                        quality,
-                        download_type == 'audio'
-                    )
+                    title = info['title'] if info else url
+                    prefetch.commit(quality, download_type == 'audio', f"{platform}: {title}")
+                    rprint(f"[green]Downloading in the background: {escape(title)}[/green]")
+                else:
+                    prefetch.discard()
+                prefetch = None
 
                 # Ask to continue
                 if not questionary.confirm("Download another video?").ask():
-                    rprint("[green]👋 Goodbye![/green]")
-                    break
+                    return True
 
             except KeyboardInterrupt:
                 rprint("\n[yellow]👋 Goodbye![/yellow]")
-                break
+                return False
             except Exception as e:
                 rprint(f"[red]❌ Error: {e}[/red]")
+            finally:
+                if prefetch is not None:
+                    prefetch.discard()
+
+    def _report_background(self, queue):
+        """Print the background downloads that finished since the last call."""
+        for job, result in queue.finished():
+            if result.get('skipped'):
+                rprint(f"[yellow]⏭  Already downloaded: {escape(result['filename'])}[/yellow]")
+            elif result.get('success'):
+                rprint(f"[green]✅ {escape(job.label)}: {escape(str(result['filename']))}[/green]")
+            elif not job.cancel_requested:
+                rprint(f"[red]❌ {escape(job.label)}{describe_attempts(result)}: "
+                       f"{escape(str(result.get('error')))}[/red]")
+
+
+def add_session_options(parser):
+    """Add the options shared by one-off runs and `vdl serve`."""
+    parser.add_argument('--audio-format', choices=('copy', 'm4a', 'opus', 'mp3'), default='mp3',
+                        help='Audio-only target; the stream is copied without re-encoding when '
+                             'the source codec fits, "copy" always keeps it (default: mp3)')
+    parser.add_argument('--force', action='store_true',
+                        help='Download again even if the download index has the video')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write the on-disk metadata cache')
+    parser.add_argument('--profile', metavar='NAME',
+                        help='Performance profile: fast, polite, lowmem or one from profiles.toml')
+    parser.add_argument('--progress', choices=('auto', 'bar', 'plain', 'json'), default='auto',
+                        help='Progress display: bars on a terminal, status lines '
+                             'otherwise (default: auto)')
+    parser.add_argument('--retries', type=int, metavar='N',
+                        help='Retry a failed download up to N times (default: 2); '
+                             'permanent and login errors are never retried')
+    parser.add_argument('--metrics-out', metavar='FILE',
+                        help='Append per-job phase timings to FILE as JSON lines')
+    parser.add_argument('--metrics-textfile', metavar='FILE',
+                        help='Write Prometheus metrics to FILE (textfile collector, .prom)')
+    parser.add_argument('--max-bandwidth', metavar='RATE',
+                        help='Total download rate shared by all downloads, e.g. "5M" (bytes/s)')
+    parser.add_argument('--bandwidth-weights', metavar='WEIGHTS',
+                        help='Relative platform shares of --max-bandwidth, e.g. "youtube=2,tiktok=1"')
+    parser.add_argument('--content-store', nargs='?', const='link', choices=('link', 'reflink'),
+                        metavar='MODE',
+                        help='Store each distinct file once under <output>/.vdl-store and '
+                             'hardlink (default) or reflink duplicates to it')
+    parser.add_argument('--min-free', metavar='SIZE',
+                        help='Disk space every download must leave free, e.g. "2G"; downloads '
+                             'that do not fit wait for running ones or fail (default: 512M)')
+    parser.add_argument('--max-height', type=int, metavar='N',
+                        help='Smallest download that is at most N pixels tall, e.g. 720')
+    parser.add_argument('--max-size', metavar='SIZE',
+                        help='Smallest download of the best quality that fits in SIZE, e.g. "200M"')
+    parser.add_argument('--max-bitrate', metavar='RATE',
+                        help='Smallest download of the best quality up to RATE bits/s, e.g. "2.5M"')
+    parser.add_argument('--prefer-codec', metavar='CODECS',
+                        help='Video codecs to prefer at equal height, e.g. "av1,vp9" '
+                             '(av1, vp9, h265, h264)')
+
+
+def apply_session_options(parser, args):
+    """Check the shared options, set up metrics and bandwidth, and return the CLI."""
+    if args.retries is not None and args.retries < 0:
+        parser.error('--retries must not be negative')
+    if args.metrics_out or args.metrics_textfile:
+        from .metrics import metrics
+
+        metrics.configure(args.metrics_out, args.metrics_textfile)
+    if args.max_bandwidth or args.bandwidth_weights:
+        from .bandwidth import bandwidth_governor, parse_weights
+
+        if not args.max_bandwidth:
+            parser.error('--bandwidth-weights needs --max-bandwidth')
+        try:
+            bandwidth_governor.configure(parse_size(args.max_bandwidth),
+                                         parse_weights(args.bandwidth_weights))
+        except (ProfileError, ValueError) as e:
+            parser.error(str(e))
+    if args.min_free:
+        from .diskspace import disk_budget
+
+        try:
+            disk_budget.min_free = parse_size(args.min_free)
+        except ProfileError as e:
+            parser.error(str(e))
+
+    return VideoDownloaderCLI(use_cache=not args.no_cache, force=args.force,
+                              profile=args.profile, retries=args.retries,
+                              progress=args.progress, audio_format=args.audio_format,
+                              format_budget=format_budget(parser, args),
+                              content_store=args.content_store)
+
+
+def format_budget(parser, args):
+    """Build the FormatBudget of --max-height, --max-size, --max-bitrate and
+    --prefer-codec, or return None when none of them is given."""
+    if not budget_given(args):
+        return None
+    from .formats import FormatBudget, parse_bitrate, parse_codecs
+
+    try:
+        budget = FormatBudget(
+            max_height=args.max_height,
+            max_size=parse_size(args.max_size) if args.max_size is not None else None,
+            max_bitrate=(parse_bitrate(args.max_bitrate) if args.max_bitrate is not None
+                         else None),
+            codecs=parse_codecs(args.prefer_codec) if args.prefer_codec else ())
+    except (ProfileError, ValueError) as e:
+        parser.error(str(e))
+    for flag, value in (('--max-height', budget.max_height), ('--max-size', budget.max_size),
+                        ('--max-bitrate', budget.max_bitrate)):
+        if value is not None and value <= 0:
+            parser.error(f'{flag} must be positive')
+    return budget
+
+
+def budget_given(args):
+    """True if any budget option is given; zeros count, so format_budget rejects them."""
+    return (args.max_height is not None or args.max_size is not None
+            or args.max_bitrate is not None or bool(args.prefer_codec))
+
+
+def describe_format_choice(choice):
+    """One line about the format a budget chose, e.g. for _report_result."""
+    from .formats import format_bytes
+
+    line = (f"Format {choice['format_id']} ({choice['height'] or '?'}p, "
+            f"~{format_bytes(choice['bytes'])})")
+    if choice.get('saved'):
+        line += f", ~{format_bytes(choice['saved'])} less than best"
+    return line
+
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in DAEMON_COMMANDS:
+        from .daemon import main as daemon_main
+
+        sys.exit(daemon_main(argv))
 
-def main():
     parser = argparse.ArgumentParser(
         description="Download videos from YouTube, TikTok, Instagram, Facebook, and Twitter/X",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -321,31 +987,75 @@ Examples:
   # Interactive mode
   video-downloader -i
 
+  # Start the likely download during the prompts; two downloads at once
+  video-downloader -i --speculative -j 2
+
   # Download only audio
   video-downloader -a https://instagram.com/reel/EXAMPLE/
 
+  # Keep the original audio stream (m4a, opus...) instead of encoding MP3
+  video-downloader -a --audio-format copy -b podcasts.txt
+
   # Specific quality and output directory
   video-downloader -q "best[height<=720]" -o ~/Videos https://tiktok.com/@user/video/123
 
+  # Smallest download of the best quality up to 720p, AV1 preferred
+  video-downloader --max-height 720 --prefer-codec av1 https://youtube.com/watch?v=EXAMPLE
+
   # Batch download from file
   video-downloader -b urls.txt
 
+  # Batch download with 8 parallel jobs
+  video-downloader -b urls.txt --jobs 8
+
+  # Continue an interrupted batch; URLs can also come from stdin
+  video-downloader -b urls.txt --resume
+  generate-urls | video-downloader -b -
+
   # List available formats
   video-downloader -l https://youtube.com/watch?v=EXAMPLE
+
+  # Export title, duration, views and formats of a batch without downloading
+  video-downloader -b urls.txt --dump-metadata meta.jsonl --metadata-parquet meta.parquet
   
   # Download a playlist
   video-downloader --playlist https://www.youtube.com/playlist?list=PL123
 
+  # Fetch only what is new on a channel since the last sync
+  video-downloader --sync https://www.youtube.com/@EXAMPLE/videos
+
+  # Tune throughput with a performance profile
+  video-downloader --profile fast -b urls.txt -j 4
+  video-downloader --profile polite -p tiktok --show-effective-options
+
+  # Keep one copy of clips that are reposted across platforms
+  video-downloader -b reposts.txt --content-store
+
+  # Share 5 MB/s between parallel downloads, YouTube getting twice TikTok's share
+  video-downloader -b urls.txt -j 4 --max-bandwidth 5M --bandwidth-weights youtube=2,tiktok=1
+
+  # Keep 5 GB free on the output disk while downloading a batch
+  video-downloader -b urls.txt -j 4 --min-free 5G
+
   # Short alias also works
   vdl https://youtube.com/watch?v=EXAMPLE
+
+  # Keep a warm daemon and hand it URLs (see vdl serve --help, vdl submit --help)
+  vdl serve -j 4 &
+  vdl submit --wait https://youtube.com/watch?v=EXAMPLE
         """
     )
 
     parser.add_argument('url', nargs='?', help='Video URL to download')
     parser.add_argument('-i', '--interactive',
                         action='store_true', help='Start interactive mode')
+    parser.add_argument('--speculative', action='store_true',
+                        help='In interactive mode, start downloading the best video while the '
+                             'prompts are open; discarded if something else is chosen')
     parser.add_argument('-b', '--batch', metavar='FILE',
-                        help='Batch download from text file')
+                        help='Batch download from text file ("-" reads stdin)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted batch from its checkpoint and job queue')
     parser.add_argument('-pl', '--playlist', metavar='URL',
                         help='YouTube playlist URL to download')
     parser.add_argument('--playlist-items', metavar='ITEMS',
@@ -354,24 +1064,81 @@ Examples:
                         help='Start index for playlist download')
     parser.add_argument('--playlist-end', type=int, metavar='N',
                         help='End index for playlist download')
-    parser.add_argument('-p', '--platform', choices=['youtube', 'tiktok', 'instagram', 'facebook', 'twitter'],
+    parser.add_argument('--sync', action='store_true',
+                        help='Download only what is new in a playlist or channel since the last '
+                             'sync, listing newest-first feeds only as far as needed')
+    parser.add_argument('-p', '--platform', choices=PLATFORMS,
                         help='Specify platform explicitly')
     parser.add_argument('-q', '--quality', default='best',
                         help='Video quality (default: best)')
     parser.add_argument('-a', '--audio-only', action='store_true',
-                        help='Download audio only (MP3)')
+                        help='Download audio only (MP3 unless --audio-format says otherwise)')
     parser.add_argument('-o', '--output', metavar='DIR',
                         help='Output directory (default: ./downloads)')
     parser.add_argument('-l', '--list-formats', action='store_true',
                         help='List available formats without downloading')
+    parser.add_argument('--prune-store', action='store_true',
+                        help='Delete content store objects whose downloads were all deleted')
+    parser.add_argument('--show-effective-options', action='store_true',
+                        help='Print the merged per-platform yt-dlp options and exit')
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                        help='Parallel downloads for batch, playlist and interactive mode '
+                             '(default: 1), '
+                             f'or extractions with --dump-metadata (default: {EXPORT_JOBS})')
+    parser.add_argument('--dump-metadata', metavar='FILE',
+                        help='Write metadata of the URL, playlist or batch (-b) to FILE as '
+                             'JSON Lines instead of downloading')
+    parser.add_argument('--metadata-parquet', metavar='FILE',
+                        help='With --dump-metadata, also write the records to a Parquet file '
+                             '(needs pyarrow)')
+
+    add_session_options(parser)
+
+    args = parser.parse_args(argv)
+    if args.jobs is None:
+        args.jobs = EXPORT_JOBS if args.dump_metadata else 1
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.metadata_parquet and not args.dump_metadata:
+        parser.error('--metadata-parquet needs --dump-metadata')
+    if args.dump_metadata and not (args.batch or args.playlist or args.url):
+        parser.error('--dump-metadata needs a URL, --playlist or --batch')
+    if args.quality != 'best' and budget_given(args):
+        parser.error('-q cannot be combined with --max-height, --max-size, --max-bitrate '
+                     'or --prefer-codec')
+    if args.sync:
+        for flag, value in (('--batch', args.batch), ('--interactive', args.interactive),
+                            ('--dump-metadata', args.dump_metadata),
+                            ('--list-formats', args.list_formats)):
+            if value:
+                parser.error(f'--sync cannot be combined with {flag}')
+        sync_url = args.playlist or args.url
+        if not sync_url:
+            parser.error('--sync needs a playlist or channel URL')
+        if (args.platform or detect_platform(sync_url)) != 'youtube':
+            parser.error('--sync only works with YouTube playlists and channels')
+    cli = apply_session_options(parser, args)
 
-    args = parser.parse_args()
+    try:
+        validate_profile(args.profile)
 
-    cli = VideoDownloaderCLI()
+        if args.show_effective_options:
+            platform = args.platform or (args.url and detect_platform(args.url))
+            cli.show_effective_options([platform] if platform else PLATFORMS)
 
-    try:
-        if args.interactive:
-            cli.interactive_mode()
+        elif args.prune_store:
+            cli.prune_content_store(args.output)
+
+        elif args.dump_metadata:
+            url = args.playlist or args.url
+            summary = cli.dump_metadata(
+                args.dump_metadata, args.metadata_parquet, args.batch, url, args.platform,
+                args.jobs, bool(args.playlist or url and is_youtube_playlist(url)),
+                args.playlist_items, args.playlist_start, args.playlist_end)
+            sys.exit(batch_exit_code(summary))
+
+        elif args.interactive:
+            cli.interactive_mode(args.jobs, args.speculative)
 
         elif args.playlist:
             success = cli.download_playlist(
@@ -381,28 +1148,32 @@ Examples:
                 args.output,
                 args.playlist_items,
                 args.playlist_start,
-                args.playlist_end
+                args.playlist_end,
+                args.jobs,
+                args.sync
             )
             sys.exit(0 if success else 1)
 
         elif args.list_formats and args.url:
             platform = args.platform or detect_platform(args.url)
             if not platform:
-                rprint("[red]Error: Could not detect platform from URL[/red]")
+                print_error("Error: Could not detect platform from URL")
                 sys.exit(1)
             cli.list_formats(args.url, platform)
 
         elif args.batch:
-            cli.batch_download(args.batch, args.platform,
-                               args.quality, args.audio_only, args.output)
+            summary = cli.batch_download(args.batch, args.platform,
+                                         args.quality, args.audio_only, args.output,
+                                         args.jobs, args.resume)
+            sys.exit(batch_exit_code(summary))
 
         elif args.url:
             platform = args.platform or detect_platform(args.url)
             if not platform:
-                rprint("[red]Error: Could not detect platform from URL[/red]")
+                print_error("Error: Could not detect platform from URL")
                 sys.exit(1)
 
-            if platform == 'youtube' and (args.playlist or is_youtube_playlist(args.url)):
+            if platform == 'youtube' and (args.sync or is_youtube_playlist(args.url)):
                 success = cli.download_playlist(
                     args.url,
                     args.quality,
@@ -410,7 +1181,9 @@ Examples:
                     args.output,
                     args.playlist_items,
                     args.playlist_start,
-                    args.playlist_end
+                    args.playlist_end,
+                    args.jobs,
+                    args.sync
                 )
                 sys.exit(0 if success else 1)
 
@@ -421,6 +1194,9 @@ Examples:
         else:
             parser.print_help()
 
+    except ProfileError as e:
+        print_error(f"Error: {e}")
+        sys.exit(1)
     except KeyboardInterrupt:
         rprint("\n[yellow]Download interrupted by user[/yellow]")
         sys.exit(1)
@@ -0,0 +1,357 @@
+import errno
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from yt_dlp.postprocessor.common import PostProcessor
+
+try:
+    import fcntl
+except ImportError:  # Windows: no reflinks, hardlinks only
+    fcntl = None
+
+STORE_DIRNAME = '.vdl-store'
+HASH_NAME = 'sha256'
+CHUNK_SIZE = 1024 * 1024
+
+# Ways of putting a stored object at a download's path
+LINK_MODES = ('link', 'reflink')
+
+# linux/fs.h: clone the extents of one file into another
+_FICLONE = 0x40049409
+
+_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS objects (
+        digest  TEXT PRIMARY KEY,
+        size    INTEGER NOT NULL,
+        created REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS links (
+        path   TEXT PRIMARY KEY,
+        digest TEXT NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS links_digest ON links (digest)',
+)
+
+
+def hash_file(path):
+    """Hex digest of a whole file, for files nothing hashed while they were written."""
+    digest = hashlib.new(HASH_NAME)
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reflink(src, dst):
+    """Make dst a copy-on-write clone of src (Btrfs, XFS); raises OSError if unsupported."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, 'Reflinks are not supported on this platform')
+    with open(src, 'rb') as s, open(dst, 'xb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+
+
+class _Tail:
+    """Hash state of one file that is still being written."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.ino = os.fstat(self.file.fileno()).st_ino
+        self.digest = hashlib.new(HASH_NAME)
+        self.offset = 0
+        self.downloaded = 0
+
+    def restart(self):
+        self.file.seek(0)
+        self.digest = hashlib.new(HASH_NAME)
+        self.offset = 0
+
+    def update(self):
+        """Hash whatever the writer has added since the last call."""
+        if os.fstat(self.file.fileno()).st_size < self.offset:
+            self.restart()
+        while chunk := self.file.read(CHUNK_SIZE):
+            self.digest.update(chunk)
+            self.offset += len(chunk)
+
+    def close(self):
+        self.file.close()
+
+
+class StreamHasher(PostProcessor):
+    """Progress hook that hashes each file while yt-dlp downloads it.
+
+    On every progress update it reads the bytes written since the last
+    one, which are still in the page cache, so a finished file needs no
+    second pass over the disk. As a before_dl post-processor it also
+    sees the selected formats and leaves downloads that get merged
+    alone: only the merged file is stored, and ContentStore.add hashes
+    it once. digest() only answers for a file that is still exactly
+    what was hashed, so one a fixup rewrote is hashed again too. Audio
+    conversions replace every file; don't attach it for those. One
+    instance may serve several concurrent downloads.
+    """
+
+    # When sessions.YoutubeDLPool registers it in the chain
+    when = 'before_dl'
+
+    def __init__(self):
+        super().__init__(None)
+        self._lock = threading.Lock()
+        self._tails = {}
+        # Final path -> (hex digest, inode, size, mtime_ns)
+        self._digests = {}
+        # IDs of the videos whose formats are downloaded apart and merged
+        self._merged = set()
+
+    def run(self, info):
+        with self._lock:
+            if len(info.get('requested_formats') or ()) > 1:
+                self._merged.add(info.get('id'))
+            else:
+                self._merged.discard(info.get('id'))
+        return [], info
+
+    def __call__(self, d):
+        filename = d.get('filename')
+        if not filename or filename == '-':
+            return
+        if (d.get('info_dict') or {}).get('id') in self._merged:
+            return
+        status = d.get('status')
+        if status == 'downloading':
+            self._downloading(filename, d)
+        elif status == 'finished':
+            self._finished(filename)
+        elif status == 'error':
+            with self._lock:
+                tail = self._tails.pop(filename, None)
+            if tail:
+                tail.close()
+
+    def _downloading(self, filename, d):
+        path = d.get('tmpfilename') or filename
+        with self._lock:
+            tail = self._tails.get(filename)
+        try:
+            if tail is None or tail.path != path:
+                if tail:
+                    tail.close()
+                tail = _Tail(path)
+                with self._lock:
+                    self._tails[filename] = tail
+            elif os.stat(path).st_ino != tail.ino:
+                # Restarted into a new file
+                tail.close()
+                tail = _Tail(path)
+                with self._lock:
+                    self._tails[filename] = tail
+            downloaded = d.get('downloaded_bytes') or 0
+            if downloaded < tail.downloaded and d.get('fragment_index') is None:
+                # The server refused to resume: yt-dlp truncated the file
+                tail.restart()
+            tail.downloaded = downloaded
+            tail.update()
+        except OSError:
+            # Not created yet, or gone: the next update tries again
+            pass
+
+    def _finished(self, filename):
+        with self._lock:
+            tail = self._tails.pop(filename, None)
+        if tail is None:
+            return
+        try:
+            tail.update()
+            st = os.stat(filename)
+        except OSError:
+            return
+        finally:
+            tail.close()
+        if st.st_ino == tail.ino and st.st_size == tail.offset:
+            with self._lock:
+                self._digests[filename] = (tail.digest.hexdigest(), st.st_ino, st.st_size,
+                                           st.st_mtime_ns)
+
+    def digest(self, path):
+        """Hex digest hashed during the download of path, or None."""
+        with self._lock:
+            known = self._digests.pop(str(path), None)
+        if known is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if (st.st_ino, st.st_size, st.st_mtime_ns) != known[1:]:
+            return None
+        return known[0]
+
+
+class ContentStore:
+    """Stores each distinct downloaded file once, under its SHA-256 digest.
+
+    Objects live in <output root>/.vdl-store/objects/ab/<digest>, on the
+    same filesystem as the downloads. The first download of some content
+    becomes the object through a hardlink (mode 'link') or a copy-on-write
+    clone ('reflink'), so storing it costs no space; later downloads of
+    the same bytes are replaced by another link to the object. A SQLite
+    digest index maps digests to objects and download paths.
+    """
+
+    def __init__(self, root, mode='link'):
+        if mode not in LINK_MODES:
+            raise ValueError(f"Unknown content store mode: {mode!r}")
+        self.mode = mode
+        self.path = Path(root) / STORE_DIRNAME
+        self.objects = self.path / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path / 'digests.sqlite3'), timeout=30,
+                                     check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def object_path(self, digest):
+        return self.objects / digest[:2] / digest
+
+    def lookup(self, digest):
+        """Return the stored object for digest, or None."""
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM objects WHERE digest = ?',
+                                     (digest,)).fetchone()
+        if row is None:
+            return None
+        path = self.object_path(digest)
+        return path if path.exists() else None
+
+    def paths(self, digest):
+        """Download paths recorded with digest."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                'SELECT path FROM links WHERE digest = ? ORDER BY path', (digest,))]
+
+    def add(self, path, digest=None):
+        """Store a finished download and link it to its object.
+
+        digest is the one StreamHasher computed, if any; otherwise the file
+        is read once. Returns a dict with 'digest', 'duplicate' (True if
+        the content was already stored) and 'saved' (bytes freed by
+        linking a duplicate). A filesystem without links leaves the file
+        as it is, with only its digest recorded.
+        """
+        path = Path(path)
+        digest = digest or hash_file(path)
+        size = path.stat().st_size
+        target = self.object_path(digest)
+        target.parent.mkdir(exist_ok=True)
+        duplicate, saved = False, 0
+        try:
+            self._link(path, target)
+        except FileExistsError:
+            duplicate = True
+            saved = self._replace_with_object(path, target, size)
+        except OSError:
+            pass  # No links on this filesystem
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR IGNORE INTO objects VALUES (?, ?, ?)',
+                               (digest, size, time.time()))
+            self._conn.execute('INSERT OR REPLACE INTO links VALUES (?, ?)',
+                               (str(path), digest))
+        return {'digest': digest, 'duplicate': duplicate, 'saved': saved}
+
+    def _link(self, src, dst):
+        if self.mode == 'reflink':
+            try:
+                return reflink(src, dst)
+            except FileExistsError:
+                raise
+            except OSError:
+                pass  # Not Btrfs/XFS: fall back to a hardlink
+        os.link(src, dst)
+
+    def _replace_with_object(self, path, target, size):
+        """Swap path for a link to the object; returns the bytes that frees."""
+        try:
+            st, obj = path.stat(), target.stat()
+        except OSError:
+            return 0
+        if (st.st_dev, st.st_ino) == (obj.st_dev, obj.st_ino):
+            return 0  # Already the object
+        if obj.st_size != size:
+            return 0  # Same digest, different size: leave both alone
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.vdl-link')
+        try:
+            self._link(target, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return 0
+        return size if st.st_nlink == 1 else 0
+
+    def prune(self):
+        """Delete objects no download links to any more; returns (count, bytes).
+
+        A hardlinked object whose only link is its own has had every
+        download deleted. A reflinked one is kept while a recorded path
+        still holds a file of its size.
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT digest, size FROM objects').fetchall()
+        removed, freed = 0, 0
+        for digest, size in rows:
+            target = self.object_path(digest)
+            try:
+                nlink = target.stat().st_nlink
+            except FileNotFoundError:
+                nlink = 0
+            if nlink > 1 or (nlink and any(_size(p) == size for p in self.paths(digest))):
+                continue
+            if nlink:
+                target.unlink()
+                freed += size
+            removed += 1
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM objects WHERE digest = ?', (digest,))
+                self._conn.execute('DELETE FROM links WHERE digest = ?', (digest,))
+        return removed, freed
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_content_store(root, mode='link'):
+    """Return the shared ContentStore for an output root."""
+    root = Path(root).expanduser().resolve()
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = ContentStore(root, mode)
+        store.mode = mode
+        return store
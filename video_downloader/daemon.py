@@ -0,0 +1,699 @@
+"""Resident download daemon and its clients.
+
+`vdl serve` keeps downloaders, their pooled YoutubeDL handles and a worker
+pool warm in one process and takes jobs over a small JSON-over-HTTP API,
+on a Unix socket (the default) or on a localhost port:
+
+    POST   /jobs        {"url", "platform", "quality", "audio_only",
+                         "audio_format", "output_dir"}  -> job
+    GET    /jobs        -> {"jobs": [job, ...]}
+    GET    /jobs/<id>   -> job
+    DELETE /jobs/<id>   -> job, cancelled
+
+Jobs are kept in the persistent job store (queue 'daemon'), so the ones
+still queued or cut off by a crash run again when the daemon restarts.
+`vdl submit`, `vdl status` and `vdl cancel` are thin clients: they import
+neither rich nor yt-dlp.
+
+Every request must carry "Authorization: Bearer <token>" with the random
+token the daemon writes to a 0600 file next to its socket (token_path()),
+POSTs must be application/json, and requests with an Origin header, i.e.
+from a web page, are refused. output_dir must lie inside the daemon's
+output root.
+"""
+import argparse
+import hmac
+import http.client
+import json
+import os
+import re
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .jobstore import CANCELLED, DONE, FAILED, FINAL_STATES, QUEUED, RUNNING
+from .utils import user_cache_dir
+
+# Job store queue of the daemon's jobs
+QUEUE = 'daemon'
+
+# Warm downloaders kept per (platform, output directory, audio format)
+MAX_DOWNLOADERS = 16
+
+
+class DaemonError(Exception):
+    """The daemon could not be reached or refused a request."""
+
+
+def default_socket_path():
+    return user_cache_dir() / 'daemon.sock'
+
+
+def token_path(socket_path=None, port=None):
+    """File holding the API token of the daemon at this address."""
+    if port:
+        return user_cache_dir() / f'daemon-{port}.token'
+    return Path(f'{socket_path or default_socket_path()}.token')
+
+
+def write_token(path):
+    """Create a random token readable by the owner only and return it."""
+    token = secrets.token_urlsafe(32)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        if hasattr(os, 'fchmod'):
+            # O_CREAT's mode does not apply to a file left by an earlier daemon
+            os.fchmod(fd, 0o600)
+        os.write(fd, token.encode())
+    finally:
+        os.close(fd)
+    return token
+
+
+class Job:
+    """One submitted download and what became of it."""
+
+    def __init__(self, job_id, url, platform, quality='best', audio_only=False,
+                 audio_format='mp3', output_dir=None, submitted=None):
+        self.id = job_id
+        self.url = url
+        self.platform = platform
+        self.quality = quality
+        self.audio_only = audio_only
+        self.audio_format = audio_format
+        self.output_dir = output_dir
+        self.state = QUEUED
+        self.submitted = submitted or time.time()
+        self.started = None
+        self.finished = None
+        self.result = {}
+        self.progress = None
+        self.future = None
+        self.cancel_requested = False
+
+    def hook(self, d):
+        if self.cancel_requested:
+            from .retry import Cancelled
+
+            raise Cancelled('Cancelled')
+        self.progress.hook(d)
+
+    @classmethod
+    def from_stored(cls, stored):
+        """Rebuild a queued job from its job store row."""
+        options = stored['options']
+        return cls(stored['id'], stored['url'], stored['platform'],
+                   options.get('quality') or 'best', bool(options.get('audio_only')),
+                   options.get('audio_format') or 'mp3', options.get('output_dir'),
+                   stored['created'])
+
+    def options(self):
+        return {'quality': self.quality, 'audio_only': self.audio_only,
+                'audio_format': self.audio_format, 'output_dir': self.output_dir}
+
+    def to_dict(self):
+        progress = self.progress
+        return {
+            'id': self.id,
+            'url': self.url,
+            'platform': self.platform,
+            'state': self.state,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'downloaded': progress.downloaded if progress else 0,
+            'total': round(progress.total) if progress and progress.total else None,
+            'speed': round(progress.speed or 0) if progress else 0,
+            'filename': self.result.get('filename'),
+            'skipped': bool(self.result.get('skipped')),
+            'error': self.result.get('error'),
+            'error_kind': self.result.get('error_kind'),
+            'attempts': self.result.get('attempts'),
+        }
+
+
+class DownloadService:
+    """Jobs, warm downloaders and the worker pool behind `vdl serve`.
+
+    Downloaders are kept per platform, output directory and audio format
+    and shared by every job, so extractor setup and pooled HTTP sessions
+    outlive each download; the least recently used go once there are
+    MAX_DOWNLOADERS. Job IDs and states come from the job store; only
+    the newest max_finished finished jobs are kept in memory. Jobs write
+    under output_dir (default ~/Downloads) and nowhere else.
+    """
+
+    def __init__(self, cli, jobs=4, output_dir=None, max_finished=1000):
+        from .jobstore import open_job_store
+        from .progress import ProgressBoard
+        from .workers import WorkerPool
+
+        self.cli = cli
+        self.output_dir = output_dir
+        self.max_finished = max_finished
+        self.pool = WorkerPool(jobs)
+        self.board = ProgressBoard(cli.progress)
+        self.store = open_job_store()
+        self._jobs = {}
+        self._downloaders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self):
+        from .downloaders import PLATFORMS
+
+        # Import every downloader (and yt-dlp) now rather than on the first job
+        for platform in PLATFORMS:
+            self._downloader(platform, self.output_dir, self.cli.audio_format)
+        self.board.start()
+        self._resume()
+        return self
+
+    def _resume(self):
+        """Queue the jobs a previous daemon left unfinished."""
+        from .utils import rprint
+
+        self.store.recover(QUEUE)
+        # Finished jobs of earlier daemons are no longer reported
+        self.store.clear(QUEUE, FINAL_STATES)
+        stored = self.store.jobs(QUEUE, (QUEUED,))
+        if stored:
+            rprint(f"[yellow]Resuming {len(stored)} queued jobs[/yellow]")
+        for row in stored:
+            job = Job.from_stored(row)
+            try:
+                job.output_dir = self._output_dir(job.output_dir)
+            except ValueError as e:
+                self.store.claim(QUEUE, job.id)
+                self.store.finish(job.id, {'success': False, 'error': str(e)}, FAILED)
+                continue
+            with self._lock:
+                self._jobs[job.id] = job
+            job.future = self.pool.submit(job.platform, self._run, job)
+
+    def close(self):
+        from .diskspace import disk_budget
+        from .transcode import transcode_pool
+
+        # Jobs that never started stay queued in the store for the next start
+        disk_budget.interrupt()
+        self.pool.shutdown(wait=True, cancel_pending=True)
+        transcode_pool.drain()
+        self.store.release()
+        self.board.close()
+
+    def submit(self, request):
+        """Queue the download described by a request dict; raises ValueError."""
+        from .downloaders import PLATFORMS
+        from .transcode import AUDIO_FORMATS
+        from .utils import detect_platform
+
+        url = str(request.get('url') or '').strip()
+        if not url:
+            raise ValueError('url is required')
+        platform = request.get('platform') or detect_platform(url)
+        if platform not in PLATFORMS:
+            raise ValueError(f'Could not detect platform for URL: {url}')
+        audio_format = request.get('audio_format') or self.cli.audio_format
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"audio_format must be one of {', '.join(AUDIO_FORMATS)}")
+        output_dir = self._output_dir(request.get('output_dir'))
+
+        job = Job(None, url, platform, request.get('quality') or 'best',
+                  bool(request.get('audio_only')), audio_format, output_dir)
+        job.id = self.store.enqueue(QUEUE, url, platform, job.options())
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_finished()
+        job.future = self.pool.submit(platform, self._run, job)
+        return job
+
+    def _output_dir(self, requested):
+        """The requested output directory if it is inside the output root;
+        raises ValueError otherwise. None means the root itself."""
+        if not requested:
+            return self.output_dir
+        root = Path(self.output_dir or Path.home() / 'Downloads').resolve()
+        # A relative path is taken from the root; ".." must not leave it
+        resolved = (root / str(requested)).resolve()
+        if resolved != root and root not in resolved.parents:
+            raise ValueError(f'output_dir must be inside {root}')
+        return str(resolved)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Cancel a job: queued ones never start, running ones stop at their
+        next progress update. Returns the job, or None if unknown."""
+        job = self.get(job_id)
+        if job is None or job.state in FINAL_STATES:
+            return job
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            self.store.cancel(job.id)
+            job.state = CANCELLED
+            job.finished = time.time()
+            job.result = {'success': False, 'error': 'Cancelled'}
+        return job
+
+    def _forget_finished(self):
+        # Caller must hold self._lock
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINAL_STATES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _downloader(self, platform, output_dir, audio_format):
+        key = (platform, output_dir, audio_format)
+        with self._lock:
+            downloader = self._downloaders.get(key)
+            if downloader is None:
+                downloader = self.cli.get_downloader(platform, output_dir)
+                downloader.audio_format = audio_format
+                self._downloaders[key] = downloader
+                # Running jobs keep their own reference to an evicted one
+                while len(self._downloaders) > MAX_DOWNLOADERS:
+                    self._downloaders.popitem(last=False)
+            else:
+                self._downloaders.move_to_end(key)
+            return downloader
+
+    def _run(self, job):
+        """Worker body; never raises."""
+        from .transcode import when_finished
+
+        if self.store.claim(QUEUE, job.id) is None:
+            # Cancelled, or taken by another daemon sharing the store
+            job.state = CANCELLED
+            return
+        job.state = RUNNING
+        job.started = time.time()
+        job.progress = self.board.add_job(job.url, job.platform)
+        result = {'success': False, 'error': 'Download interrupted'}
+        downloader = None
+        try:
+            downloader = self._downloader(job.platform, job.output_dir, job.audio_format)
+            result = downloader.download(job.url, job.quality, job.audio_only, job.hook)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        finally:
+            job.progress.finish(result.get('success'))
+            if downloader is not None:
+                # A resident process would otherwise keep every info dict
+                downloader.forget_info(job.url)
+        when_finished(result, lambda result: self._finished(job, result))
+
+    def _finished(self, job, result):
+        from .utils import escape, rprint
+
+        job.result = {k: v for k, v in result.items() if k != 'transcode'}
+        job.finished = time.time()
+        if result.get('success'):
+            job.state = DONE
+            rprint(f"[green]✅ job {job.id}: {escape(str(result.get('filename')))}[/green]")
+        elif job.cancel_requested:
+            job.state = CANCELLED
+            job.result['error'] = 'Cancelled'
+            rprint(f"[yellow]job {job.id} cancelled: {escape(job.url)}[/yellow]")
+        else:
+            job.state = FAILED
+            rprint(f"[red]❌ job {job.id}: {escape(job.url)}: "
+                   f"{escape(str(result.get('error')))}[/red]")
+        self.store.finish(job.id, job.result, job.state)
+        with self._lock:
+            self._forget_finished()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'vdl'
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == '/jobs':
+            self._reply(200, {'jobs': [job.to_dict() for job in self.server.service.list()]})
+            return
+        job = self._job()
+        if job:
+            self._reply(200, job.to_dict())
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != '/jobs':
+            self._reply(404, {'error': 'Not found'})
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self._reply(415, {'error': 'Content-Type must be application/json'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError('Expected a JSON object')
+            job = self.server.service.submit(request)
+        except ValueError as e:
+            self._reply(400, {'error': str(e)})
+            return
+        self._reply(201, job.to_dict())
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        job = self._job()
+        if job:
+            self._reply(200, self.server.service.cancel(job.id).to_dict())
+
+    def _authorized(self):
+        """Refuse browser requests and requests without the daemon's token."""
+        if self.headers.get('Origin') is not None:
+            # Only browsers send Origin; no web page may queue downloads
+            self._reply(403, {'error': 'Cross-origin requests are not allowed'})
+            return False
+        expected = f'Bearer {self.server.token}'.encode()
+        if not hmac.compare_digest((self.headers.get('Authorization') or '').encode(), expected):
+            self._reply(401, {'error': 'Missing or wrong token'})
+            return False
+        return True
+
+    def _job(self):
+        match = re.fullmatch(r'/jobs/(\d+)', self.path)
+        job = self.server.service.get(int(match.group(1))) if match else None
+        if job is None:
+            self._reply(404, {'error': 'No such job'})
+        return job
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = super().get_request()
+            # BaseHTTPRequestHandler expects a (host, port) peer
+            return request, ('local', 0)
+else:  # Windows: --port only
+    _UnixHTTPServer = None
+
+
+def _listening(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(2)
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def make_server(service, socket_path=None, port=None):
+    """Bind the API to a Unix socket, or to 127.0.0.1:port if port is given.
+
+    The server's token is written to server.token_path; remove it when done.
+    """
+    if port is not None or _UnixHTTPServer is None:
+        server = ThreadingHTTPServer(('127.0.0.1', port or 0), _Handler)
+        server.token_path = token_path(port=server.server_address[1])
+    else:
+        path = Path(socket_path or default_socket_path())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            if _listening(path):
+                raise DaemonError(f'A daemon is already listening on {path}')
+            path.unlink()  # Left behind by a daemon that died
+        # Only the owner may connect
+        umask = os.umask(0o177)
+        try:
+            server = _UnixHTTPServer(str(path), _Handler)
+        finally:
+            os.umask(umask)
+        server.token_path = token_path(path)
+    server.token = write_token(server.token_path)
+    server.service = service
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = str(socket_path)
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """Client of a running `vdl serve`; methods return the API's JSON."""
+
+    def __init__(self, socket_path=None, port=None, timeout=30):
+        self.socket_path = socket_path or default_socket_path()
+        self.port = port
+        self.timeout = timeout
+        self._token = None
+
+    @property
+    def token(self):
+        if self._token is None:
+            path = token_path(self.socket_path, self.port)
+            try:
+                self._token = path.read_text().strip()
+            except OSError as e:
+                raise DaemonError(f'Cannot read the daemon token {path}: {e.strerror}; '
+                                  f'is vdl serve running?') from e
+        return self._token
+
+    @property
+    def address(self):
+        return f'127.0.0.1:{self.port}' if self.port else str(self.socket_path)
+
+    def request(self, method, path, payload=None):
+        headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {self.token}'}
+        if self.port:
+            conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=self.timeout)
+        else:
+            conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            body = json.dumps(payload) if payload is not None else None
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            data = json.loads(response.read() or b'{}')
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise DaemonError(f'Cannot reach vdl serve at {self.address}: {e}') from e
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise DaemonError(data.get('error') or f'HTTP {response.status}')
+        return data
+
+    def submit(self, url, **options):
+        return self.request('POST', '/jobs', {'url': url, **options})
+
+    def status(self, job_id=None):
+        if job_id is None:
+            return self.request('GET', '/jobs')['jobs']
+        return self.request('GET', f'/jobs/{job_id}')
+
+    def cancel(self, job_id):
+        return self.request('DELETE', f'/jobs/{job_id}')
+
+    def wait(self, job_ids, interval=0.5):
+        """Poll until every job has finished; return their final states."""
+        pending = list(job_ids)
+        finished = {}
+        while pending:
+            for job_id in list(pending):
+                job = self.status(job_id)
+                if job['state'] in FINAL_STATES:
+                    finished[job_id] = job
+                    pending.remove(job_id)
+            if pending:
+                time.sleep(interval)
+        return [finished[job_id] for job_id in job_ids]
+
+
+def describe_job(job):
+    """One status line: id, state, progress, URL and file or error."""
+    progress = ''
+    if job['state'] == RUNNING and job['downloaded']:
+        progress = f"{job['downloaded'] * 100 // job['total']}%" if job['total'] else \
+            f"{job['downloaded'] // 1024} KiB"
+    outcome = job['filename'] if job['state'] == DONE else job['error'] or ''
+    return '\t'.join(str(part) for part in (job['id'], job['state'], progress, job['url'], outcome))
+
+
+def _add_address_options(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--socket', metavar='PATH',
+                       help=f'Unix socket of the daemon (default: {default_socket_path()})')
+    group.add_argument('--port', type=int, metavar='N',
+                       help='Use HTTP on 127.0.0.1:N instead of the Unix socket')
+
+
+def build_parser():
+    from .cli import add_session_options
+
+    parser = argparse.ArgumentParser(
+        prog='vdl', description='Resident download daemon and its clients')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Run the daemon in the foreground')
+    _add_address_options(serve)
+    serve.add_argument('-j', '--jobs', type=int, default=4, metavar='N',
+                       help='Parallel downloads (default: 4)')
+    serve.add_argument('-o', '--output', metavar='DIR',
+                       help='Default output directory (default: ~/Downloads)')
+    add_session_options(serve)
+
+    submit = commands.add_parser('submit', help='Queue downloads on the daemon')
+    _add_address_options(submit)
+    submit.add_argument('urls', nargs='+', metavar='URL')
+    submit.add_argument('-p', '--platform', help='Specify platform explicitly')
+    submit.add_argument('-q', '--quality', default='best', help='Video quality (default: best)')
+    submit.add_argument('-a', '--audio-only', action='store_true', help='Download audio only')
+    submit.add_argument('--audio-format', choices=('copy', 'm4a', 'opus', 'mp3'),
+                        help="Audio-only target (default: the daemon's)")
+    submit.add_argument('-o', '--output', metavar='DIR', help='Output directory for these jobs')
+    submit.add_argument('--wait', action='store_true',
+                        help='Wait for the jobs to finish; the exit code reflects their outcome')
+
+    status = commands.add_parser('status', help='Show jobs (all if no ID is given)')
+    _add_address_options(status)
+    status.add_argument('ids', nargs='*', type=int, metavar='ID')
+    status.add_argument('--json', action='store_true', help='Print jobs as JSON')
+
+    cancel = commands.add_parser('cancel', help='Cancel queued or running jobs')
+    _add_address_options(cancel)
+    cancel.add_argument('ids', nargs='+', type=int, metavar='ID')
+    return parser
+
+
+def serve(parser, args):
+    import signal
+
+    from .cli import apply_session_options
+    from .profiles import ProfileError, validate_profile
+
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    cli = apply_session_options(parser, args)
+    try:
+        validate_profile(args.profile)
+    except ProfileError as e:
+        parser.error(str(e))
+
+    output = os.path.abspath(args.output) if args.output else None
+    service = DownloadService(cli, args.jobs, output)
+    server = make_server(service, args.socket, args.port)
+    service.start()
+    if isinstance(server.server_address, tuple):
+        address = f'http://127.0.0.1:{server.server_address[1]}'
+    else:
+        address = server.server_address
+    print(f"vdl serve: listening on {address} with {args.jobs} workers", flush=True)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        paths = [server.token_path]
+        if not isinstance(server.server_address, tuple):
+            paths.append(server.server_address)
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        service.close()
+    return 0
+
+
+def submit(client, args):
+    from .cli import EXIT_FAILURE, EXIT_PARTIAL, EXIT_SUCCESS
+
+    options = {'platform': args.platform, 'quality': args.quality,
+               'audio_only': args.audio_only, 'audio_format': args.audio_format,
+               # The daemon's working directory is not ours
+               'output_dir': os.path.abspath(args.output) if args.output else None}
+    ids = []
+    failed = 0
+    for url in args.urls:
+        try:
+            job = client.submit(url, **options)
+        except DaemonError as e:
+            print(f"{url}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        ids.append(job['id'])
+        print(f"{job['id']}\t{job['state']}\t{url}", flush=True)
+    if not args.wait:
+        return EXIT_FAILURE if failed else EXIT_SUCCESS
+
+    for job in client.wait(ids):
+        print(describe_job(job))
+        failed += job['state'] != DONE
+    if failed == len(args.urls):
+        return EXIT_FAILURE
+    return EXIT_PARTIAL if failed else EXIT_SUCCESS
+
+
+def main(argv):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        try:
+            return serve(parser, args)
+        except DaemonError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+    client = DaemonClient(args.socket, args.port)
+    try:
+        if args.command == 'submit':
+            return submit(client, args)
+        if args.command == 'status':
+            jobs = [client.status(job_id) for job_id in args.ids] if args.ids else client.status()
+            if args.json:
+                print(json.dumps(jobs, indent=2))
+            else:
+                for job in jobs:
+                    print(describe_job(job))
+        elif args.command == 'cancel':
+            for job_id in args.ids:
+                print(describe_job(client.cancel(job_id)))
+    except DaemonError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
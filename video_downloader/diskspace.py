@@ -0,0 +1,291 @@
+import errno
+import functools
+import os
+import shutil
+import sys
+import threading
+import time
+
+from yt_dlp.postprocessor.common import PostProcessor
+
+from .formats import Candidate, format_bytes
+
+# Space every download must leave free on its filesystem (--min-free)
+DEFAULT_MIN_FREE = 512 * 1024 * 1024
+# A merge writes the output while both parts are still on disk
+MERGE_FACTOR = 2
+# How long a download waits for running ones to free space, and how
+# often it looks again (other processes write to the disk too)
+DEFER_TIMEOUT = 600
+POLL_INTERVAL = 2.0
+
+# fallocate(2) mode: reserve blocks without changing the file size, so
+# yt-dlp's resume and append logic sees the bytes written so far
+_FALLOC_FL_KEEP_SIZE = 0x01
+
+
+class InsufficientSpace(OSError):
+    """A download does not fit on the disk; an ENOSPC error, so never retried."""
+
+    def __init__(self, path, needed, free):
+        if needed:
+            reason = (f"needs {format_bytes(needed)}, {format_bytes(max(free, 0))} free "
+                      f"after --min-free and running downloads")
+        else:
+            reason = "less free than --min-free"
+        super().__init__(errno.ENOSPC, f"Not enough disk space in {path}: {reason}")
+        self.path = path
+        self.needed = needed
+        self.free = free
+
+    def __str__(self):
+        return self.strerror
+
+
+class Reservation:
+    """Space held for one download on the filesystem device."""
+
+    __slots__ = ('device', 'size', 'written')
+
+    def __init__(self, device, size):
+        self.device = device
+        self.size = size
+        # Bytes downloaded so far per file, from the progress hook
+        self.written = {}
+
+    @property
+    def remaining(self):
+        return max(0, self.size - sum(self.written.values()))
+
+
+def _existing_dir(path):
+    """path, or its nearest parent that exists (yt-dlp creates the rest)."""
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+class DiskBudget:
+    """Admits downloads against the free space of their filesystem.
+
+    Each running download holds a Reservation of its estimated size until
+    it finishes, less what it has written so far (that is already gone
+    from the free space). A download is admitted when it fits next to
+    them and min_free; one that only fits once the running downloads are
+    done, e.g. because a merge deletes its parts, waits up to
+    DEFER_TIMEOUT; one that would not fit on an idle disk is refused.
+    Reservations only cover this process.
+    """
+
+    def __init__(self, min_free=DEFAULT_MIN_FREE, timeout=DEFER_TIMEOUT):
+        self.min_free = min_free
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._held = []
+        # Bumped by interrupt() to wake and fail the waiting downloads
+        self._generation = 0
+
+    def reserve(self, path, size, on_wait=None):
+        """Hold size bytes on the filesystem of path; raises InsufficientSpace.
+
+        on_wait(message) is called once if the download has to wait.
+        """
+        from .retry import Cancelled
+
+        directory = _existing_dir(path)
+        reservation = Reservation(os.stat(directory).st_dev, size or 0)
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            generation = self._generation
+            while True:
+                free = shutil.disk_usage(directory).free - self.min_free
+                held = sum(r.remaining for r in self._held if r.device == reservation.device)
+                if reservation.size <= free - held:
+                    self._held.append(reservation)
+                    return reservation
+                if not held or reservation.size > free or time.monotonic() >= deadline:
+                    raise InsufficientSpace(directory, reservation.size, free - held)
+                if generation != self._generation:
+                    raise Cancelled('Cancelled while waiting for disk space')
+                if on_wait:
+                    on_wait(f"Waiting for {format_bytes(reservation.size)} of disk space "
+                            f"held by running downloads")
+                    on_wait = None
+                self._cond.wait(POLL_INTERVAL)
+
+    def release(self, reservation):
+        with self._cond:
+            if reservation in self._held:
+                self._held.remove(reservation)
+                self._cond.notify_all()
+
+    def update(self, reservation, filename, written):
+        with self._cond:
+            reservation.written[filename] = written
+
+    def interrupt(self):
+        """Fail the downloads waiting for space, e.g. on Ctrl+C."""
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+
+disk_budget = DiskBudget()
+
+
+@functools.cache
+def _fallocate():
+    """libc fallocate(), or None off Linux."""
+    if not sys.platform.startswith('linux'):
+        return None
+    import ctypes
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = getattr(libc, 'fallocate64', None) or libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+    func.restype = ctypes.c_int
+    return func
+
+
+def preallocate(path, size):
+    """Reserve size bytes of blocks for path without changing its length.
+
+    Returns False where the platform or filesystem cannot; raises
+    InsufficientSpace when the disk is too full for them.
+    """
+    func = _fallocate()
+    if func is None or size <= 0:
+        return False
+    import ctypes
+
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except OSError:
+        return False
+    try:
+        if func(fd, _FALLOC_FL_KEEP_SIZE, 0, size) == 0:
+            return True
+        error = ctypes.get_errno()
+    finally:
+        os.close(fd)
+    if error == errno.ENOSPC:
+        raise InsufficientSpace(os.path.dirname(path), size, shutil.disk_usage(path).free)
+    return False  # EOPNOTSUPP and friends: the file just grows as usual
+
+
+def trim(*paths):
+    """Free the blocks preallocated past the end of the first existing path.
+
+    Truncating to the current length drops them on Linux filesystems.
+    The file keeps its times: yt-dlp has set the mtime from Last-Modified
+    by now, and StreamHasher matches digests on it.
+    """
+    for path in paths:
+        try:
+            st = os.stat(path)
+            os.truncate(path, st.st_size)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            return
+        except OSError:
+            pass
+
+
+class DiskPreflight(PostProcessor):
+    """Reserves disk space for each download before yt-dlp starts it.
+
+    It runs once the format is chosen, estimates the download from the
+    filesize or filesize_approx of the selected formats (or their bitrate
+    and the duration), doubled for merges, and reserves it on disk_budget.
+    hook() counts the bytes written against the reservation and
+    preallocates each file to its expected size where the filesystem can,
+    so a full disk fails the download at its start rather than part-way.
+    What a file did not use is freed when it finishes or fails, and by
+    release() for downloads that were cancelled or interrupted. Audio
+    conversions on the transcode pool are not reserved.
+    """
+
+    # When sessions.YoutubeDLPool registers it in the chain
+    when = 'before_dl'
+
+    def __init__(self, budget=disk_budget):
+        super().__init__(None)
+        self.budget = budget
+        self._lock = threading.Lock()
+        # Video ID -> Reservation of its running download
+        self._reservations = {}
+        # Final name -> (video ID, temporary name, bytes preallocated or 0
+        # if it could not be) of each file hook() saw start, to trim
+        self._allocated = {}
+
+    @staticmethod
+    def estimate(info):
+        """Bytes the download of info needs on disk, or None if unknown."""
+        formats = info.get('requested_formats') or (info,)
+        size = Candidate(formats, info.get('duration')).bytes
+        if size is not None and len(formats) > 1:
+            size *= MERGE_FACTOR
+        return size
+
+    def run(self, info):
+        path = info.get('filepath') or info.get('_filename') or info.get('filename') or '.'
+        reservation = self.budget.reserve(os.path.dirname(os.path.abspath(path)),
+                                          self.estimate(info), self.to_screen)
+        with self._lock:
+            previous = self._reservations.pop(info.get('id'), None)
+            self._reservations[info.get('id')] = reservation
+        if previous is not None:
+            self.budget.release(previous)
+        return [], info
+
+    def release(self, video_id=None):
+        """Release the reservation of video_id, or every one without it,
+        and trim the files of those downloads that never finished."""
+        with self._lock:
+            if video_id is None:
+                reservations = list(self._reservations.values())
+                self._reservations.clear()
+            else:
+                reservations = [self._reservations.pop(video_id, None)]
+            unfinished = [(filename, entry) for filename, entry in self._allocated.items()
+                          if video_id is None or entry[0] == video_id]
+            for filename, _ in unfinished:
+                del self._allocated[filename]
+        for reservation in reservations:
+            if reservation is not None:
+                self.budget.release(reservation)
+        for filename, (_, tmpfilename, allocated) in unfinished:
+            if allocated:
+                trim(tmpfilename, filename)
+
+    def hook(self, d):
+        filename = d.get('filename')
+        status = d.get('status')
+        video_id = (d.get('info_dict') or {}).get('id')
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        with self._lock:
+            reservation = self._reservations.get(video_id)
+            allocate = (status == 'downloading' and total and d.get('tmpfilename')
+                        and filename not in self._allocated)
+            if allocate:
+                self._allocated[filename] = (video_id, d['tmpfilename'], 0)
+            ended = None
+            if status in ('finished', 'error'):
+                ended = self._allocated.pop(filename, None)
+        if allocate and preallocate(d['tmpfilename'], int(total)):
+            with self._lock:
+                self._allocated[filename] = (video_id, d['tmpfilename'], int(total))
+        if reservation is not None and d.get('downloaded_bytes') is not None:
+            # Preallocated blocks are already gone from the free space
+            allocated = self._allocated.get(filename, (None, None, 0))[2]
+            self.budget.update(reservation, filename, max(d['downloaded_bytes'], allocated))
+        if ended and ended[2]:
+            _, tmpfilename, _ = ended
+            # A failed download keeps its .part for resuming, but not the blocks
+            trim(filename if status == 'finished' else tmpfilename)
@@ -1,16 +1,37 @@
-from .youtube import YouTubeDownloader
-from .tiktok import TikTokDownloader
-from .instagram import InstagramDownloader
-from .facebook import FacebookDownloader
-from .twitter import TwitterDownloader
-
-
-def get_downloader(platform):
-    downloaders = {
-        'youtube': YouTubeDownloader,
-        'tiktok': TikTokDownloader,
-        'instagram': InstagramDownloader,
-        'facebook': FacebookDownloader,
-        'twitter': TwitterDownloader
-    }
-    return downloaders.get(platform)()
+import importlib
+from pathlib import Path
+
+# Platform -> (module, class). Modules (and yt-dlp with them) are only
+# imported when a downloader for that platform is first requested.
+DOWNLOADERS = {
+    'youtube': ('.youtube', 'YouTubeDownloader'),
+    'tiktok': ('.tiktok', 'TikTokDownloader'),
+    'instagram': ('.instagram', 'InstagramDownloader'),
+    'facebook': ('.facebook', 'FacebookDownloader'),
+    'twitter': ('.twitter', 'TwitterDownloader'),
+}
+
+PLATFORMS = tuple(DOWNLOADERS)
+
+
+def get_downloader_class(platform):
+    try:
+        module_name, class_name = DOWNLOADERS[platform]
+    except KeyError:
+        raise ValueError(f"Unsupported platform: {platform}") from None
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
+
+def get_downloader(platform, output_dir=None):
+    downloader = get_downloader_class(platform)()
+    if output_dir:
+        downloader.download_path = Path(output_dir) / platform
+    return downloader
+
+
+def __getattr__(name):
+    # Keep `from video_downloader.downloaders import YouTubeDownloader` working
+    for platform, (_, class_name) in DOWNLOADERS.items():
+        if class_name == name:
+            return get_downloader_class(platform)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
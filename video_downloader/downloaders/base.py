@@ -1,19 +1,52 @@
+import copy
 import yt_dlp
+from contextlib import contextmanager
 from pathlib import Path
 from rich.console import Console
+from rich.markup import escape
+
+from ..bandwidth import bandwidth_governor
+from ..cache import MetadataCache
+from ..contentstore import StreamHasher, open_content_store
+from ..diskspace import DiskPreflight
+from ..formats import budget_summary
+from ..metrics import metrics
+from ..index import DEFAULT_VARIANT, download_variant, open_index
+from ..profiles import profile_options
+from ..retry import RetryFailed, RetryPolicy, refreshes_media_url
+from ..router import route
+from ..transcode import DEFAULT_AUDIO_FORMAT, TranscodeHandoff, audio_selector, transcode_pool
+from .sessions import ydl_pool
 
 console = Console()
 
 class BaseDownloader:
     def __init__(self, platform_name):
         self.platform_name = platform_name
-        # Default to user's Downloads folder per platform
+        # Default to user's Downloads folder per platform; yt-dlp creates
+        # it on the first write, so nothing touches the disk here
         self.download_path = Path.home() / "Downloads" / platform_name
-        self.download_path.mkdir(parents=True, exist_ok=True)
+        # Raw info dicts by URL, so one extraction serves info, download and retries
+        self._info_by_url = {}
+        self.metadata_cache = MetadataCache()
+        # Re-download even if the download index already has the video
+        self.force = False
+        # Performance profile name (see profiles.py); None means defaults only
+        self.profile = None
+        self.retry_policy = RetryPolicy()
+        # Target of audio-only downloads, one of transcode.AUDIO_FORMATS
+        self.audio_format = DEFAULT_AUDIO_FORMAT
+        # formats.FormatBudget used instead of "best" when set
+        self.format_budget = None
+        # contentstore.LINK_MODES value to dedup finished files, or None
+        self.content_store = None
+        # Keep yt-dlp's messages and retry notices off the terminal, e.g.
+        # while a prompt owns it; the caller reports the result
+        self.quiet = False
 
     def get_platform_specific_options(self):
-        """Platform-specific yt-dlp tweaks"""
-        return {
+        """Platform-specific yt-dlp tweaks, with the performance profile merged in"""
+        opts = {
             'youtube': {},
             'tiktok': {
                 'extract_flat': False,
@@ -38,114 +71,314 @@ class BaseDownloader:
                 'extract_flat': False,
             }
         }.get(self.platform_name, {})
+        opts.update(profile_options(self.platform_name, self.profile))
+        return opts
     
-    def get_video_info(self, url):
-        """Get video information"""
+    def audio_options(self, ydl_opts):
+        """Set ydl_opts up for an audio-only download; returns its TranscodeHandoff.
+
+        The format prefers a stream that is already in self.audio_format,
+        and ffmpeg runs on the transcode pool while the next download starts.
+        """
+        ydl_opts['format'] = audio_selector(self.audio_format)
+        handoff = TranscodeHandoff(transcode_pool, self.audio_format)
+        ydl_opts['postprocessors'] = [handoff]
+        return handoff
+
+    def output_template(self):
+        """Single-video output template; the ID keeps same-title videos apart."""
+        return str(self.download_path / '%(title)s [%(id)s].%(ext)s')
+
+    def download_index(self):
+        """The download index shared by everything under the output root."""
+        return open_index(self.download_path.parent)
+
+    def stream_hasher(self, ydl_opts, handoff=None):
+        """Hash downloads of ydl_opts as they arrive if the content store is on.
+
+        Returns the StreamHasher for store_content(), or None. Audio
+        downloads (a handoff) are converted into new files, which
+        store_content() hashes once, so they get none.
+        """
+        if not self.content_store or handoff is not None:
+            return None
+        hasher = StreamHasher()
+        ydl_opts['progress_hooks'] = [*ydl_opts.get('progress_hooks', []), hasher]
+        ydl_opts['postprocessors'] = [*ydl_opts.get('postprocessors', []), hasher]
+        return hasher
+
+    def disk_preflight(self, ydl_opts):
+        """Reserve disk space for the downloads of ydl_opts and preallocate them.
+
+        Call it once the other post-processors are set. Returns the
+        DiskPreflight, whose release() the caller runs when done.
+        """
+        preflight = DiskPreflight()
+        ydl_opts['progress_hooks'] = [*ydl_opts.get('progress_hooks', []), preflight.hook]
+        ydl_opts['postprocessors'] = [*ydl_opts.get('postprocessors', []), preflight]
+        return preflight
+
+    def store_content(self, path, hasher=None):
+        """Put a finished file in the content store; returns result fields.
+
+        A file with the same bytes as an earlier download becomes a link
+        to it and the result gets 'duplicate_of'.
+        """
+        if not self.content_store or not Path(path).is_file():
+            return {}
+        store = open_content_store(self.download_path.parent, self.content_store)
         try:
+            stored = store.add(path, hasher.digest(path) if hasher else None)
+        except OSError as e:
+            console.print(f"[yellow]Could not add to the content store: {escape(str(e))}[/yellow]")
+            return {}
+        fields = {'digest': stored['digest']}
+        if stored['duplicate']:
+            others = [p for p in store.paths(stored['digest']) if p != str(path)]
+            fields['duplicate_of'] = others[0] if others else None
+            fields['saved'] = stored['saved']
+        return fields
+
+    def download_variant(self, quality='best', audio_only=False):
+        """Index variant of a download with these options (see index.download_variant)."""
+        return download_variant(quality, audio_only, self.audio_format, self.format_budget)
+
+    def find_downloaded(self, url, info=None, quality='best', audio_only=False):
+        """Return the index record if url was already downloaded, else None.
+
+        Only a download of the same variant counts: an earlier video
+        download does not satisfy an audio-only request. Without info the
+        video ID comes from the URL alone, so this costs no network request.
+        """
+        if self.force:
+            return None
+        if info is not None:
+            key = (info.get('extractor_key') or '', info.get('id'))
+        else:
+            found = route(url)
+            key = found.key if found else None
+        if not key or not key[0] or not key[1]:
+            return None
+        return self.download_index().lookup(*key, self.download_variant(quality, audio_only))
+
+    def _download_result(self, ydl, info, default_title='Unknown', handoff=None, hasher=None,
+                         variant=DEFAULT_VARIANT):
+        """Build the success result for a finished download and index it as variant.
+
+        If handoff queued an audio conversion of the file, the result
+        carries its Future as 'transcode' (see transcode.finish) and the
+        converted file is indexed once ffmpeg is done. Finished files go
+        to the content store, if it is on.
+        """
+        downloads = info.get('requested_downloads') or [{}]
+        filename = downloads[0].get('filepath') or ydl.prepare_filename(info)
+        result = {
+            'success': True,
+            'title': info.get('title', default_title),
+            'filename': filename,
+            'platform': self.platform_name
+        }
+        future = handoff.futures.get(filename) if handoff else None
+        if future is not None:
+            result['transcode'] = future
+            future.add_done_callback(lambda f: self._record_converted(info, f, variant))
+            return result
+        result.update(self.store_content(filename, hasher))
+        if info.get('extractor_key') and info.get('id'):
+            self.download_index().record(info['extractor_key'], info['id'], filename, variant)
+        return result
+
+    def _record_converted(self, info, future, variant):
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.store_content(future.result())
+        if info.get('extractor_key') and info.get('id'):
+            self.download_index().record(info['extractor_key'], info['id'], future.result(),
+                                         variant)
+
+    def _skipped_result(self, record):
+        return {
+            'success': True,
+            'skipped': True,
+            'title': Path(record['path']).stem,
+            'filename': record['path'],
+            'platform': self.platform_name
+        }
+
+    @contextmanager
+    def ydl_session(self, ydl_opts):
+        """Borrow a pooled YoutubeDL handle configured with ydl_opts.
+
+        Sessions that write files (those with an output template) get a
+        share of the global bandwidth budget while they run, and report
+        transfer and post-processing times to the current metrics job.
+        """
+        with ydl_pool.session(self.platform_name, ydl_opts) as ydl:
+            if 'outtmpl' not in ydl_opts:
+                yield ydl
+                return
+            with bandwidth_governor.job(self.platform_name, ydl), metrics.attach(ydl):
+                yield ydl
+
+    def extract_info(self, url, refresh=False):
+        """Return the raw info dict for url, extracting at most once.
+
+        Looks in memory, then in the on-disk metadata cache, and only then
+        asks yt-dlp; refresh=True skips both. Raises on extraction errors.
+        """
+        info = None if refresh else self._info_by_url.get(url)
+        if info is None and self.metadata_cache and not refresh:
+            info = self.metadata_cache.get(url)
+        if info is None:
             ydl_opts = {'quiet': True}
             ydl_opts.update(self.get_platform_specific_options())
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                return {
-                    'title': info.get('title', 'Unknown'),
-                    'duration': info.get('duration', 0),
-                    'uploader': info.get('uploader', 'Unknown'),
-                    'view_count': info.get('view_count', 0),
-                    'thumbnail': info.get('thumbnail', '')
-                }
+            with metrics.phase('extract', self.platform_name), self.ydl_session(ydl_opts) as ydl:
+                info = self._sanitize_info(ydl.extract_info(url, download=False))
+            if self.metadata_cache:
+                self.metadata_cache.put(url, info)
+        self._info_by_url[url] = info
+        return info
+
+    def forget_info(self, url):
+        """Drop url's extraction from memory; the on-disk cache keeps it."""
+        self._info_by_url.pop(url, None)
+
+    @staticmethod
+    def _sanitize_info(info):
+        """Make an extracted info dict JSON-safe and ready to re-process.
+
+        Per-run keys such as requested_formats are dropped so the download
+        stage selects formats afresh, as with yt-dlp's --load-info-json.
+        """
+        entries = info.get('entries')
+        info = yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True)
+        if entries is not None:
+            # Multi-video posts: keep the entries that sanitizing strips
+            info['entries'] = [yt_dlp.YoutubeDL.sanitize_info(e, remove_private_keys=True)
+                               for e in entries if e]
+        return info
+
+    def _process_info(self, ydl, url, info=None):
+        """Run yt-dlp's download stage, reusing info from a prior extraction."""
+        if info is None:
+            info = self.extract_info(url)
+        # process_ie_result mutates its argument; keep the original for retries
+        return ydl.process_ie_result(copy.deepcopy(info), download=True)
+
+    def get_video_info(self, url):
+        """Get video information"""
+        try:
+            info = self.extract_info(url)
+            return {
+                'title': info.get('title', 'Unknown'),
+                'duration': info.get('duration', 0),
+                'uploader': info.get('uploader', 'Unknown'),
+                'view_count': info.get('view_count', 0),
+                'thumbnail': info.get('thumbnail', '')
+            }
         except Exception as e:
             console.print(f"[red]Error getting video info: {e}[/red]")
             return None
     
-    def download(self, url, quality='best', audio_only=False, progress_hook=None):
-        """Download video/audio"""
+    def download(self, url, quality='best', audio_only=False, progress_hook=None, info=None):
+        """Download video/audio, retrying failures per self.retry_policy.
+
+        The result records the number of attempts; failed results also
+        carry the error class from retry.classify_error. Audio downloads
+        return before their conversion is done: pass the result to
+        transcode.finish() or transcode.when_finished().
+        """
+        with metrics.job(self.platform_name, url):
+            result = self._download(url, quality, audio_only, progress_hook, info)
+            metrics.set_result(result)
+            return result
+
+    def _download(self, url, quality, audio_only, progress_hook, info):
+        existing = self.find_downloaded(url, info, quality, audio_only)
+        if existing:
+            return self._skipped_result(existing)
+
         ydl_opts = {
-            'outtmpl': str(self.download_path / '%(title)s.%(ext)s'),
-            'quiet': False,
+            'outtmpl': self.output_template(),
+            'quiet': self.quiet,
         }
+        if self.force:
+            ydl_opts['overwrites'] = True
 
         # Add platform specific options
         ydl_opts.update(self.get_platform_specific_options())
         
         if progress_hook:
             ydl_opts['progress_hooks'] = [progress_hook]
+            # The caller renders progress; yt-dlp's own lines would duplicate it
+            ydl_opts['noprogress'] = True
         
+        handoff = None
         if audio_only:
-            ydl_opts['format'] = 'bestaudio/best'
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }]
+            handoff = self.audio_options(ydl_opts)
         elif quality != 'best':
             ydl_opts['format'] = quality
+        elif self.format_budget:
+            ydl_opts['format'] = self.format_budget
         else:
             # Platform specific default format selectors
             if self.platform_name == 'tiktok' and 'format' not in ydl_opts:
                 ydl_opts['format'] = 'best[ext=mp4]/best'
-        
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                return {
-                    'success': True,
-                    'title': info.get('title', 'Unknown'),
-                    'filename': ydl.prepare_filename(info),
-                    'platform': self.platform_name
-                }
-        except Exception as e:
-            console.print(f"[red]Download failed: {e}[/red]")
+        hasher = self.stream_hasher(ydl_opts, handoff)
+        preflight = self.disk_preflight(ydl_opts)
 
-            if self.platform_name == 'tiktok':
-                return self._retry_tiktok_download(url, audio_only, progress_hook)
+        def attempt(number):
+            nonlocal info
+            if info is None:
+                # After a refused media URL the cached formats are stale
+                info = self.extract_info(url, refresh=number > 1)
+                # Short links only reveal their ID after extraction
+                existing = self.find_downloaded(url, info, quality, audio_only)
+                if existing:
+                    return self._skipped_result(existing)
+            with self.ydl_session(ydl_opts) as ydl:
+                try:
+                    processed = self._process_info(ydl, url, info)
+                except Exception as e:
+                    if refreshes_media_url(e):
+                        info = None
+                    raise
+                result = self._download_result(ydl, processed, handoff=handoff, hasher=hasher,
+                                               variant=self.download_variant(quality, audio_only))
+                if self.format_budget and ydl_opts.get('format') is self.format_budget:
+                    result['format'] = budget_summary(processed)
+                return result
 
-            return {'success': False, 'error': str(e)}
-
-    def _retry_tiktok_download(self, url, audio_only=False, progress_hook=None):
-        """Fallback attempt for TikTok downloads with alternate options."""
-        console.print("[yellow]Retrying TikTok download with different options...[/yellow]")
-
-        ydl_opts = {
-            'outtmpl': str(self.download_path / '%(title)s.%(ext)s'),
-            'quiet': False,
-            'format': 'best[ext=mp4]',
-            'extract_flat': False,
-        }
+        try:
+            return self._with_retries(attempt)
+        finally:
+            preflight.release()
 
-        if progress_hook:
-            ydl_opts['progress_hooks'] = [progress_hook]
-
-        if audio_only:
-            ydl_opts['format'] = 'bestaudio/best'
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }]
+    def _with_retries(self, attempt):
+        """Run attempt(number) under the retry policy, returning a result dict."""
+        def on_retry(number, kind, delay, error):
+            metrics.add_phase('retry_wait', delay)
+            if self.quiet:
+                return
+            console.print(
+                f"[yellow]Attempt {number}/{self.retry_policy.max_attempts} failed "
+                f"({kind.replace('_', ' ')}), retrying in {delay:.0f}s: {escape(str(error))}[/yellow]")
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                return {
-                    'success': True,
-                    'title': info.get('title', 'TikTok Video'),
-                    'filename': ydl.prepare_filename(info),
-                    'platform': 'tiktok'
-                }
-        except Exception as e:
-            console.print(f"[red]TikTok retry also failed: {e}[/red]")
-            return {'success': False, 'error': str(e)}
-    
+            result, attempts = self.retry_policy.run(attempt, on_retry)
+        except RetryFailed as e:
+            if not self.quiet:
+                console.print(f"[red]Download failed: {escape(str(e))}[/red]")
+            return {'success': False, 'error': str(e), 'error_kind': e.kind,
+                    'attempts': e.attempts}
+        result['attempts'] = attempts
+        return result
+
     def get_available_formats(self, url):
         """Get available formats for the video"""
         try:
-            ydl_opts = {'quiet': True}
-            ydl_opts.update(self.get_platform_specific_options())
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                return info.get('formats', [])
+            return self.extract_info(url).get('formats', [])
         except Exception as e:
             console.print(f"[red]Error getting formats: {e}[/red]")
             return []
@@ -0,0 +1,146 @@
+import atexit
+import json
+import threading
+from contextlib import contextmanager
+
+import yt_dlp
+from yt_dlp.postprocessor import get_postprocessor
+from yt_dlp.postprocessor.common import PostProcessor
+
+# Options that change from job to job. Everything else (cookies, headers,
+# impersonation, network tuning) identifies the long-lived handle.
+JOB_OPTIONS = (
+    'outtmpl', 'format', 'progress_hooks', 'postprocessor_hooks', 'postprocessors',
+    'download_archive', 'overwrites', 'continuedl', 'noplaylist', 'noprogress',
+    'playlist_items', 'playliststart', 'playlistend',
+)
+
+
+class YoutubeDLPool:
+    """Pool of long-lived YoutubeDL handles keyed by platform and options.
+
+    Building a YoutubeDL loads extractors and cookies and sets up an HTTP
+    session, so handles are kept and reused. A handle is only used by one
+    thread at a time; per-job options are applied on checkout and rolled
+    back on return.
+    """
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    @contextmanager
+    def session(self, platform, ydl_opts):
+        """Yield a YoutubeDL configured with ydl_opts for one job."""
+        base = {k: v for k, v in ydl_opts.items() if k not in JOB_OPTIONS}
+        job = {k: v for k, v in ydl_opts.items() if k in JOB_OPTIONS}
+        key = (platform, json.dumps(base, sort_keys=True, default=repr))
+
+        ydl = self._checkout(key, base)
+        saved = _apply_job_options(ydl, job)
+        try:
+            yield ydl
+        except BaseException:
+            # A handle that died mid-job may hold a broken connection
+            _restore(ydl, saved)
+            ydl.close()
+            raise
+        else:
+            _restore(ydl, saved)
+            self._checkin(key, ydl)
+
+    def _checkout(self, key, base):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        return yt_dlp.YoutubeDL(dict(base))
+
+    def _checkin(self, key, ydl):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(ydl)
+                return
+        ydl.close()
+
+    def close(self):
+        """Close every idle handle (saves cookies, drops connections)."""
+        with self._lock:
+            handles = [ydl for idle in self._idle.values() for ydl in idle]
+            self._idle.clear()
+        for ydl in handles:
+            ydl.close()
+
+
+def _apply_job_options(ydl, job):
+    """Apply per-job options in place, returning state for _restore."""
+    saved = {
+        'params': dict(ydl.params),
+        'outtmpl': dict(ydl.params.get('outtmpl') or {}),
+        'format_selector': ydl.format_selector,
+        'progress_hooks': list(ydl._progress_hooks),
+        'postprocessor_hooks': list(ydl._postprocessor_hooks),
+        'pps': {when: list(pps) for when, pps in ydl._pps.items()},
+        'archive': ydl.archive,
+    }
+
+    ydl.params.update(job)
+    ydl._download_retcode = 0
+
+    if 'outtmpl' in job:
+        ydl.params['outtmpl'] = {'default': job['outtmpl']}
+        ydl._parse_outtmpl()
+
+    if 'format' in job:
+        fmt = job['format']
+        ydl.format_selector = (
+            fmt if fmt in (None, '-') or callable(fmt) else ydl.build_format_selector(fmt))
+
+    for hook in job.get('progress_hooks') or []:
+        ydl.add_progress_hook(hook)
+    for hook in job.get('postprocessor_hooks') or []:
+        ydl.add_postprocessor_hook(hook)
+
+    for pp_def in job.get('postprocessors') or []:
+        if isinstance(pp_def, PostProcessor):
+            ydl.add_post_processor(pp_def, when=getattr(pp_def, 'when', 'post_process'))
+            continue
+        pp_def = dict(pp_def)
+        when = pp_def.pop('when', 'post_process')
+        ydl.add_post_processor(get_postprocessor(pp_def.pop('key'))(ydl, **pp_def), when=when)
+
+    if 'download_archive' in job:
+        ydl.archive = _read_archive(job['download_archive'])
+
+    return saved
+
+
+def _restore(ydl, saved):
+    ydl.params.clear()
+    ydl.params.update(saved['params'])
+    ydl.params['outtmpl'] = saved['outtmpl']
+    ydl.format_selector = saved['format_selector']
+    ydl._progress_hooks[:] = saved['progress_hooks']
+    ydl._postprocessor_hooks[:] = saved['postprocessor_hooks']
+    for when, pps in saved['pps'].items():
+        ydl._pps[when][:] = pps
+    ydl.archive = saved['archive']
+
+
+def _read_archive(path):
+    archive = set()
+    if path is None:
+        return archive
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                archive.add(line.strip())
+    except FileNotFoundError:
+        pass
+    return archive
+
+
+ydl_pool = YoutubeDLPool()
+atexit.register(ydl_pool.close)
@@ -1,29 +1,58 @@
 # video_downloader/downloaders/youtube.py
 from pathlib import Path
-import yt_dlp
+
+from yt_dlp.utils import PlaylistEntries
 
 from .base import BaseDownloader
+from ..diskspace import disk_budget
+from ..jobstore import FINAL_STATES, QUEUED, RUNNING, open_job_store
+from ..metrics import metrics
+from ..retry import RetryFailed
+from ..sync import archive_key, read_download_archive
+from ..transcode import conversion_failures
 from ..utils import sanitize_filename, create_progress_bar
+from ..workers import WorkerPool
 
 
 class YouTubeDownloader(BaseDownloader):
     def __init__(self):
         super().__init__("youtube")
 
-    def get_playlist_info(self, url, playlist_items=None, playlist_start=None, playlist_end=None):
-        """Fetch playlist metadata without downloading."""
+    def get_playlist_info(self, url, playlist_items=None, playlist_start=None, playlist_end=None,
+                          stop=None):
+        """Fetch playlist metadata without downloading.
+
+        Entries are listed lazily, so paged feeds are fetched one page at
+        a time. stop(entry), if given, sees every listed entry and ends the
+        listing after the first one it returns True for; 'complete' tells
+        whether the listing ran to the end.
+        """
         ydl_opts = {
             'quiet': True,
             'extract_flat': True,
             'skip_download': True,
+            'lazy_playlist': True,
             'playlist_items': playlist_items,
             'playliststart': playlist_start,
             'playlistend': playlist_end,
         }
         try:
-            with yt_dlp.YoutubeDL({k: v for k, v in ydl_opts.items() if v is not None}) as ydl:
-                info = ydl.extract_info(url, download=False)
-                entries = [e for e in info.get('entries', []) if e]
+            with self.ydl_session({k: v for k, v in ydl_opts.items() if v is not None}) as ydl:
+                # Unprocessed, the extractor's entries stay a lazy page iterator
+                info = ydl.extract_info(url, download=False, process=False)
+                while info.get('_type') in ('url', 'url_transparent'):
+                    info = ydl.extract_info(info['url'], download=False, process=False,
+                                            ie_key=info.get('ie_key'))
+                entries = []
+                complete = True
+                for index, entry in PlaylistEntries(ydl, info).get_requested_items():
+                    if not entry:
+                        continue
+                    entry.setdefault('playlist_index', index)
+                    entries.append(entry)
+                    if stop and stop(entry):
+                        complete = False
+                        break
                 return {
                     'title': info.get('title', 'YouTube Playlist'),
                     'uploader': info.get('uploader', 'Unknown'),
@@ -32,23 +61,33 @@ class YouTubeDownloader(BaseDownloader):
                     'description': info.get('description', '') or '',
                     'entries': entries,
                     'count': len(entries),
+                    'complete': complete,
                 }
         except Exception as e:
             return None
 
+    def playlist_dir(self, info, output_dir=None):
+        """Directory the playlist described by info is downloaded into."""
+        if output_dir:
+            self.download_path = Path(output_dir) / self.platform_name
+        return self.download_path / sanitize_filename(info['title'] or 'playlist')
+
     def download_playlist(self, url, quality='best', audio_only=False, output_dir=None,
-                          playlist_items=None, playlist_start=None, playlist_end=None):
-        """Download a YouTube playlist sequentially with progress."""
-        info = self.get_playlist_info(url, playlist_items, playlist_start, playlist_end)
+                          playlist_items=None, playlist_start=None, playlist_end=None, jobs=1,
+                          info=None):
+        """Download a YouTube playlist with progress.
+
+        The flat entries go through the persistent job store (see
+        _download_playlist_items): one after another unless jobs > 1, in
+        which case they are downloaded concurrently on a worker pool.
+        Pass info from get_playlist_info() to skip listing it again.
+        """
+        if info is None:
+            info = self.get_playlist_info(url, playlist_items, playlist_start, playlist_end)
         if not info:
             return {'success': False, 'error': 'Could not fetch playlist info'}
 
-        # Choose destination directory
-        if output_dir:
-            self.download_path = Path(output_dir) / self.platform_name
-            self.download_path.mkdir(parents=True, exist_ok=True)
-
-        playlist_dir = self.download_path / sanitize_filename(info['title'] or 'playlist')
+        playlist_dir = self.playlist_dir(info, output_dir)
         playlist_dir.mkdir(parents=True, exist_ok=True)
 
         ydl_opts = {
@@ -61,6 +100,7 @@ class YouTubeDownloader(BaseDownloader):
             'continuedl': True,
             'download_archive': str(playlist_dir / '.download_archive'),
         }
+        ydl_opts.update(self.get_platform_specific_options())
 
         if playlist_items is not None:
             ydl_opts['playlist_items'] = playlist_items
@@ -69,32 +109,171 @@ class YouTubeDownloader(BaseDownloader):
         if playlist_end is not None:
             ydl_opts['playlistend'] = playlist_end
 
+        handoff = None
         if audio_only:
-            ydl_opts['format'] = 'bestaudio/best'
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }]
+            # Items keep downloading while earlier ones are converted
+            handoff = self.audio_options(ydl_opts)
         elif quality != 'best':
             ydl_opts['format'] = quality
+        elif self.format_budget:
+            ydl_opts['format'] = self.format_budget
+        hasher = self.stream_hasher(ydl_opts, handoff)
+        preflight = self.disk_preflight(ydl_opts)
 
-        total_videos = info['count'] or 0
         progress = create_progress_bar()
-        overall_task = progress.add_task(f"Playlist: {info['title']}", total=total_videos or 1)
+        overall_task = progress.add_task(f"Playlist: {info['title']}", total=info['count'] or 1)
+        try:
+            with progress:
+                result = self._download_playlist_items(
+                    info, ydl_opts, playlist_dir, jobs or 1, progress, overall_task, handoff,
+                    hasher, preflight)
+        finally:
+            preflight.release()
+        return self._check_conversions(result, handoff)
 
-        def progress_hook(d):
-            if d['status'] == 'finished':
-                progress.advance(overall_task, 1)
-            elif d.get('status') == 'skipped':
+    def _check_conversions(self, result, handoff):
+        """Wait for the playlist's audio conversions; fail result if any did."""
+        if handoff is None or not handoff.futures:
+            return result
+        failures = conversion_failures(handoff.futures)
+        if failures and result.get('success'):
+            path, error = failures[0]
+            result = {**result, 'success': False,
+                      'error': f"{len(failures)} of {len(handoff.futures)} audio conversions "
+                               f"failed (first: {Path(path).name}: {error})"}
+        return result
+
+    def _download_playlist_items(self, info, ydl_opts, playlist_dir, jobs, progress,
+                                 overall_task, handoff=None, hasher=None, preflight=None):
+        """Queue the flat playlist entries in the job store and download them.
+
+        The queue is named after playlist_dir, so a run that was killed
+        part-way leaves its unfinished items to the next run of the same
+        playlist. Items already in the download archive are not queued.
+        With jobs > 1 items run concurrently, one YoutubeDL per item.
+        """
+        store = open_job_store()
+        queue = f"playlist:{playlist_dir}"
+        store.recover(queue)
+        store.clear(queue, FINAL_STATES)
+
+        archive = read_download_archive(ydl_opts['download_archive'])
+        pending = {job['ref'] for job in store.jobs(queue, (QUEUED, RUNNING))}
+        items = []
+        for entry in info['entries']:
+            if archive_key(entry) in archive:
                 progress.advance(overall_task, 1)
+            elif entry.get('playlist_index') not in pending:
+                items.append({'url': self._entry_url(entry), 'platform': self.platform_name,
+                              'ref': entry.get('playlist_index'),
+                              'options': {'entry': self._sanitize_info(entry)}})
+        store.enqueue_many(queue, items)
+
+        item_opts = {k: v for k, v in ydl_opts.items()
+                     if k not in ('playlist_items', 'playliststart', 'playlistend')}
+        item_opts['noplaylist'] = True
+        item_opts['progress_hooks'] = [hook for hook in (hasher, preflight and preflight.hook)
+                                       if hook]
+
+        failures = []
+        total = 0
+
+        def done(job, error):
+            if error:
+                failures.append((job['ref'], error))
+            store.finish(job['id'], {'success': error is None, 'error': error})
+            progress.advance(overall_task, 1)
 
-        ydl_opts['progress_hooks'].append(progress_hook)
+        def done_future(job, future):
+            if future.cancelled():
+                store.release(job['id'])
+            else:
+                done(job, future.result())
 
+        pool = WorkerPool(jobs, limits={self.platform_name: jobs},
+                          max_pending=jobs * 2) if jobs > 1 else None
         try:
-            with progress:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-            return {'success': True, 'download_dir': str(playlist_dir), 'count': total_videos}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+            while True:
+                job = store.claim(queue)
+                if job is None:
+                    break
+                total += 1
+                entry = job['options']['entry']
+                if pool is None:
+                    done(job, self._download_playlist_item(entry, item_opts, info, handoff,
+                                                           hasher, preflight))
+                    continue
+                future = pool.submit(self.platform_name, self._download_playlist_item,
+                                     entry, item_opts, info, handoff, hasher, preflight)
+                future.add_done_callback(lambda f, job=job: done_future(job, f))
+        except BaseException:
+            # Unstarted and interrupted items stay queued for the next run
+            disk_budget.interrupt()
+            if pool:
+                pool.shutdown(wait=True, cancel_pending=True)
+                pool = None
+            store.release()
+            raise
+        finally:
+            if pool:
+                pool.shutdown(wait=True)
+
+        if failures:
+            failures.sort(key=lambda f: f[0] or 0)
+            index, error = failures[0]
+            return {
+                'success': False,
+                'error': f"{len(failures)} of {total} items failed (first: #{index}: {error})",
+                'download_dir': str(playlist_dir),
+                'count': info['count'],
+            }
+        return {'success': True, 'download_dir': str(playlist_dir), 'count': info['count']}
+
+    def _store_playlist_item(self, info, handoff, hasher):
+        """Put a downloaded item, or its audio conversion once done, in the content store."""
+        downloads = (info or {}).get('requested_downloads') or [{}]
+        filename = downloads[0].get('filepath')
+        if not self.content_store or not filename:
+            return
+        future = handoff.futures.get(filename) if handoff else None
+        if future is None:
+            self.store_content(filename, hasher)
+        else:
+            future.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or self.store_content(f.result()))
+
+    @staticmethod
+    def _entry_url(entry):
+        return entry.get('url') or entry.get('webpage_url') or entry.get('id')
+
+    def _download_playlist_item(self, entry, item_opts, info, handoff=None, hasher=None,
+                                preflight=None):
+        """Download one flat playlist entry. Returns an error string or None."""
+        url = self._entry_url(entry)
+        # Passing the playlist fields as extra_info keeps the
+        # %(playlist_index)03d_ naming identical to the sequential path.
+        extra_info = {
+            'playlist_index': entry.get('playlist_index'),
+            'playlist': info['title'],
+            'playlist_title': info['title'],
+            'playlist_id': info['id'],
+            'playlist_count': info['count'],
+        }
+
+        def attempt(number):
+            with self.ydl_session(item_opts) as ydl:
+                return ydl.extract_info(url, download=True, extra_info=extra_info)
+
+        with metrics.job(self.platform_name, url):
+            try:
+                processed, attempts = self.retry_policy.run(attempt)
+                metrics.set_result({'success': True, 'attempts': attempts})
+                self._store_playlist_item(processed, handoff, hasher)
+                return None
+            except RetryFailed as e:
+                metrics.set_result({'success': False, 'error_kind': e.kind,
+                                    'attempts': e.attempts})
+                return str(e)
+            finally:
+                if preflight:
+                    preflight.release(entry.get('id'))
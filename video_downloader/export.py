@@ -0,0 +1,183 @@
+import json
+import threading
+
+from .formats import estimate_bytes
+
+# Fields of an exported record, in file order. Failed URLs keep url,
+# platform and index and fill in error and error_kind instead.
+FIELDS = (
+    'index', 'url', 'platform', 'extractor', 'id', 'title', 'duration', 'uploader',
+    'uploader_id', 'channel_id', 'upload_date', 'view_count', 'like_count', 'comment_count',
+    'webpage_url', 'formats', 'error', 'error_kind',
+)
+FORMAT_FIELDS = ('format_id', 'ext', 'width', 'height', 'fps', 'vcodec', 'acodec', 'tbr',
+                 'filesize')
+
+_INTS = ('view_count', 'like_count', 'comment_count')
+_FORMAT_INTS = ('width', 'height', 'filesize')
+_FORMAT_FLOATS = ('fps', 'tbr')
+
+# Records held before they are written out as one Parquet row group
+ROW_GROUP_SIZE = 10_000
+
+
+class ExportError(Exception):
+    """A metadata export file could not be written."""
+
+
+def _int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+def _format_record(fmt, duration):
+    record = {name: _str(fmt.get(name)) for name in ('format_id', 'ext', 'vcodec', 'acodec')}
+    record.update({name: _int(fmt.get(name)) for name in ('width', 'height')})
+    record.update({name: _float(fmt.get(name)) for name in _FORMAT_FLOATS})
+    record['filesize'] = _int(estimate_bytes(fmt, duration))
+    return {name: record[name] for name in FORMAT_FIELDS}
+
+
+def metadata_record(index, url, platform, info):
+    """Compact record of an extracted info dict, with one typed value per FIELDS.
+
+    Formats keep what choosing one needs; filesize is yt-dlp's, or else
+    estimated from the bitrate and the duration.
+    """
+    duration = _float(info.get('duration'))
+    record = dict.fromkeys(FIELDS)
+    record.update({
+        'index': index,
+        'url': url,
+        'platform': platform,
+        'extractor': _str(info.get('extractor_key') or info.get('extractor')),
+        'duration': duration,
+        'formats': [_format_record(f, duration) for f in info.get('formats') or []],
+    })
+    for name in ('id', 'title', 'uploader', 'uploader_id', 'channel_id', 'upload_date',
+                 'webpage_url'):
+        record[name] = _str(info.get(name))
+    for name in _INTS:
+        record[name] = _int(info.get(name))
+    return record
+
+
+def error_record(index, url, platform, error, kind=None):
+    record = dict.fromkeys(FIELDS)
+    record.update({'index': index, 'url': url, 'platform': platform, 'formats': [],
+                   'error': str(error), 'error_kind': kind})
+    return record
+
+
+class JsonLinesWriter:
+    """Writes one compact JSON object per line."""
+
+    def __init__(self, path):
+        try:
+            self._file = open(path, 'w', encoding='utf-8')
+        except OSError as e:
+            raise ExportError(f"Could not open {path}: {e}") from None
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+def _parquet_schema(pa):
+    string, integer, real = pa.string(), pa.int64(), pa.float64()
+    fmt = pa.struct([(name, integer if name in _FORMAT_INTS else
+                      real if name in _FORMAT_FLOATS else string) for name in FORMAT_FIELDS])
+    types = {'index': integer, 'duration': real, 'formats': pa.list_(fmt),
+             **dict.fromkeys(_INTS, integer)}
+    return pa.schema([(name, types.get(name, string)) for name in FIELDS])
+
+
+class ParquetWriter:
+    """Writes records to a Parquet file, ROW_GROUP_SIZE rows at a time.
+
+    Needs the optional pyarrow package.
+    """
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ExportError("Writing Parquet needs the 'pyarrow' package") from None
+        self._pa = pa
+        self._schema = _parquet_schema(pa)
+        self.row_group_size = row_group_size
+        self._rows = []
+        try:
+            self._writer = pq.ParquetWriter(str(path), self._schema, compression='zstd')
+        except (OSError, pa.ArrowException) as e:
+            raise ExportError(f"Could not open {path}: {e}") from None
+
+    def write(self, record):
+        self._rows.append(record)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+class MetadataExport:
+    """Thread-safe sink that streams records to every open writer.
+
+    Records arrive from the extraction workers in completion order; each
+    keeps the index of its batch line or playlist entry.
+    """
+
+    def __init__(self, path, parquet_path=None):
+        self.writers = [JsonLinesWriter(path)]
+        if parquet_path:
+            try:
+                self.writers.append(ParquetWriter(parquet_path))
+            except ExportError:
+                self.writers[0].close()
+                raise
+        self.written = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        with self._lock:
+            for writer in self.writers:
+                writer.write(record)
+            self.written += 1
+            if record['error'] is not None:
+                self.failed += 1
+
+    def close(self):
+        with self._lock:
+            for writer in self.writers:
+                writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,243 @@
+import math
+import re
+
+# --prefer-codec names and the vcodec prefixes yt-dlp reports for them
+VIDEO_CODECS = {
+    'av1': ('av01',),
+    'vp9': ('vp9', 'vp09'),
+    'h265': ('hev1', 'hvc1', 'h265'),
+    'h264': ('avc1', 'h264'),
+}
+
+# Multipliers from bits/s with a suffix to kbit/s, yt-dlp's tbr unit
+_BITRATE_UNITS = {'': 1 / 1000, 'K': 1, 'M': 1000, 'G': 1000 * 1000}
+
+
+class FormatError(ValueError):
+    """A format budget option could not be parsed."""
+
+
+def parse_bitrate(value):
+    """Parse "2500000", "2500k" or "2.5M" (bits/s) into kbit/s, yt-dlp's tbr unit."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:bps|b)?\s*', str(value), re.IGNORECASE)
+    if not match:
+        raise FormatError(f"Invalid bitrate: {value!r}")
+    return float(match.group(1)) * _BITRATE_UNITS[match.group(2).upper()]
+
+
+def parse_codecs(value):
+    """Parse "av1,vp9" into a tuple of VIDEO_CODECS names, most preferred first."""
+    codecs = tuple(name.strip().lower() for name in str(value).split(',') if name.strip())
+    unknown = [name for name in codecs if name not in VIDEO_CODECS]
+    if unknown:
+        raise FormatError(f"Unknown codec {unknown[0]!r} (choose from "
+                          f"{', '.join(VIDEO_CODECS)})")
+    return codecs
+
+
+def has_video(fmt):
+    return fmt.get('vcodec') != 'none'
+
+
+def has_audio(fmt):
+    return fmt.get('acodec') != 'none'
+
+
+def estimate_bytes(fmt, duration=None):
+    """Size of one format: reported, or else from its bitrate and the duration."""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return int(size)
+    tbr = fmt.get('tbr') or (fmt.get('vbr') or 0) + (fmt.get('abr') or 0)
+    if tbr and duration:
+        return int(tbr * 125 * duration)  # kbit/s -> bytes
+    return None
+
+
+class Candidate:
+    """A single format, or a video-only format paired with an audio-only one."""
+
+    __slots__ = ('formats', 'height', 'bytes', 'tbr', 'vcodec')
+
+    def __init__(self, formats, duration=None):
+        self.formats = formats
+        video = next((f for f in formats if has_video(f)), {})
+        self.height = video.get('height')
+        self.vcodec = (video.get('vcodec') or '').lower()
+        sizes = [estimate_bytes(f, duration) for f in formats]
+        self.bytes = None if None in sizes else sum(sizes)
+        rates = [f.get('tbr') or f.get('vbr') or f.get('abr') for f in formats]
+        self.tbr = None if None in rates else sum(rates)
+
+    @property
+    def format_id(self):
+        return '+'.join(str(f.get('format_id')) for f in self.formats)
+
+    def codec_name(self):
+        for name, prefixes in VIDEO_CODECS.items():
+            if self.vcodec.startswith(prefixes):
+                return name
+        return None
+
+    def to_format(self):
+        """The format dict yt-dlp downloads, merging a pair like its own selector."""
+        if len(self.formats) == 1:
+            return self.formats[0]
+        from yt_dlp.utils import determine_protocol, get_compatible_ext
+
+        video, audio = self.formats
+        return {
+            'requested_formats': list(self.formats),
+            'format': '+'.join(str(f.get('format') or f.get('format_id')) for f in self.formats),
+            'format_id': self.format_id,
+            'ext': get_compatible_ext(vcodecs=[video.get('vcodec')], acodecs=[audio.get('acodec')],
+                                      vexts=[video['ext']], aexts=[audio['ext']]),
+            'protocol': '+'.join(determine_protocol(f) for f in self.formats),
+            'filesize_approx': self.bytes,
+            'tbr': self.tbr,
+            'width': video.get('width'),
+            'height': video.get('height'),
+            'fps': video.get('fps'),
+            'dynamic_range': video.get('dynamic_range'),
+            'vcodec': video.get('vcodec'),
+            'vbr': video.get('vbr'),
+            'acodec': audio.get('acodec'),
+            'abr': audio.get('abr'),
+            'asr': audio.get('asr'),
+            'audio_channels': audio.get('audio_channels'),
+        }
+
+
+def _audio_rank(fmt):
+    return fmt.get('abr') or fmt.get('tbr') or 0
+
+
+def candidates(formats, duration=None, audio=None):
+    """Every downloadable Candidate: formats with both streams, and each
+    video-only format paired with audio (default: the best audio-only one)."""
+    result = [Candidate((f,), duration) for f in formats if has_video(f) and has_audio(f)]
+    if audio is None:
+        audio = max((f for f in formats if has_audio(f) and not has_video(f)),
+                    key=_audio_rank, default=None)
+    if audio is not None:
+        result += [Candidate((f, audio), duration)
+                   for f in formats if has_video(f) and not has_audio(f)]
+    return result
+
+
+def _quality(candidate):
+    return (candidate.height or 0, candidate.tbr or 0)
+
+
+class FormatBudget:
+    """Pick the smallest download that still meets a target.
+
+    Among the candidates no taller than max_height, no larger than
+    max_size bytes and no faster than max_bitrate kbit/s, the tallest
+    wins; ties go to the preferred codecs, then to the fewest bytes.
+    Instances are yt-dlp format selectors: set one as ydl_opts['format']
+    and it chooses from the formats of the info dict being processed, so
+    no extra extraction is needed.
+    """
+
+    def __init__(self, max_height=None, max_size=None, max_bitrate=None, codecs=()):
+        self.max_height = max_height
+        self.max_size = max_size
+        self.max_bitrate = max_bitrate
+        self.codecs = tuple(codecs)
+
+    def __bool__(self):
+        return bool(self.max_height or self.max_size or self.max_bitrate or self.codecs)
+
+    def __repr__(self):
+        # max_bitrate is in kbit/s, as parse_bitrate() returns it
+        return (f'FormatBudget(max_height={self.max_height!r}, max_size={self.max_size!r}, '
+                f'max_bitrate={self.max_bitrate!r}, codecs={self.codecs!r})')
+
+    def describe(self):
+        parts = []
+        if self.max_height:
+            parts.append(f"≤{self.max_height}p")
+        if self.max_size:
+            parts.append(f"≤{format_bytes(self.max_size)}")
+        if self.max_bitrate:
+            parts.append(f"≤{self.max_bitrate:g} kbit/s")
+        if self.codecs:
+            parts.append('/'.join(self.codecs))
+        return ', '.join(parts)
+
+    def fits(self, candidate):
+        if self.max_height and (candidate.height or 0) > self.max_height:
+            return False
+        if self.max_size and (candidate.bytes is None or candidate.bytes > self.max_size):
+            return False
+        if self.max_bitrate and (candidate.tbr is None or candidate.tbr > self.max_bitrate):
+            return False
+        return True
+
+    def _rank(self, candidate):
+        codec = candidate.codec_name()
+        codec_rank = self.codecs.index(codec) if codec in self.codecs else len(self.codecs)
+        size = candidate.bytes if candidate.bytes is not None else math.inf
+        return (-(candidate.height or 0), codec_rank, size)
+
+    def choose(self, formats, duration=None):
+        """Return the best fitting Candidate, or None if nothing fits."""
+        fitting = [c for c in candidates(formats, duration) if self.fits(c)]
+        choice = min(fitting, key=self._rank, default=None)
+        if self.max_size:
+            # The best audio may be what breaks the budget: a taller video
+            # can still fit with the smallest audio
+            smallest = min((f for f in formats if has_audio(f) and not has_video(f)),
+                           key=lambda f: estimate_bytes(f, duration) or math.inf, default=None)
+            if smallest is not None:
+                fitting = [c for c in candidates(formats, duration, smallest) if self.fits(c)]
+                fallback = min(fitting, key=self._rank, default=None)
+                if fallback is not None and (
+                        choice is None or self._rank(fallback)[:2] < self._rank(choice)[:2]):
+                    choice = fallback
+        return choice
+
+    def __call__(self, ctx):
+        # yt-dlp has already filled in filesize_approx from tbr and duration
+        choice = self.choose(ctx.get('formats') or [])
+        if choice is not None:
+            yield choice.to_format()
+
+
+def best_candidate(formats, duration=None):
+    """The Candidate an unconstrained "best" download would roughly fetch."""
+    return max(candidates(formats, duration), key=_quality, default=None)
+
+
+def budget_summary(info):
+    """Expected size of the download chosen for info and what it saves.
+
+    Returns a dict with 'format_id', 'height', 'bytes', 'best_bytes' and
+    'saved' (any of which may be None when sizes are unknown).
+    """
+    chosen = Candidate(info.get('requested_formats') or (info,), info.get('duration'))
+    best = best_candidate(info.get('formats') or [], info.get('duration'))
+    best_bytes = best.bytes if best else None
+    saved = None
+    if chosen.bytes is not None and best_bytes is not None:
+        saved = max(0, best_bytes - chosen.bytes)
+    return {'format_id': info.get('format_id'), 'height': chosen.height,
+            'bytes': chosen.bytes, 'best_bytes': best_bytes, 'saved': saved}
+
+
+def rank_formats(formats, duration=None, budget=None):
+    """Formats for -l, best first, as (format, estimated bytes, fits budget)."""
+    ranked = sorted(formats, key=lambda f: (f.get('height') or 0, has_audio(f) and has_video(f),
+                                            f.get('tbr') or 0), reverse=True)
+    return [(f, estimate_bytes(f, duration), budget.fits(Candidate((f,), duration))
+             if budget else None) for f in ranked]
+
+
+def format_bytes(size):
+    if size is None:
+        return 'unknown'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
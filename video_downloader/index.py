@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+INDEX_FILENAME = '.vdl-index.sqlite3'
+
+# What a plain download of the best format is recorded as
+DEFAULT_VARIANT = 'video:best'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS downloads (
+    extractor    TEXT NOT NULL,
+    video_id     TEXT NOT NULL,
+    variant      TEXT NOT NULL,
+    path         TEXT NOT NULL,
+    size         INTEGER,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (extractor, video_id, variant)
+)
+'''
+
+# Extensions of audio-only files; indexes without a variant column only
+# tell them apart by the path
+_AUDIO_EXTS = ('aac', 'aiff', 'alac', 'flac', 'm4a', 'mka', 'mp3', 'ogg', 'opus', 'wav', 'wma')
+
+
+def download_variant(quality='best', audio_only=False, audio_format=None, budget=None):
+    """The index variant of a request: what kind of file it produces.
+
+    An audio download and a video download of the same ID are different
+    files, and so are downloads with different -q selectors or budgets.
+    """
+    if audio_only:
+        return f'audio:{audio_format or "mp3"}'
+    if quality != 'best':
+        return f'video:{quality}'
+    if budget:
+        return f'video:{budget!r}'
+    return DEFAULT_VARIANT
+
+
+def _path_variant(path):
+    ext = os.path.splitext(path)[1][1:].lower()
+    return f'audio:{ext}' if ext in _AUDIO_EXTS else DEFAULT_VARIANT
+
+
+class DownloadIndex:
+    """Persistent record of finished downloads under one output root.
+
+    Keyed by (extractor, video ID) like yt-dlp's download archive, plus
+    the variant (see download_variant()), but shared by every entry
+    point and storing where the file ended up.
+    """
+
+    def __init__(self, root):
+        self.path = Path(root) / INDEX_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._migrate()
+            self._conn.execute(_SCHEMA)
+
+    def _migrate(self):
+        """Give the records of an index from before variants one from their path."""
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(downloads)')]
+        if not columns or 'variant' in columns:
+            return
+        rows = self._conn.execute(
+            'SELECT extractor, video_id, path, size, completed_at FROM downloads').fetchall()
+        self._conn.execute('DROP TABLE downloads')
+        self._conn.execute(_SCHEMA)
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?)',
+            [(extractor, video_id, _path_variant(path), path, size, completed_at)
+             for extractor, video_id, path, size, completed_at in rows])
+
+    def lookup(self, extractor, video_id, variant=DEFAULT_VARIANT):
+        """Return the record for a finished download whose file still exists."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT path, size, completed_at FROM downloads '
+                'WHERE extractor = ? AND video_id = ? AND variant = ?',
+                (extractor.lower(), str(video_id), variant)).fetchone()
+        if not row:
+            return None
+        if not os.path.exists(row[0]):
+            self.forget(extractor, video_id, variant)
+            return None
+        return {'path': row[0], 'size': row[1], 'completed_at': row[2]}
+
+    def record(self, extractor, video_id, path, variant=DEFAULT_VARIANT):
+        size = os.path.getsize(path) if os.path.exists(path) else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?)',
+                (extractor.lower(), str(video_id), variant, str(path), size, time.time()))
+
+    def forget(self, extractor, video_id, variant=None):
+        """Drop the record of one variant, or of every variant of the video."""
+        query = 'DELETE FROM downloads WHERE extractor = ? AND video_id = ?'
+        params = (extractor.lower(), str(video_id))
+        if variant is not None:
+            query += ' AND variant = ?'
+            params += (variant,)
+        with self._lock, self._conn:
+            self._conn.execute(query, params)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def open_index(root):
+    """Return the shared DownloadIndex for an output root."""
+    root = Path(root).expanduser().resolve()
+    with _indexes_lock:
+        if root not in _indexes:
+            _indexes[root] = DownloadIndex(root)
+        return _indexes[root]
+
@@ -0,0 +1,336 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .utils import user_cache_dir, user_state_dir
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        queue       TEXT NOT NULL,
+        url         TEXT NOT NULL,
+        platform    TEXT,
+        options     TEXT NOT NULL DEFAULT '{}',
+        ref         INTEGER,
+        state       TEXT NOT NULL,
+        attempts    INTEGER NOT NULL DEFAULT 0,
+        worker      TEXT,
+        error       TEXT,
+        error_kind  TEXT,
+        output_path TEXT,
+        created     REAL NOT NULL,
+        updated     REAL NOT NULL,
+        key         TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS jobs_queue_state ON jobs (queue, state, id)',
+    '''
+    CREATE TABLE IF NOT EXISTS workers (
+        id        TEXT PRIMARY KEY,
+        heartbeat REAL NOT NULL
+    )
+    ''',
+)
+
+# Created after _migrate() has added the key column to older stores
+_KEY_INDEX = 'CREATE INDEX IF NOT EXISTS jobs_queue_key ON jobs (queue, key)'
+
+_COLUMNS = ('id', 'queue', 'url', 'platform', 'options', 'ref', 'state', 'attempts', 'worker',
+            'error', 'error_kind', 'output_path', 'created', 'updated', 'key')
+
+
+def _row_to_job(row):
+    job = dict(zip(_COLUMNS, row))
+    job['options'] = json.loads(job['options'])
+    return job
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass
+    return True
+
+
+class JobStore:
+    """Durable download queue in SQLite (WAL), shared by every process.
+
+    Jobs belong to a named queue ('batch:<file>', 'playlist:<dir>',
+    'daemon') and move queued -> running -> done/failed, or cancelled.
+    claim() hands a queued job to exactly one worker, even across
+    processes. A process that claims jobs heartbeats every
+    heartbeat_interval seconds; recover() puts running jobs of workers
+    that stopped (crash, OOM, reboot) back in the queue.
+    """
+
+    def __init__(self, path, stale_after=60.0, heartbeat_interval=10.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.stale_after = stale_after
+        self.heartbeat_interval = heartbeat_interval
+        self.host = socket.gethostname()
+        self.worker_id = f'{self.host}:{os.getpid()}'
+        self._lock = threading.Lock()
+        # Transactions are explicit: claims need BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._heartbeat = None
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._migrate()
+            self._conn.execute(_KEY_INDEX)
+
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        if 'key' not in columns:
+            self._conn.execute('ALTER TABLE jobs ADD COLUMN key TEXT')
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = self._conn.execute(sql, params)
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            return cursor
+
+    def enqueue(self, queue, url, platform=None, options=None, ref=None, key=None):
+        """Add one queued job; returns its ID."""
+        return self.enqueue_many(queue, [{'url': url, 'platform': platform,
+                                          'options': options, 'ref': ref, 'key': key}])[0]
+
+    def enqueue_many(self, queue, items):
+        """Add dicts with url and optional platform, options, ref and key in one transaction.
+
+        key names what the job fetches (e.g. a video ID) for known_keys().
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for item in items:
+                    cursor = self._conn.execute(
+                        'INSERT INTO jobs (queue, url, platform, options, ref, state,'
+                        ' created, updated, key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (queue, item['url'], item.get('platform'),
+                         json.dumps(item.get('options') or {}), item.get('ref'), QUEUED,
+                         now, now, item.get('key')))
+                    ids.append(cursor.lastrowid)
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return ids
+
+    def claim(self, queue, job_id=None):
+        """Mark the oldest queued job of queue (or job_id) running; return it or None."""
+        self._start_heartbeat()
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                if job_id is None:
+                    row = self._conn.execute(
+                        'SELECT id FROM jobs WHERE queue = ? AND state = ? ORDER BY id LIMIT 1',
+                        (queue, QUEUED)).fetchone()
+                else:
+                    row = self._conn.execute(
+                        'SELECT id FROM jobs WHERE id = ? AND queue = ? AND state = ?',
+                        (job_id, queue, QUEUED)).fetchone()
+                job = None
+                if row:
+                    self._conn.execute(
+                        'UPDATE jobs SET state = ?, worker = ?, attempts = attempts + 1,'
+                        ' updated = ? WHERE id = ?', (RUNNING, self.worker_id, now, row[0]))
+                    job = _row_to_job(self._conn.execute(
+                        'SELECT * FROM jobs WHERE id = ?', (row[0],)).fetchone())
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return job
+
+    def finish(self, job_id, result, state=None):
+        """Record a downloader result dict: done with its file, or failed.
+
+        state overrides the outcome for unsuccessful results (CANCELLED).
+        """
+        if result.get('success'):
+            self._write('UPDATE jobs SET state = ?, output_path = ?, error = NULL,'
+                        ' error_kind = NULL, updated = ? WHERE id = ?',
+                        (DONE, result.get('filename'), time.time(), job_id))
+        else:
+            self._write('UPDATE jobs SET state = ?, error = ?, error_kind = ?, updated = ?'
+                        ' WHERE id = ?',
+                        (state or FAILED, str(result.get('error') or ''),
+                         result.get('error_kind'), time.time(), job_id))
+
+    def release(self, job_id=None):
+        """Put a running job, or all of this process's, back in the queue."""
+        if job_id is None:
+            sql, params = 'worker = ?', (self.worker_id,)
+        else:
+            sql, params = 'id = ?', (job_id,)
+        return self._write(f'UPDATE jobs SET state = ?, worker = NULL, updated = ?'
+                           f' WHERE state = ? AND {sql}',
+                           (QUEUED, time.time(), RUNNING, *params)).rowcount
+
+    def cancel(self, job_id):
+        """Cancel a queued job; returns False if it is no longer queued."""
+        return self._write('UPDATE jobs SET state = ?, error = ?, updated = ?'
+                           ' WHERE id = ? AND state = ?',
+                           (CANCELLED, 'Cancelled', time.time(), job_id, QUEUED)).rowcount > 0
+
+    def _other_workers(self, queue):
+        """(worker, alive) for every other worker with running jobs of queue."""
+        cutoff = time.time() - self.stale_after
+        with self._lock:
+            workers = [row[0] for row in self._conn.execute(
+                'SELECT DISTINCT worker FROM jobs WHERE queue = ? AND state = ?',
+                (queue, RUNNING))]
+            beats = dict(self._conn.execute('SELECT id, heartbeat FROM workers'))
+        return [(worker, self._worker_alive(worker, beats.get(worker), cutoff))
+                for worker in workers if worker != self.worker_id]
+
+    def live_workers(self, queue):
+        """Other workers that are still running jobs of queue, e.g. another vdl."""
+        return [worker for worker, alive in self._other_workers(queue) if alive]
+
+    def recover(self, queue):
+        """Re-queue running jobs of queue whose worker has stopped; returns the count.
+
+        A worker has stopped if its heartbeat is older than stale_after
+        or, on this host, its process no longer exists.
+        """
+        stopped = [worker for worker, alive in self._other_workers(queue) if not alive]
+        self._write('DELETE FROM workers WHERE heartbeat < ?', (time.time() - self.stale_after,))
+        recovered = 0
+        for worker in stopped:
+            recovered += self._write(
+                'UPDATE jobs SET state = ?, worker = NULL, updated = ?'
+                ' WHERE queue = ? AND state = ? AND worker IS ?',
+                (QUEUED, time.time(), queue, RUNNING, worker)).rowcount
+        return recovered
+
+    def _worker_alive(self, worker, heartbeat, cutoff):
+        if worker is None or heartbeat is None or heartbeat < cutoff:
+            return False
+        host, _, pid = worker.rpartition(':')
+        return host != self.host or not pid.isdigit() or _pid_alive(int(pid))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def jobs(self, queue, states=None):
+        """Jobs of queue in submission order, optionally only those in states."""
+        sql, params = 'SELECT * FROM jobs WHERE queue = ?', [queue]
+        if states:
+            sql += f" AND state IN ({', '.join('?' * len(states))})"
+            params.extend(states)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY id', params).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def known_keys(self, queue, keys):
+        """The subset of keys that a job of queue was enqueued with, in any state."""
+        keys = list(set(keys))
+        known = set()
+        with self._lock:
+            # Batches stay under SQLite's default limit of 999 parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                known.update(row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT key FROM jobs WHERE queue = ? AND key IN"
+                    f" ({', '.join('?' * len(batch))})", (queue, *batch)))
+        return known
+
+    def counts(self, queue):
+        """{state: number of jobs} for queue."""
+        with self._lock:
+            return dict(self._conn.execute(
+                'SELECT state, COUNT(*) FROM jobs WHERE queue = ? GROUP BY state', (queue,)))
+
+    def clear(self, queue, states=None):
+        """Delete the jobs of queue (only those in states, if given)."""
+        sql, params = 'DELETE FROM jobs WHERE queue = ?', [queue]
+        if states:
+            sql += f" AND state IN ({', '.join('?' * len(states))})"
+            params.extend(states)
+        return self._write(sql, params).rowcount
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._beat, name='jobstore-heartbeat',
+                                               daemon=True)
+        self._beat_once()
+        self._heartbeat.start()
+
+    def _beat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                self._beat_once()
+            except sqlite3.Error:
+                pass  # Busy for 30 s; the next beat is within stale_after
+
+    def _beat_once(self):
+        self._write('INSERT OR REPLACE INTO workers VALUES (?, ?)', (self.worker_id, time.time()))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _move_from_cache(path):
+    """Move a job store left in the cache directory by older versions to path."""
+    old = user_cache_dir() / path.name
+    if path.exists() or not old.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The WAL may hold committed jobs that are not in the main file yet
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.replace(f'{old}{suffix}', f'{path}{suffix}')
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return  # Another filesystem: start afresh, the old queue stays put
+
+
+def open_job_store():
+    """Return the process-wide JobStore in the user state directory.
+
+    Queued jobs are state, not cache: they must survive a cleared cache.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = user_state_dir() / 'jobs.sqlite3'
+            _move_from_cache(path)
+            _store = JobStore(path)
+        return _store
@@ -0,0 +1,422 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .utils import atomic_write_text, user_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent runs may lose textfile updates
+    fcntl = None
+
+# Phases a job's wall-clock time is split into
+PHASES = ('resolve', 'extract', 'transfer', 'postprocess', 'retry_wait')
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+THROUGHPUT_BUCKETS = tuple(2 ** n * 1024 for n in range(4, 17, 2))  # 16 KiB/s .. 64 MiB/s
+
+
+class JobMetrics:
+    """Timings of one download, split by phase."""
+
+    def __init__(self, platform, url):
+        self.platform = platform
+        self.url = url
+        self.started = time.monotonic()
+        self.phases = {}
+        self.postprocessors = {}
+        self.attempts = 1
+        self.outcome = None
+        self.error_kind = None
+        # Set when the download is over; work still holding it (an audio
+        # conversion on the transcode pool) delays the record until it ends
+        self.ended = None
+        self.deferred = 0
+        self._lock = threading.Lock()
+        self._transfers = {}
+        self._pp_started = {}
+
+    def add(self, phase, seconds, nbytes=0):
+        with self._lock:
+            entry = self.phases.setdefault(phase, {'seconds': 0.0, 'count': 0, 'bytes': 0})
+            entry['seconds'] += seconds
+            entry['count'] += 1
+            entry['bytes'] += nbytes
+
+    def hold(self):
+        with self._lock:
+            self.deferred += 1
+
+    def release(self):
+        """Drop a hold; True if that leaves an ended job with none."""
+        with self._lock:
+            self.deferred -= 1
+            return self.ended is not None and not self.deferred
+
+    def close(self):
+        """Mark the download over; True if nothing holds the job."""
+        with self._lock:
+            self.ended = time.monotonic()
+            return not self.deferred
+
+    def set_result(self, result):
+        """Take outcome and attempts from a downloader result dict."""
+        if result.get('skipped'):
+            self.outcome = 'skipped'
+        else:
+            self.outcome = 'success' if result.get('success') else 'failed'
+        self.error_kind = result.get('error_kind')
+        self.attempts = result.get('attempts') or self.attempts
+
+    def progress_hook(self, d):
+        # Transfer time runs from a file's first progress report to 'finished'
+        key = d.get('filename') or d.get('tmpfilename')
+        now = time.monotonic()
+        status = d.get('status')
+        if status == 'downloading':
+            self._transfers.setdefault(key, now - (d.get('elapsed') or 0))
+        elif status in ('finished', 'error'):
+            started = self._transfers.pop(key, now - (d.get('elapsed') or 0))
+            nbytes = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            self.add('transfer', now - started, nbytes if status == 'finished' else 0)
+
+    def postprocessor_hook(self, d):
+        name = d.get('postprocessor')
+        now = time.monotonic()
+        if d.get('status') == 'started':
+            self._pp_started[name] = now
+        elif d.get('status') == 'finished' and name in self._pp_started:
+            seconds = now - self._pp_started.pop(name)
+            self.add('postprocess', seconds)
+            with self._lock:
+                self.postprocessors[name] = self.postprocessors.get(name, 0.0) + seconds
+
+    def to_record(self):
+        # The download's own wall-clock time, without deferred conversions
+        duration = (self.ended or time.monotonic()) - self.started
+        transfer = self.phases.get('transfer', {})
+        record = {
+            'type': 'job',
+            'time': round(time.time(), 3),
+            'platform': self.platform,
+            'url': self.url,
+            'outcome': self.outcome or 'failed',
+            'error_kind': self.error_kind,
+            'attempts': self.attempts,
+            'retries': self.attempts - 1,
+            'duration': round(duration, 4),
+            'bytes': transfer.get('bytes', 0),
+            'throughput': (round(transfer['bytes'] / transfer['seconds'])
+                           if transfer.get('seconds') else None),
+            'postprocess_seconds': round(self.phases.get('postprocess', {}).get('seconds', 0.0),
+                                         4),
+            'phases': {name: {'seconds': round(p['seconds'], 4), 'count': p['count'],
+                              **({'bytes': p['bytes']} if p['bytes'] else {})}
+                       for name, p in self.phases.items()},
+        }
+        if self.postprocessors:
+            record['postprocessors'] = {k: round(v, 4) for k, v in self.postprocessors.items()}
+        return record
+
+
+def _new_histogram(buckets):
+    return {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+
+
+def _observe_histogram(hist, buckets, value):
+    # Buckets are cumulative, as Prometheus expects
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            hist['buckets'][i] += 1
+    hist['sum'] += value
+    hist['count'] += 1
+
+
+# name -> (type, help, buckets)
+_SERIES = {
+    'vdl_phase_duration_seconds': ('histogram', 'Time spent in each phase of a job.',
+                                   DURATION_BUCKETS),
+    'vdl_job_duration_seconds': ('histogram', 'Wall-clock time of whole jobs.',
+                                 DURATION_BUCKETS),
+    'vdl_transfer_throughput_bytes_per_second': (
+        'histogram', 'Average transfer rate of each downloaded file.', THROUGHPUT_BUCKETS),
+    'vdl_jobs_total': ('counter', 'Finished jobs by outcome.', None),
+    'vdl_downloaded_bytes_total': ('counter', 'Bytes transferred.', None),
+    'vdl_retries_total': ('counter', 'Retried attempts.', None),
+}
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+class MetricsRecorder:
+    """Collects job metrics and writes them out.
+
+    Every finished job becomes one line in the JSON-lines file. The
+    Prometheus textfile holds histograms and counters accumulated over
+    all runs writing to it (running totals live in the user cache
+    directory), so p50/p95 and rates can be computed from it.
+
+    Disabled until configure() is given a destination; then the
+    instrumentation points cost nothing.
+    """
+
+    def __init__(self):
+        self.jsonl_path = None
+        self.textfile_path = None
+        self.flush_interval = 30.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._jsonl = None
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._registered = False
+
+    @property
+    def enabled(self):
+        return bool(self.jsonl_path or self.textfile_path)
+
+    def configure(self, jsonl_path=None, textfile_path=None):
+        self.jsonl_path = jsonl_path
+        self.textfile_path = textfile_path
+        if self.enabled and not self._registered:
+            atexit.register(self.close)
+            self._registered = True
+
+    def current(self):
+        """The job being recorded on this thread, if any."""
+        return getattr(self._local, 'job', None)
+
+    @contextmanager
+    def job(self, platform, url):
+        """Record the block as one job; nested calls join the outer job."""
+        outer = self.current()
+        if not self.enabled or outer is not None:
+            yield outer
+            return
+        job = self._local.job = JobMetrics(platform, url)
+        try:
+            yield job
+        finally:
+            self._local.job = None
+            if job.close():
+                self._finish(job)
+
+    def defer(self):
+        """Keep the current job's record open for work that outlives it.
+
+        Returns the job, or None outside one, for resume() once the work
+        (an audio conversion on the transcode pool) is done.
+        """
+        job = self.current()
+        if job is not None:
+            job.hold()
+        return job
+
+    def resume(self, job, phase=None, seconds=0.0):
+        """Add the deferred work's phase to job; write it if nothing else holds it."""
+        if job is None:
+            return
+        if phase:
+            job.add(phase, seconds)
+        if job.release():
+            self._finish(job)
+
+    @contextmanager
+    def phase(self, name, platform=None):
+        """Time the block as a phase of the current job.
+
+        Outside a job (batch-wide short-link resolution, say) the phase is
+        written as a record of its own.
+        """
+        if not self.enabled:
+            yield
+            return
+        job = self.current()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - started
+            if job is not None:
+                job.add(name, seconds)
+            else:
+                self._write({'type': 'phase', 'time': round(time.time(), 3),
+                             'platform': platform, 'phase': name, 'seconds': round(seconds, 4)})
+                self._observe('vdl_phase_duration_seconds',
+                              {'platform': platform or 'unknown', 'phase': name}, seconds)
+
+    def set_result(self, result):
+        """Record a downloader result dict on the current job."""
+        job = self.current()
+        if job is not None:
+            job.set_result(result)
+
+    def add_phase(self, name, seconds):
+        """Add a phase of known length (a retry back-off) to the current job."""
+        job = self.current()
+        if job is not None:
+            job.add(name, seconds)
+
+    @contextmanager
+    def attach(self, ydl):
+        """Feed the current job from ydl's progress and post-processor hooks."""
+        job = self.current()
+        if job is None:
+            yield
+            return
+        ydl.add_progress_hook(job.progress_hook)
+        ydl.add_postprocessor_hook(job.postprocessor_hook)
+        try:
+            yield
+        finally:
+            for hooks, hook in ((ydl._progress_hooks, job.progress_hook),
+                                (ydl._postprocessor_hooks, job.postprocessor_hook)):
+                try:
+                    hooks.remove(hook)
+                except ValueError:
+                    pass
+
+    def _finish(self, job):
+        record = job.to_record()
+        self._write(record)
+
+        labels = {'platform': job.platform}
+        for name, phase in job.phases.items():
+            # Per-phase totals of this job, so p95 is over jobs, not fragments
+            self._observe('vdl_phase_duration_seconds', {**labels, 'phase': name},
+                          phase['seconds'])
+        self._observe('vdl_job_duration_seconds', {**labels, 'outcome': record['outcome']},
+                      record['duration'])
+        if record['throughput']:
+            self._observe('vdl_transfer_throughput_bytes_per_second', labels,
+                          record['throughput'])
+        self._count('vdl_jobs_total', {**labels, 'outcome': record['outcome']}, 1)
+        self._count('vdl_downloaded_bytes_total', labels, record['bytes'])
+        self._count('vdl_retries_total', labels, record['retries'])
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _write(self, record):
+        if not self.jsonl_path:
+            return
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            if self._jsonl is None:
+                Path(self.jsonl_path).parent.mkdir(parents=True, exist_ok=True)
+                self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8')
+            self._jsonl.write(line)
+            self._jsonl.flush()
+
+    def _observe(self, name, labels, value):
+        if not self.textfile_path:
+            return
+        buckets = _SERIES[name][2]
+        with self._lock:
+            series = self._pending.setdefault(name, {})
+            hist = series.setdefault(_label_key(labels), _new_histogram(buckets))
+            _observe_histogram(hist, buckets, value)
+
+    def _count(self, name, labels, value):
+        if not self.textfile_path or not value:
+            return
+        with self._lock:
+            series = self._pending.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def flush(self):
+        """Merge pending observations into the running totals and rewrite the textfile."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not self.textfile_path:
+            return
+        state_path = _state_path(self.textfile_path)
+        try:
+            state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(f'{state_path}.lock', 'a') as lock:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    with open(state_path, encoding='utf-8') as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {}
+                _merge(state, pending)
+                atomic_write_text(state_path, json.dumps(state))
+                atomic_write_text(self.textfile_path, render_textfile(state))
+        except OSError:
+            pass
+
+    def close(self):
+        if self.textfile_path:
+            self.flush()
+        with self._lock:
+            if self._jsonl:
+                self._jsonl.close()
+                self._jsonl = None
+
+
+def _state_path(textfile_path):
+    digest = hashlib.sha1(os.path.abspath(textfile_path).encode()).hexdigest()[:16]
+    return user_cache_dir() / 'metrics' / f'{digest}.json'
+
+
+def _merge(state, pending):
+    for name, series in pending.items():
+        into = state.setdefault(name, {})
+        for key, value in series.items():
+            if isinstance(value, dict):
+                old = into.get(key)
+                if old and len(old['buckets']) == len(value['buckets']):
+                    old['buckets'] = [a + b for a, b in zip(old['buckets'], value['buckets'])]
+                    old['sum'] += value['sum']
+                    old['count'] += value['count']
+                else:
+                    into[key] = value
+            else:
+                into[key] = into.get(key, 0) + value
+
+
+def _format_labels(labels):
+    def quote(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{k}="{quote(v)}"' for k, v in labels)
+
+
+def render_textfile(state):
+    """Prometheus text exposition format for the accumulated state."""
+    lines = []
+    for name, (kind, help_text, buckets) in _SERIES.items():
+        series = state.get(name)
+        if not series:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for key in sorted(series):
+            labels = [tuple(item) for item in json.loads(key)]
+            value = series[key]
+            if kind == 'counter':
+                lines.append(f'{name}{{{_format_labels(labels)}}} {value}')
+                continue
+            for bound, count in zip(buckets, value['buckets']):
+                le = _format_labels(labels + [('le', bound)])
+                lines.append(f'{name}_bucket{{{le}}} {count}')
+            lines.append(f'{name}_bucket{{{_format_labels(labels + [("le", "+Inf")])}}} '
+                         f'{value["count"]}')
+            lines.append(f'{name}_sum{{{_format_labels(labels)}}} {value["sum"]:.6f}')
+            lines.append(f'{name}_count{{{_format_labels(labels)}}} {value["count"]}')
+    lines.append('# HELP vdl_last_run_timestamp_seconds When a run last wrote these metrics.')
+    lines.append('# TYPE vdl_last_run_timestamp_seconds gauge')
+    lines.append(f'vdl_last_run_timestamp_seconds {time.time():.3f}')
+    return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRecorder()
@@ -0,0 +1,255 @@
+import glob
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .progress import ProgressBoard
+from .workers import WorkerPool
+
+# Extractions that may run ahead of the prompts at once
+PREFETCH_WORKERS = 2
+
+
+class BackgroundJob:
+    """One download of interactive mode running on the background pool.
+
+    hook() feeds the job's row on the progress board and raises
+    retry.Cancelled once cancel() was called, which stops yt-dlp at its
+    next progress update. A speculative job was started before the user
+    chose anything; discard() stops it and removes what it wrote.
+    """
+
+    def __init__(self, downloader, url, quality, audio_only, progress, speculative=False):
+        self.downloader = downloader
+        self.url = url
+        self.quality = quality
+        self.audio_only = audio_only
+        self.progress = progress
+        self.speculative = speculative
+        self.discarded = False
+        self.cancel_requested = False
+        self.future = None
+        # Files this job wrote, for discard(), and the final names of the
+        # ones it downloaded itself
+        self._files = set()
+        self._downloading = set()
+
+    @property
+    def label(self):
+        return self.progress.label
+
+    def matches(self, quality, audio_only):
+        return self.quality == quality and self.audio_only == audio_only
+
+    def hook(self, d):
+        if self.cancel_requested:
+            from .retry import Cancelled
+
+            raise Cancelled('Cancelled')
+        if self.speculative:
+            self._track(d)
+        self.progress.hook(d)
+
+    def _track(self, d):
+        filename = d.get('filename')
+        if d.get('status') == 'downloading':
+            # A file that is already on disk is reported 'finished' at once
+            # and never 'downloading', so it is never collected here
+            self._downloading.add(filename)
+            if d.get('tmpfilename'):
+                self._files.add(d['tmpfilename'])
+            if filename:
+                # The resume state of fragmented downloads
+                self._files.add(f'{filename}.ytdl')
+        elif d.get('status') == 'finished' and filename in self._downloading:
+            # A finished format, e.g. the video half of a pending merge
+            self._files.add(filename)
+
+    def run(self):
+        """Worker body; never raises."""
+        result = {'success': False, 'error': 'Download interrupted'}
+        try:
+            result = self.downloader.download(self.url, self.quality, self.audio_only, self.hook)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        finally:
+            if self.discarded:
+                self.progress.board.remove(self.progress)
+            else:
+                self.progress.finish(result.get('success'))
+        return result
+
+    def cancel(self):
+        """Stop the job: a queued one never starts, a running one stops at
+        its next progress update."""
+        self.cancel_requested = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def discard(self):
+        """Cancel a speculative job, wait for it and delete its files.
+
+        A download that finished before it could be stopped is deleted
+        and dropped from the download index, so that the choice the user
+        made instead is not skipped as already downloaded. Files that
+        were on disk before the job started are left alone.
+        """
+        self.discarded = True
+        self.cancel()
+        if self.future is None or self.future.cancelled():
+            return
+        result = self.future.result()
+        if result.get('skipped') or not self._downloading:
+            return  # Downloaded by an earlier run; not ours to delete
+        if result.get('success'):
+            self._files.add(result['filename'])
+            info = self.downloader._info_by_url.get(self.url) or {}
+            if info.get('extractor_key') and info.get('id'):
+                self.downloader.download_index().forget(
+                    info['extractor_key'], info['id'],
+                    self.downloader.download_variant(self.quality, self.audio_only))
+        for path in self._files:
+            for leftover in (path, *glob.glob(f'{glob.escape(path)}-Frag*')):
+                _remove(leftover)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class Prefetch:
+    """Background work for one URL entered in interactive mode.
+
+    Extraction starts as soon as the URL is known. With speculate(), the
+    likely choice then starts downloading while the prompts are open;
+    commit() adopts that download when the user picks it and otherwise
+    discards it before queueing the chosen one.
+    """
+
+    def __init__(self, queue, downloader, url):
+        self.queue = queue
+        self.downloader = downloader
+        self.url = url
+        self.speculation = None
+        self._info = queue._extractor.submit(downloader.get_video_info, url)
+
+    def video_info(self):
+        """The get_video_info() dict, waiting for the extraction; None on errors."""
+        return self._info.result()
+
+    def speculate(self, quality='best', audio_only=False, label=None):
+        self.speculation = self.queue.submit(self.downloader, self.url, quality, audio_only,
+                                             label, speculative=True)
+        return self.speculation
+
+    def commit(self, quality, audio_only, label=None):
+        """Queue the chosen download and return its BackgroundJob."""
+        speculation, self.speculation = self.speculation, None
+        if speculation is not None:
+            if speculation.matches(quality, audio_only):
+                speculation.speculative = False
+                return speculation
+            speculation.discard()
+        return self.queue.submit(self.downloader, self.url, quality, audio_only, label)
+
+    def discard(self):
+        speculation, self.speculation = self.speculation, None
+        if speculation is not None:
+            speculation.discard()
+
+
+class BackgroundQueue:
+    """Downloads of interactive mode that run while the user keeps typing.
+
+    Jobs share a WorkerPool of jobs workers with per-platform caps.
+    yt-dlp runs quietly, since the prompts own the terminal; finished()
+    hands back results to report between prompts, and wait() shows the
+    remaining downloads on a progress board.
+    """
+
+    def __init__(self, jobs=1, progress='auto'):
+        self.pool = WorkerPool(jobs)
+        self.board = ProgressBoard(progress, show_total=False)
+        self._extractor = ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._jobs = []
+        self._finished = deque()
+
+    def prefetch(self, downloader, url):
+        """Start extracting url; returns its Prefetch."""
+        downloader.quiet = True
+        return Prefetch(self, downloader, url)
+
+    def submit(self, downloader, url, quality, audio_only, label=None, speculative=False):
+        from .transcode import when_finished
+
+        downloader.quiet = True
+        job = BackgroundJob(downloader, url, quality, audio_only,
+                            self.board.add_job(label or url, downloader.platform_name),
+                            speculative)
+        with self._lock:
+            self._jobs.append(job)
+        job.future = self.pool.submit(downloader.platform_name, job.run)
+        job.future.add_done_callback(lambda f: self._done(job, None) if f.cancelled() else
+                                     when_finished(f.result(),
+                                                   lambda result: self._done(job, result)))
+        return job
+
+    def _done(self, job, result):
+        if result is None:
+            # Cancelled before it started
+            self.board.remove(job.progress)
+        with self._lock:
+            self._jobs.remove(job)
+            if result is not None:
+                self._finished.append((job, result))
+
+    @property
+    def pending(self):
+        """Confirmed downloads that are queued or running."""
+        with self._lock:
+            return sum(1 for job in self._jobs if not job.speculative and not
+                       job.future.cancelled())
+
+    def finished(self):
+        """Pop every (BackgroundJob, result) that finished since the last call.
+
+        A speculation that finished while the prompts were open is held
+        back until it is committed, and dropped once discarded.
+        """
+        with self._lock:
+            entries = list(self._finished)
+            self._finished.clear()
+            held = [(job, result) for job, result in entries
+                    if job.speculative and not job.discarded]
+            self._finished.extend(held)
+        return [(job, result) for job, result in entries if not job.speculative]
+
+    def wait(self):
+        """Show the remaining downloads until all of them are done."""
+        from .transcode import transcode_pool
+
+        if self.pending:
+            self.board.start()
+            try:
+                self.pool.wait()
+                transcode_pool.drain()
+            finally:
+                self.board.close()
+
+    def close(self, cancel=False):
+        """Stop taking work; with cancel, stop queued and running downloads."""
+        if cancel:
+            from .diskspace import disk_budget
+
+            with self._lock:
+                jobs = list(self._jobs)
+            for job in jobs:
+                job.cancel()
+            disk_budget.interrupt()
+        self._extractor.shutdown(wait=False, cancel_futures=True)
+        self.pool.shutdown(wait=True, cancel_pending=cancel)
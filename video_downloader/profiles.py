@@ -0,0 +1,148 @@
+import copy
+import re
+from pathlib import Path
+
+from .downloaders import PLATFORMS
+from .utils import user_config_dir
+
+# Built-in presets. '*' applies to every platform, platform keys refine it.
+# Values are plain yt-dlp options.
+PRESETS = {
+    'fast': {
+        '*': {
+            'concurrent_fragment_downloads': 8,
+            'http_chunk_size': 10 * 1024 * 1024,
+            'buffersize': 1024 * 1024,
+            'socket_timeout': 20,
+            'retries': 10,
+            'fragment_retries': 10,
+        },
+        # TikTok and Instagram throttle bursts of fragment requests
+        'tiktok': {'concurrent_fragment_downloads': 4},
+        'instagram': {'concurrent_fragment_downloads': 4},
+    },
+    'polite': {
+        '*': {
+            'concurrent_fragment_downloads': 1,
+            'sleep_interval_requests': 1,
+            'sleep_interval': 2,
+            'max_sleep_interval': 5,
+            'socket_timeout': 30,
+            'retries': 5,
+            'fragment_retries': 5,
+        },
+    },
+    'lowmem': {
+        '*': {
+            'concurrent_fragment_downloads': 1,
+            'buffersize': 16 * 1024,
+            'noresizebuffer': True,
+            'http_chunk_size': 1024 * 1024,
+        },
+    },
+}
+
+# Options given in bytes; profile files may write them as "10M", "512K"...
+SIZE_OPTIONS = ('http_chunk_size', 'buffersize', 'ratelimit', 'throttledratelimit')
+
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+class ProfileError(Exception):
+    pass
+
+
+def profile_file():
+    return user_config_dir() / 'profiles.toml'
+
+
+def parse_size(value):
+    """Parse 1048576, "1048576", "1M" or "1.5MiB" into bytes."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?\s*', str(value), re.IGNORECASE)
+    if not match:
+        raise ProfileError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+_user_profiles = None
+
+
+def load_user_profiles(path=None):
+    """Read profiles.toml once; returns {} when the file does not exist."""
+    global _user_profiles
+    if path is None and _user_profiles is not None:
+        return _user_profiles
+
+    path = Path(path or profile_file())
+    profiles = {}
+    if path.exists():
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ProfileError(
+                    f"Reading {path} needs Python 3.11+ or the 'tomli' package") from None
+        try:
+            with open(path, 'rb') as f:
+                profiles = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            raise ProfileError(f"Could not read {path}: {e}") from None
+
+    if path == profile_file():
+        _user_profiles = profiles
+    return profiles
+
+
+def available_profiles():
+    names = set(PRESETS) | set(load_user_profiles())
+    names.discard('default')
+    return sorted(names)
+
+
+def validate_profile(profile):
+    """Raise ProfileError unless profile names a preset or a user table."""
+    if profile and profile not in PRESETS and profile not in load_user_profiles():
+        raise ProfileError(
+            f"Unknown profile '{profile}' (available: {', '.join(available_profiles())})")
+
+
+def _split_section(section):
+    """Split a profile table into (all-platform options, {platform: options})."""
+    common, per_platform = {}, {}
+    for key, value in (section or {}).items():
+        if key in PLATFORMS and isinstance(value, dict):
+            per_platform[key] = value
+        else:
+            common[key] = value
+    return common, per_platform
+
+
+def profile_options(platform, profile=None):
+    """Effective tuning options for a platform under a profile.
+
+    Layers, later wins: the user's [default] table, the built-in preset,
+    then the user's table of the same name; each as all-platform values
+    followed by the platform's own sub-table.
+    """
+    validate_profile(profile)
+    user = load_user_profiles()
+
+    layers = [_split_section(user.get('default'))]
+    if profile:
+        preset = PRESETS.get(profile, {})
+        layers.append((preset.get('*', {}), {p: o for p, o in preset.items() if p != '*'}))
+        layers.append(_split_section(user.get(profile)))
+
+    options = {}
+    for common, per_platform in layers:
+        options.update(copy.deepcopy(common))
+        options.update(copy.deepcopy(per_platform.get(platform, {})))
+
+    for key in SIZE_OPTIONS:
+        if key in options:
+            options[key] = parse_size(options[key])
+    return options
@@ -0,0 +1,249 @@
+import json
+import sys
+import threading
+import time
+
+from .formats import format_bytes
+
+MODES = ('auto', 'bar', 'plain', 'json')
+
+# Longest job label shown in a bar row; URLs get cut in the middle
+LABEL_WIDTH = 48
+
+
+def shorten(text, width=LABEL_WIDTH):
+    if len(text) <= width:
+        return text
+    head = (width - 1) // 2
+    return f"{text[:head]}…{text[-(width - 1 - head):]}"
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60}:{rest % 60:02d}"
+
+
+class JobProgress:
+    """Latest progress of one download, fed by yt-dlp progress hooks.
+
+    hook() only stores numbers; the board reads them when it renders, so
+    fragment-heavy downloads cost a few attribute writes per callback.
+    """
+
+    def __init__(self, board, label, platform=None):
+        self.board = board
+        self.label = label
+        self.platform = platform
+        self.status = 'starting'
+        self.started = time.monotonic()
+        # Bytes of earlier files (video + audio downloads count together)
+        self._done_bytes = 0
+        self._downloaded = 0
+        self._total = None
+        self.speed = None
+        self.success = None
+
+    @property
+    def downloaded(self):
+        return self._done_bytes + self._downloaded
+
+    @property
+    def total(self):
+        if self._total:
+            return self._done_bytes + self._total
+        # Between files or post-processing: everything known is downloaded
+        return self._done_bytes if self.status != 'downloading' and self._done_bytes else None
+
+    def hook(self, d):
+        status = d.get('status')
+        if status == 'downloading':
+            self.status = 'downloading'
+            self._downloaded = d.get('downloaded_bytes') or 0
+            self._total = d.get('total_bytes') or d.get('total_bytes_estimate') or self._total
+            self.speed = d.get('speed')
+        elif status == 'finished':
+            self.status = 'processing'
+            self._done_bytes += d.get('total_bytes') or d.get('downloaded_bytes') or self._downloaded
+            self._downloaded, self._total, self.speed = 0, None, None
+
+    def finish(self, success=True):
+        self.status = 'done' if success else 'failed'
+        self.success = success
+        self.board._finished(self)
+
+
+class ProgressBoard:
+    """One progress display shared by every job of a run.
+
+    Hooks only record numbers; a background thread renders every
+    refresh seconds. On a terminal ('bar') that is one row per active
+    job under an aggregate row with throughput and ETA. Otherwise a
+    status line, plain text or JSON, is written every interval seconds.
+    """
+
+    def __init__(self, mode='auto', refresh=0.25, interval=5.0, keep_finished=False,
+                 show_total=True, stream=None):
+        self.stream = stream or sys.stdout
+        if mode == 'auto':
+            mode = 'bar' if self.stream.isatty() else 'plain'
+        self.mode = mode
+        self.refresh = refresh if mode == 'bar' else interval
+        self.keep_finished = keep_finished
+        self.show_total = show_total
+        self._lock = threading.Lock()
+        self._jobs = []
+        self.done = 0
+        self.failed = 0
+        self.finished_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._progress = None
+        self._rows = {}
+        self._total_row = None
+
+    def add_job(self, label, platform=None):
+        job = JobProgress(self, label, platform)
+        with self._lock:
+            self._jobs.append(job)
+        return job
+
+    def remove(self, job):
+        """Drop a job that should not count as done or failed, e.g. a cancelled one."""
+        with self._lock:
+            if job in self._jobs:
+                self._jobs.remove(job)
+
+    def _finished(self, job):
+        with self._lock:
+            if job.success:
+                self.done += 1
+            else:
+                self.failed += 1
+            self.finished_bytes += job.downloaded
+            if not self.keep_finished and job in self._jobs:
+                self._jobs.remove(job)
+
+    def snapshot(self):
+        """Aggregate state: active jobs, counts, bytes, speed and ETA."""
+        with self._lock:
+            jobs = list(self._jobs)
+            done, failed, finished_bytes = self.done, self.failed, self.finished_bytes
+        active = [job for job in jobs if job.success is None]
+        speed = sum(job.speed or 0 for job in active)
+        remaining = sum(job.total - job.downloaded for job in active
+                        if job.total and job.total > job.downloaded)
+        return {
+            'active': len(active),
+            'done': done,
+            'failed': failed,
+            'bytes': finished_bytes + sum(job.downloaded for job in active),
+            'speed': speed,
+            'eta': remaining / speed if speed and remaining else None,
+            'jobs': jobs,
+        }
+
+    def start(self):
+        if self.mode == 'bar':
+            from rich.progress import BarColumn, DownloadColumn, Progress, TaskProgressColumn, TextColumn
+
+            self._progress = Progress(
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TaskProgressColumn(),
+                DownloadColumn(),
+                TextColumn("{task.fields[speed]}", style="progress.data.speed"),
+                TextColumn("{task.fields[eta]}", style="progress.remaining"),
+                auto_refresh=False,
+            )
+            if self.show_total:
+                self._total_row = self._progress.add_task("Total", total=None, speed='', eta='')
+            self._progress.start()
+        self._thread = threading.Thread(target=self._run, name='progress', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.render()
+        if self._progress:
+            self._progress.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh):
+            self.render()
+
+    def render(self):
+        state = self.snapshot()
+        if self.mode == 'bar':
+            self._render_bar(state)
+        elif self.mode == 'json':
+            self._write(json.dumps({
+                'time': round(time.time(), 3),
+                'active': state['active'], 'done': state['done'], 'failed': state['failed'],
+                'bytes': state['bytes'], 'speed': round(state['speed']),
+                'eta': round(state['eta']) if state['eta'] is not None else None,
+                'jobs': [{'label': job.label, 'platform': job.platform, 'status': job.status,
+                          'downloaded': job.downloaded,
+                          'total': round(job.total) if job.total else None,
+                          'speed': round(job.speed or 0)} for job in state['jobs']],
+            }))
+        elif state['active'] or state['done'] or state['failed']:
+            self._write(
+                f"progress: {state['active']} active, {state['done']} done, "
+                f"{state['failed']} failed, {format_bytes(state['bytes'])}, "
+                f"{format_bytes(state['speed'])}/s, ETA {format_eta(state['eta'])}")
+
+    def _write(self, line):
+        self.stream.write(line + '\n')
+        self.stream.flush()
+
+    def _render_bar(self, state):
+        from rich.markup import escape
+
+        progress = self._progress
+        jobs = state['jobs']
+        for job in list(self._rows):
+            if job not in jobs:
+                progress.remove_task(self._rows.pop(job))
+        for job in jobs:
+            if job not in self._rows:
+                self._rows[job] = progress.add_task(job.label, total=None, speed='', eta='')
+            description = escape(shorten(job.label))
+            if job.status in ('processing', 'done', 'failed'):
+                description += f" [dim]({job.status})[/dim]"
+            eta = None
+            if job.speed and job.total and job.total > job.downloaded:
+                eta = (job.total - job.downloaded) / job.speed
+            progress.update(self._rows[job], description=description,
+                            total=job.total, completed=job.downloaded,
+                            speed=f"{format_bytes(job.speed)}/s" if job.speed else '',
+                            eta=format_eta(eta) if job.success is None else '')
+
+        if self._total_row is not None:
+            self._render_total(state)
+        progress.refresh()
+
+    def _render_total(self, state):
+        jobs = state['jobs']
+        totals = [job.total for job in jobs if job.success is None]
+        if not totals:
+            total = state['bytes']
+        else:
+            total = sum(totals) + self.finished_bytes if all(totals) else None
+        self._progress.update(
+            self._total_row,
+            description=(f"Total: {state['active']} active, {state['done']} done"
+                         + (f", {state['failed']} failed" if state['failed'] else '')),
+            total=total, completed=state['bytes'],
+            speed=f"{format_bytes(state['speed'])}/s", eta=format_eta(state['eta']))
@@ -0,0 +1,120 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+from .metrics import metrics
+from .utils import atomic_write_text, user_cache_dir
+
+from .router import SHORT_LINK, route
+
+SHORT_LINK_HOSTS = ('vm.tiktok.com', 'vt.tiktok.com', 'www.tiktok.com')
+MAX_CACHED_LINKS = 20000
+
+
+def is_short_link(url):
+    """True for TikTok share links that redirect to the real video URL."""
+    found = route(url)
+    return found is not None and found.platform == 'tiktok' and found.kind == SHORT_LINK
+
+
+def _canonical(url):
+    """Drop the tracking query TikTok appends to redirected video URLs."""
+    parts = urlsplit(url)
+    if '/video/' in parts.path:
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+    return url
+
+
+class ShortLinkResolver:
+    """Resolve short links over one pooled HTTP session, with a disk cache.
+
+    A short link always points at the same video, so resolved targets are
+    kept in ``short-links.json`` under the user cache directory.
+    """
+
+    def __init__(self, cache_path=None, timeout=10, max_workers=8):
+        self.cache_path = cache_path or (user_cache_dir() / 'short-links.json')
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._session = None
+        self._links = None
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=len(SHORT_LINK_HOSTS),
+                                      pool_maxsize=self.max_workers)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def _get_links(self):
+        with self._lock:
+            if self._links is None:
+                try:
+                    with open(self.cache_path, encoding='utf-8') as f:
+                        self._links = json.load(f)
+                except (OSError, ValueError):
+                    self._links = {}
+            return self._links
+
+    def cached(self, url):
+        return self._get_links().get(url)
+
+    def resolve(self, url, save=True):
+        """Return the canonical URL a short link redirects to.
+
+        Falls back to the original URL when the request fails; failures
+        are not cached.
+        """
+        target = self.cached(url)
+        if target:
+            return target
+        try:
+            with metrics.phase('resolve', 'tiktok'):
+                response = self._get_session().head(url, allow_redirects=True,
+                                                    timeout=self.timeout)
+        except Exception:
+            return url
+        target = _canonical(response.url)
+        with self._lock:
+            self._links[url] = target
+        if save:
+            self.save()
+        return target
+
+    def resolve_many(self, urls):
+        """Resolve all uncached short links in urls concurrently.
+
+        Returns a dict mapping each short link to its target.
+        """
+        links = self._get_links()
+        pending = sorted({u for u in urls if is_short_link(u) and u not in links})
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(lambda u: self.resolve(u, save=False), pending))
+            self.save()
+        return {u: links.get(u, u) for u in urls if is_short_link(u)}
+
+    def save(self):
+        with self._lock:
+            links = self._links or {}
+            if len(links) > MAX_CACHED_LINKS:
+                # dicts keep insertion order: drop the oldest links
+                for url in list(links)[:len(links) - MAX_CACHED_LINKS]:
+                    del links[url]
+            text = json.dumps(links)
+        try:
+            atomic_write_text(self.cache_path, text)
+        except OSError:
+            pass
+
+
+short_link_resolver = ShortLinkResolver()
@@ -0,0 +1,183 @@
+import errno
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+
+from yt_dlp.networking.exceptions import HTTPError, TransportError
+from yt_dlp.utils import (
+    DownloadError, ExtractorError, GeoRestrictedError, PostProcessingError, UnsupportedError
+)
+
+# Error classes
+TRANSIENT = 'transient'        # network hiccup, 5xx, expired media URL: retry soon
+RATE_LIMITED = 'rate_limited'  # 429 or a throttling page: retry after a pause
+AUTH = 'auth'                  # login, cookies or age gate: retrying will not help
+PERMANENT = 'permanent'        # removed, private, unsupported: never retry
+
+_RATE_LIMITED_STATUS = {429}
+_TRANSIENT_STATUS = {403, 408, 410, 425, 500, 502, 503, 504, 520, 521, 522, 524}
+_AUTH_STATUS = {401, 407}
+_PERMANENT_STATUS = {400, 404, 405, 451}
+
+# Matched against the error message when no HTTP status is available.
+# Checked in order, so the more specific classes come first.
+_MESSAGE_PATTERNS = (
+    (RATE_LIMITED, re.compile(
+        r'HTTP Error 429|too many requests|rate.?limit|try again later|slow down', re.IGNORECASE)),
+    (TRANSIENT, re.compile(
+        r'HTTP Error 5\d\d|timed out|connection (?:reset|refused|aborted)|temporar',
+        re.IGNORECASE)),
+    (AUTH, re.compile(
+        r'log ?in|sign in|cookies|authenticat|registered users|age.?restrict|confirm your age'
+        r'|members.?only|subscri(?:ber|ption)', re.IGNORECASE)),
+    (PERMANENT, re.compile(
+        r'private|removed|deleted|no longer available|not available|unavailable|copyright'
+        r'|does not exist|not found|unsupported url|no video formats|no space left on device',
+        re.IGNORECASE)),
+)
+
+
+class Cancelled(Exception):
+    """Raised from a progress hook to stop a download; never retried."""
+
+
+def _causes(error):
+    """Yield error and the exceptions it wraps, outermost first."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        if isinstance(error, DownloadError) and error.exc_info:
+            error = error.exc_info[1]
+        elif isinstance(error, ExtractorError) and error.cause:
+            error = error.cause
+        else:
+            error = error.__cause__ or error.__context__
+
+
+def _http_error(error):
+    return next((e for e in _causes(error) if isinstance(e, HTTPError)), None)
+
+
+def classify_error(error):
+    """Return TRANSIENT, RATE_LIMITED, AUTH or PERMANENT for a yt-dlp error."""
+    http_error = _http_error(error)
+    if http_error is not None:
+        status = http_error.status
+        if status in _RATE_LIMITED_STATUS:
+            return RATE_LIMITED
+        if status in _AUTH_STATUS:
+            return AUTH
+        if status in _PERMANENT_STATUS:
+            return PERMANENT
+        if status in _TRANSIENT_STATUS or status >= 500:
+            return TRANSIENT
+
+    causes = list(_causes(error))
+    if any(isinstance(e, (Cancelled, GeoRestrictedError, UnsupportedError, PostProcessingError))
+           for e in causes):
+        return PERMANENT
+    # A full disk, including diskspace.InsufficientSpace: retrying soon will not help
+    if any(isinstance(e, OSError) and e.errno == errno.ENOSPC for e in causes):
+        return PERMANENT
+    if any(isinstance(e, (TransportError, TimeoutError, ConnectionError)) for e in causes):
+        return TRANSIENT
+
+    message = ' '.join(str(e) for e in causes)
+    for kind, pattern in _MESSAGE_PATTERNS:
+        if pattern.search(message):
+            return kind
+    # Extractor breakage and anything unknown is worth another try
+    return TRANSIENT
+
+
+def retry_after(error):
+    """Seconds requested by a Retry-After header on the underlying response."""
+    http_error = _http_error(error)
+    if http_error is None or http_error.response is None:
+        return None
+    value = http_error.response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def refreshes_media_url(error):
+    """True if a retry should re-extract: the signed media URL was refused."""
+    http_error = _http_error(error)
+    return http_error is not None and http_error.status in (403, 410)
+
+
+class RetryFailed(Exception):
+    """Raised by RetryPolicy.run once a job has failed for good."""
+
+    def __init__(self, error, kind, attempts):
+        super().__init__(str(error))
+        self.error = error
+        self.kind = kind
+        self.attempts = attempts
+
+
+class RetryPolicy:
+    """How often and how patiently a job is retried after an error.
+
+    Transient and rate-limited errors are retried up to max_attempts in
+    total, with exponential backoff and full jitter; rate-limited ones
+    wait at least as long as the server's Retry-After, unless it asks for
+    more than max_retry_after. Auth and permanent errors fail at once.
+    """
+
+    RETRYABLE = (TRANSIENT, RATE_LIMITED)
+
+    def __init__(self, max_attempts=3, base_delay=2.0, max_delay=60.0,
+                 rate_limit_delay=30.0, max_retry_after=300.0, sleep=time.sleep):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limit_delay = rate_limit_delay
+        self.max_retry_after = max_retry_after
+        self.sleep = sleep
+
+    def delay(self, attempt, kind, error=None):
+        """Seconds to wait before attempt + 1, or None to give up."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling)
+        if kind == RATE_LIMITED:
+            requested = retry_after(error) if error is not None else None
+            if requested is not None and requested > self.max_retry_after:
+                return None
+            floor = requested if requested is not None else self.rate_limit_delay
+            # Honour the server even past max_delay; it would refuse us otherwise
+            delay = max(delay, floor)
+        return delay
+
+    def run(self, fn, on_retry=None):
+        """Call fn(attempt) until it succeeds; return (result, attempts).
+
+        on_retry(attempt, kind, delay, error) is called before each wait.
+        Raises RetryFailed with the last error when retries are exhausted
+        or the error is not retryable.
+        """
+        attempt = 1
+        while True:
+            try:
+                return fn(attempt), attempt
+            except Exception as e:
+                kind = classify_error(e)
+                delay = None
+                if kind in self.RETRYABLE and attempt < self.max_attempts:
+                    delay = self.delay(attempt, kind, e)
+                if delay is None:
+                    raise RetryFailed(e, kind, attempt) from e
+                if on_retry:
+                    on_retry(attempt, kind, delay, e)
+                self.sleep(delay)
+                attempt += 1
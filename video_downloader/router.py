@@ -0,0 +1,129 @@
+import functools
+import re
+
+# Route kinds
+VIDEO = 'video'
+PLAYLIST = 'playlist'
+CHANNEL = 'channel'
+SHORT_LINK = 'short'
+
+# Pages whose target is in the query string: ?v=ID and/or ?list=ID
+_WATCH = 'watch'
+_LIST = 'list'
+
+# (platform, host pattern, paths as (kind, pattern)). A host matches
+# itself and its subdomains. Each path's (?P<id>...) group captures the
+# video ID, short code or query string.
+_SITES = (
+    ('youtube', r'(?:youtube|youtube-nocookie)\.com', (
+        (VIDEO, r'/(?:shorts|live|embed|v|e)/(?P<id>[\w-]{11})(?![\w-])'),
+        (_WATCH, r'/watch/?\?(?P<id>[^#\s]*)'),
+        (_LIST, r'/playlist/?\?(?P<id>[^#\s]*)'),
+        (CHANNEL, r'/(?P<id>@[^/?#\s]+|(?:channel|c|user)/[^/?#\s]+)'),
+    )),
+    ('youtube', r'youtu\.be', (
+        (VIDEO, r'/(?P<id>[\w-]{11})(?![\w-])'),
+    )),
+    ('tiktok', r'(?:vm|vt)\.tiktok\.com', (
+        (SHORT_LINK, r'/(?P<id>[\w-]+)'),
+    )),
+    ('tiktok', r'tiktok\.com', (
+        (VIDEO, r'/(?:@[^/?#\s]+/(?:video|photo)|v|embed(?:/v2)?)/(?P<id>\d+)'),
+        (SHORT_LINK, r'/t/(?P<id>[\w-]+)'),
+    )),
+    ('instagram', r'(?:instagram\.com|instagr\.am)', (
+        (VIDEO, r'/(?:[^/?#\s]+/)?(?:p|tv|reels?)/(?P<id>[\w-]+)'),
+    )),
+    ('facebook', r'fb\.watch', (
+        (SHORT_LINK, r'/(?P<id>[\w-]+)'),
+    )),
+    ('facebook', r'(?:facebook|fb)\.com', (
+        (VIDEO, r'/(?:(?:[^/?#\s]+/)?videos/(?:[^/?#\s]+/)?|reel/)(?P<id>\d+)'),
+        (_WATCH, r'/(?:watch|video\.php)/?\?(?P<id>[^#\s]*)'),
+        (SHORT_LINK, r'/share/[vr]/(?P<id>[\w-]+)'),
+    )),
+    ('twitter', r'(?:twitter|x)\.com', (
+        (VIDEO, r'/(?:[^/?#\s]+/status(?:es)?|i/(?:web/)?status)/(?P<id>\d+)'),
+    )),
+)
+
+
+@functools.cache
+def _compile(sites=_SITES):
+    """One pattern for every site, and group name -> (platform, kind).
+
+    Each host is followed by an empty marker group, then by its optional
+    paths, each in a group of its own. The last group that matched thus
+    tells both the platform and, if a path matched, the kind of URL.
+    Compiled on first use, so that starting the CLI does not pay for it.
+    """
+    groups = {}
+    branches = []
+    for platform, host, paths in sites:
+        marker = f'g{len(groups)}'
+        groups[marker] = (platform, None)
+        alternatives = []
+        for kind, path in paths:
+            name = f'g{len(groups)}'
+            groups[name] = (platform, kind)
+            alternatives.append(path.replace('(?P<id>', f'(?P<{name}>'))
+        branches.append(rf"{host}\.?(?::\d+)?(?=[/?#\s]|$)(?P<{marker}>)"
+                        rf"(?:{'|'.join(alternatives)})?")
+    # Optional scheme, '//' and user info, then any subdomains: "x.com"
+    # matches x.com and mobile.x.com but not max.com
+    pattern = (r'\s*(?:[a-z][a-z0-9+.-]*:)?(?://)?(?:[^/?#@\s]*@)?(?:[\w-]+\.)*?'
+               rf"(?:{'|'.join(branches)})")
+    return re.compile(pattern, re.IGNORECASE), groups
+
+
+_QUERY_V = re.compile(r'(?:^|&)v=([\w-]+)')
+_QUERY_LIST = re.compile(r'(?:^|&)list=[\w-]')
+
+
+class Route:
+    """What a URL points at: platform, kind (VIDEO, PLAYLIST, CHANNEL,
+    SHORT_LINK or None if unknown) and the video ID, if the URL has one."""
+
+    __slots__ = ('platform', 'kind', 'video_id')
+
+    def __init__(self, platform, kind=None, video_id=None):
+        self.platform = platform
+        self.kind = kind
+        self.video_id = video_id
+
+    @property
+    def key(self):
+        """(extractor, video ID) as the download index keys it, or None.
+
+        Every variant of a video URL (tracking parameters, mobile hosts,
+        youtu.be, shorts/) has the same key. Playlists have none, even
+        a watch URL with a list= that names a video.
+        """
+        return (self.platform, self.video_id) if self.kind == VIDEO else None
+
+    def __repr__(self):
+        return f'Route({self.platform!r}, {self.kind!r}, {self.video_id!r})'
+
+
+def route(url):
+    """Route url in one regex pass, without network access.
+
+    Returns None when the host is not one of the supported sites or a
+    subdomain of one.
+    """
+    router, groups = _compile()
+    match = router.match(url)
+    if not match:
+        return None
+    group = match.lastgroup
+    platform, kind = groups[group]
+    if kind in (_WATCH, _LIST):
+        query = match[group]
+        video = _QUERY_V.search(query) if kind == _WATCH else None
+        if _QUERY_LIST.search(query):
+            # yt-dlp downloads the whole list of a watch?v=...&list=... URL
+            return Route(platform, PLAYLIST, video[1] if video else None)
+        return Route(platform, VIDEO, video[1]) if video else Route(platform)
+    if kind == VIDEO:
+        return Route(platform, VIDEO, match[group])
+    return Route(platform, kind)
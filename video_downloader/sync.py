@@ -0,0 +1,123 @@
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+
+from .utils import atomic_write_text, user_cache_dir
+
+# An ordered feed stops being listed after this many consecutive entries
+# that the last sync had already seen and that are already downloaded
+SYNC_STOP_AFTER = 10
+
+# Channel upload tabs and uploads playlists (UU...) list the newest video first
+_NEWEST_FIRST = re.compile(
+    r'youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)'
+    r'(?:/(?:videos|streams|shorts))?/?(?:[?#]|$)'
+    r'|[?&]list=UU[\w-]+', re.IGNORECASE)
+
+
+def is_newest_first(url):
+    """True if url is a feed that lists new videos before old ones."""
+    return bool(_NEWEST_FIRST.search(url))
+
+
+def archive_key(entry):
+    """The .download_archive line yt-dlp writes for a flat playlist entry."""
+    return f"{(entry.get('ie_key') or 'youtube').lower()} {entry.get('id')}"
+
+
+def read_download_archive(path):
+    """Return the set of 'extractor id' lines in a yt-dlp download archive."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+class PlaylistSnapshot:
+    """Entry IDs a playlist listed at its last sync, kept per playlist URL.
+
+    Stored under ~/.cache/video-downloader/playlists/ together with the
+    playlist's download directory, whose .download_archive tells which
+    known entries are still missing.
+    """
+
+    def __init__(self, url, path=None):
+        self.url = url
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        self.path = Path(path or user_cache_dir() / 'playlists' / f'{digest}.json')
+        self.ids = []
+        self.download_dir = None
+        self.synced = None
+
+    def load(self):
+        """Restore the last sync; returns False if there is none."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('url') != self.url:
+            return False
+        self.ids = state.get('ids', [])
+        self.download_dir = state.get('download_dir')
+        self.synced = state.get('synced')
+        return True
+
+    def update(self, info, download_dir, partial=False):
+        """Merge a new listing in and save; returns the IDs that are new.
+
+        A listing that stopped early, or a partial one (playlist items),
+        only covers part of the feed, so the IDs it did not reach are kept
+        after the listed ones.
+        """
+        listed = [entry.get('id') for entry in info['entries'] if entry.get('id')]
+        known = set(self.ids)
+        new = [video_id for video_id in listed if video_id not in known]
+        if partial or not info.get('complete'):
+            seen = set(listed)
+            listed += [video_id for video_id in self.ids if video_id not in seen]
+        self.ids = listed
+        self.download_dir = str(download_dir)
+        self.synced = time.time()
+        try:
+            atomic_write_text(self.path, json.dumps({
+                'url': self.url,
+                'download_dir': self.download_dir,
+                'synced': self.synced,
+                'ids': self.ids,
+            }))
+        except OSError:
+            pass
+        return new
+
+    def stop_condition(self, stop_after=SYNC_STOP_AFTER):
+        """Return stop(entry) for YouTubeDownloader.get_playlist_info, or None.
+
+        Listing stops after stop_after consecutive entries that are known
+        and downloaded, but only once every known entry that is still
+        missing from the archive has been listed again.
+        """
+        if not self.ids or not is_newest_first(self.url):
+            return None
+        archive = set()
+        if self.download_dir:
+            archive = read_download_archive(Path(self.download_dir) / '.download_archive')
+        downloaded = {key.partition(' ')[2] for key in archive}
+        known = set(self.ids)
+        missing = known - downloaded
+        run = 0
+
+        def stop(entry):
+            nonlocal run
+            video_id = entry.get('id')
+            missing.discard(video_id)
+            if video_id in known and video_id in downloaded:
+                run += 1
+            else:
+                run = 0
+            return run >= stop_after and not missing
+
+        return stop
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from yt_dlp.postprocessor.common import PostProcessor
+
+from .metrics import metrics
+
+# Targets of --audio-format; 'copy' keeps whatever codec the source has
+AUDIO_FORMATS = ('copy', 'm4a', 'opus', 'mp3')
+DEFAULT_AUDIO_FORMAT = 'mp3'
+AUDIO_QUALITY = '192'
+
+# Start of the acodec yt-dlp reports for sources already in each format
+_SOURCE_CODECS = {'m4a': 'mp4a', 'opus': 'opus', 'mp3': 'mp3'}
+
+# Extensions FFmpegExtractAudio leaves alone when asked for 'best'
+_AUDIO_EXTS = ('aiff', 'alac', 'flac', 'm4a', 'mka', 'mp3', 'ogg', 'opus', 'wav', 'wma')
+
+
+def audio_selector(audio_format):
+    """yt-dlp format selector that prefers a source already in audio_format."""
+    codec = _SOURCE_CODECS.get(audio_format)
+    if codec is None:
+        return 'bestaudio/best'
+    return f'bestaudio[acodec^={codec}]/bestaudio/best'
+
+
+def needs_conversion(info, audio_format):
+    """False if the downloaded file described by info is already the target."""
+    ext = info.get('ext')
+    if audio_format == 'copy':
+        return ext not in _AUDIO_EXTS
+    acodec = (info.get('acodec') or '').lower()
+    return not (ext == audio_format and acodec.startswith(_SOURCE_CODECS[audio_format]))
+
+
+def convert_audio(path, ext, codec=DEFAULT_AUDIO_FORMAT, quality=AUDIO_QUALITY, filetime=None):
+    """Convert one downloaded file with ffmpeg and return the new path.
+
+    Runs yt-dlp's FFmpegExtractAudio outside a YoutubeDL, so the result
+    is the same as with the in-process post-processor: when the source
+    codec already fits, the stream is copied into the target container
+    rather than re-encoded. codec 'best' keeps the source codec. The
+    source file is removed once the conversion has succeeded.
+    """
+    from yt_dlp.postprocessor import FFmpegExtractAudioPP
+
+    pp = FFmpegExtractAudioPP(preferredcodec=codec, preferredquality=quality)
+    to_delete, info = pp.run({'filepath': path, 'ext': ext, 'filetime': filetime})
+    for old in to_delete:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+    return info['filepath']
+
+
+class TranscodePool:
+    """Bounded pool of ffmpeg audio conversions running beside the downloads.
+
+    Each worker thread drives one ffmpeg process, so workers defaults to
+    the CPU count. submit() blocks once max_pending conversions are queued
+    or running: a download that finishes while the pool is saturated
+    waits before the next one starts, instead of piling files up on disk.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_pending = max_pending or self.workers * 2
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        # Future -> metrics job of the download it converts, or None
+        self._futures = {}
+
+    def submit(self, path, ext, codec=DEFAULT_AUDIO_FORMAT, quality=AUDIO_QUALITY,
+               filetime=None, job=None):
+        """Queue a conversion of path, returning a Future of the new path.
+
+        job is the download's metrics job from metrics.defer(); the
+        conversion time goes into its postprocess phase.
+        """
+        self._slots.acquire()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='transcode')
+            future = self._executor.submit(self._run, path, ext, codec, quality, filetime, job)
+            self._futures[future] = job
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, path, ext, codec, quality, filetime, job):
+        started = time.monotonic()
+        try:
+            return convert_audio(path, ext, codec, quality, filetime)
+        except Exception:
+            if job is not None:
+                # The download's result said success; without its file it was not
+                job.outcome = 'failed'
+            raise
+        finally:
+            metrics.resume(job, 'postprocess', time.monotonic() - started)
+
+    def _done(self, future):
+        with self._lock:
+            job = self._futures.pop(future, None)
+        if future.cancelled():
+            # Never ran: the download's record need not wait any longer
+            metrics.resume(job)
+        self._slots.release()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._futures)
+
+    def drain(self, cancel_pending=False):
+        """Wait for every conversion and the callbacks chained to it.
+
+        With cancel_pending, conversions that have not started are dropped.
+        The pool starts again on the next submit().
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            # Joining the workers also waits for done-callbacks, which run
+            # on the worker thread right after each conversion
+            executor.shutdown(wait=True, cancel_futures=cancel_pending)
+
+
+class TranscodeHandoff(PostProcessor):
+    """Post-processor that queues each finished download on a TranscodePool.
+
+    It runs once the file is in its final place and returns straight
+    away, so yt-dlp moves on to the next download while ffmpeg works.
+    Files already in audio_format are not queued at all. futures maps
+    each queued source path to the Future of its conversion.
+    """
+
+    # When sessions.YoutubeDLPool registers it in the chain
+    when = 'after_move'
+
+    def __init__(self, pool, audio_format=DEFAULT_AUDIO_FORMAT, quality=AUDIO_QUALITY):
+        super().__init__(None)
+        self.pool = pool
+        self.audio_format = audio_format
+        self.quality = quality
+        self.futures = {}
+
+    def run(self, info):
+        if not needs_conversion(info, self.audio_format):
+            return [], info
+        path = info['filepath']
+        codec = 'best' if self.audio_format == 'copy' else self.audio_format
+        self.futures[path] = self.pool.submit(path, info['ext'], codec, self.quality,
+                                              info.get('filetime'), metrics.defer())
+        return [], info
+
+
+def conversion_failures(futures):
+    """Wait for futures; return (source path, error) for each failed one."""
+    wait(list(futures.values()))
+    failures = []
+    for path, future in futures.items():
+        error = 'cancelled' if future.cancelled() else future.exception()
+        if error is not None:
+            failures.append((path, error))
+    return failures
+
+
+def finish(result):
+    """Wait for a download result's audio conversion and fold it in.
+
+    Returns the result with the converted file as filename, or a failed
+    result if ffmpeg did not succeed. Results without one pass through.
+    """
+    future = result.pop('transcode', None)
+    if future is None:
+        return result
+    try:
+        result['filename'] = future.result()
+    except Exception as e:
+        return {**result, 'success': False, 'error': f"Audio conversion failed: {e}"}
+    return result
+
+
+def when_finished(result, callback):
+    """Call callback(result) once the result's audio conversion is done.
+
+    Without a pending conversion callback runs at once; otherwise it runs
+    on the transcode worker, which TranscodePool.drain() waits for.
+    """
+    future = result.get('transcode')
+    if future is None:
+        callback(result)
+    else:
+        future.add_done_callback(lambda f: callback(finish(result)))
+
+
+transcode_pool = TranscodePool()
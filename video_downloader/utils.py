@@ -1,30 +1,43 @@
+import os
 import re
-from rich.progress import (
-    Progress,
-    SpinnerColumn,
-    TextColumn,
-    BarColumn,
-    TaskProgressColumn,
-    DownloadColumn,
-    TransferSpeedColumn
-)
+import threading
+from pathlib import Path
+
+from .router import PLAYLIST, route
+
+# rich is imported on first use: it costs more than the rest of CLI
+# startup, and --help or a bad URL never needs it.
+
+
+class LazyConsole:
+    """Stand-in for a rich Console that is created on first attribute access."""
+
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+
+def rprint(*objects, **kwargs):
+    """rich.print, imported lazily."""
+    from rich import print as _rprint
+    _rprint(*objects, **kwargs)
+
+
+def escape(text):
+    """Escape rich markup in text (file names often contain [brackets])."""
+    from rich.markup import escape as _escape
+    return _escape(text)
 
 
 def detect_platform(url):
-    """Detect platform from URL"""
-    url_lower = url.lower()
-    if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-        return 'youtube'
-    elif 'tiktok.com' in url_lower:
-        return 'tiktok'
-    elif 'instagram.com' in url_lower:
-        return 'instagram'
-    elif 'facebook.com' in url_lower or 'fb.watch' in url_lower:
-        return 'facebook'
-    elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-        return 'twitter'
-    else:
-        return None
+    """Detect platform from the URL's host (see router.route)"""
+    found = route(url)
+    return found.platform if found else None
 
 
 def sanitize_filename(filename):
@@ -34,6 +47,15 @@ def sanitize_filename(filename):
 
 def create_progress_bar():
     """Create a rich progress bar for downloads"""
+    from rich.progress import (
+        Progress,
+        SpinnerColumn,
+        TextColumn,
+        BarColumn,
+        TaskProgressColumn,
+        DownloadColumn,
+        TransferSpeedColumn
+    )
     return Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -46,6 +68,34 @@ def create_progress_bar():
 
 
 def is_youtube_playlist(url):
-    """Detect if a URL is a YouTube playlist."""
-    url_lower = url.lower()
-    return ('youtube.com/playlist?' in url_lower or 'list=' in url_lower)
+    """Detect if a URL is a YouTube playlist (or a video URL with a list=)."""
+    found = route(url)
+    return found is not None and found.platform == 'youtube' and found.kind == PLAYLIST
+
+
+def user_cache_dir():
+    """Per-user cache directory (honours XDG_CACHE_HOME)."""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'video-downloader'
+
+
+def user_state_dir():
+    """Per-user directory for state that must outlive the cache (honours XDG_STATE_HOME)."""
+    base = os.environ.get('XDG_STATE_HOME') or Path.home() / '.local' / 'state'
+    return Path(base) / 'video-downloader'
+
+
+def user_config_dir():
+    """Per-user config directory (honours XDG_CONFIG_HOME)."""
+    base = os.environ.get('XDG_CONFIG_HOME') or Path.home() / '.config'
+    return Path(base) / 'video-downloader'
+
+
+def atomic_write_text(path, text):
+    """Write text to path via a temp file and rename, creating parents."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
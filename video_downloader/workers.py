@@ -0,0 +1,103 @@
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Maximum simultaneous jobs per platform. Sites that rate-limit aggressively
+# get fewer slots so one platform cannot exhaust the whole pool.
+PLATFORM_LIMITS = {
+    'youtube': 4,
+    'tiktok': 2,
+    'instagram': 2,
+    'facebook': 2,
+    'twitter': 2,
+}
+
+
+class WorkerPool:
+    """Bounded thread pool with per-platform concurrency caps.
+
+    Jobs wait in a per-platform queue until both a worker and a platform
+    slot are free, so a backlog on one platform never blocks the others.
+    With max_pending set, submit() blocks once that many jobs are queued
+    or running, which keeps memory flat when feeding from a stream.
+    """
+
+    def __init__(self, jobs, limits=None, max_pending=None):
+        self.jobs = max(1, int(jobs))
+        self._slots = threading.BoundedSemaphore(max_pending) if max_pending else None
+        limits = PLATFORM_LIMITS if limits is None else limits
+        self.limits = {p: max(1, min(self.jobs, n)) for p, n in limits.items()}
+        self._executor = ThreadPoolExecutor(max_workers=self.jobs)
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._outstanding = 0
+        self._active = defaultdict(int)
+        self._pending = defaultdict(deque)
+
+    def submit(self, platform, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) under the platform's cap, returning a Future."""
+        if self._slots:
+            self._slots.acquire()
+        future = Future()
+        with self._lock:
+            self._outstanding += 1
+            self._pending[platform].append((future, fn, args, kwargs))
+            self._dispatch(platform)
+        return future
+
+    def _dispatch(self, platform):
+        # Caller must hold self._lock
+        limit = self.limits.get(platform, self.jobs)
+        queue = self._pending[platform]
+        while queue and self._active[platform] < limit:
+            job = queue.popleft()
+            self._active[platform] += 1
+            self._executor.submit(self._run, platform, *job)
+
+    def _run(self, platform, future, fn, args, kwargs):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                self._active[platform] -= 1
+                self._dispatch(platform)
+                self._job_finished()
+            if self._slots:
+                self._slots.release()
+
+    def _job_finished(self):
+        # Caller must hold self._lock
+        self._outstanding -= 1
+        if not self._outstanding:
+            self._drained.notify_all()
+
+    def wait(self):
+        """Block until every submitted job has finished."""
+        with self._drained:
+            while self._outstanding:
+                self._drained.wait()
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        if cancel_pending:
+            with self._lock:
+                for queue in self._pending.values():
+                    while queue:
+                        queue.popleft()[0].cancel()
+                        self._job_finished()
+                        if self._slots:
+                            self._slots.release()
+        if wait:
+            # Queued jobs are only handed to the executor as slots free up,
+            # so drain them before the executor stops accepting work
+            self.wait()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True, cancel_pending=exc_type is not None)